@@ -117,11 +117,10 @@ export default function AdminNotifications() {
       }
 
       const res = await axios.post(`${API_BASE_URL}/admin/notifications/send`, payload)
-      const created = res.data?.created_count ?? 0
-      const target = res.data?.target_count ?? 0
+      const target = res.data?.target_count ?? 'همه کاربران'
       const skipped = res.data?.skipped_user_ids?.length ?? 0
 
-      toast.success(`اعلان ارسال شد (${created}/${target}، رد شده: ${skipped})`)
+      toast.success(`اعلان در صف ارسال قرار گرفت (${target}، رد شده: ${skipped})`)
     } catch (err) {
       toast.error(err?.response?.data?.detail || 'خطا در ارسال اعلان')
     } finally {
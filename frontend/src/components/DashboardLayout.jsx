@@ -279,11 +279,68 @@ export default function DashboardLayout() {
         // ignore
       }
     }
-    fetchUnread()
-    const interval = setInterval(fetchUnread, 60000)
+    // Live updates over SSE; fall back to polling if the stream is unavailable
+    const controller = new AbortController()
+    let interval = null
+    let reconnectTimer = null
+    const startPolling = () => {
+      if (cancelled || interval) return
+      fetchUnread()
+      interval = setInterval(fetchUnread, 60000)
+    }
+    const streamUnread = async () => {
+      let connected = false
+      const auth = axios.defaults.headers.common['Authorization']
+      if (!auth || !window.ReadableStream) {
+        startPolling()
+        return
+      }
+      try {
+        const res = await fetch(`${API_BASE_URL}/notifications/stream`, {
+          headers: { Authorization: auth, Accept: 'text/event-stream' },
+          signal: controller.signal,
+        })
+        if (!res.ok || !res.body) throw new Error(`stream ${res.status}`)
+        connected = true
+        const reader = res.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+        while (!cancelled) {
+          const { value, done } = await reader.read()
+          if (done) break
+          buffer += decoder.decode(value, { stream: true })
+          const frames = buffer.split('\n\n')
+          buffer = frames.pop()
+          for (const frame of frames) {
+            const eventLine = frame.split('\n').find((l) => l.startsWith('event: '))
+            const dataLine = frame.split('\n').find((l) => l.startsWith('data: '))
+            if (!eventLine || !dataLine) continue
+            const event = eventLine.slice(7)
+            const data = JSON.parse(dataLine.slice(6))
+            if (event === 'resync' || data.unread_count == null) {
+              fetchUnread()
+            } else {
+              setUnreadCount(data.unread_count || 0)
+            }
+          }
+        }
+      } catch (e) {
+        // ignore
+      }
+      if (cancelled) return
+      if (connected) {
+        // Stream dropped after working (e.g. server restart): reconnect
+        reconnectTimer = setTimeout(streamUnread, 5000)
+      } else {
+        startPolling()
+      }
+    }
+    streamUnread()
     return () => {
       cancelled = true
-      clearInterval(interval)
+      controller.abort()
+      if (interval) clearInterval(interval)
+      if (reconnectTimer) clearTimeout(reconnectTimer)
     }
   }, [])
 
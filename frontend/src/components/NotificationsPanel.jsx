@@ -17,7 +17,7 @@ export default function NotificationsPanel() {
   const [selectedNotification, setSelectedNotification] = useState(null)
   const [hasMore, setHasMore] = useState(true)
   const [isInitialized, setIsInitialized] = useState(false)
-  const offsetRef = useRef(0)
+  const cursorRef = useRef(null)
   const observerTarget = useRef(null)
   const navigate = useNavigate()
   const [searchParams, setSearchParams] = useSearchParams()
@@ -30,19 +30,18 @@ export default function NotificationsPanel() {
       setLoadingMore(true)
       setError('')
       
-      const currentOffset = offsetRef.current
       const res = await axios.get(API, {
         params: {
           limit: PAGE_SIZE,
-          offset: currentOffset
+          cursor: cursorRef.current
         }
       })
       
       const newItems = res.data || []
       
       setItems(prevItems => [...prevItems, ...newItems])
-      offsetRef.current = currentOffset + newItems.length
-      setHasMore(newItems.length === PAGE_SIZE)
+      cursorRef.current = res.headers['x-next-cursor'] || null
+      setHasMore(Boolean(cursorRef.current))
     } catch (err) {
       setError(err?.response?.data?.detail || 'خطا در بارگذاری اعلان‌ها')
     } finally {
@@ -56,15 +55,14 @@ export default function NotificationsPanel() {
         setLoading(true)
         setItems([])
         setHasMore(true)
-        offsetRef.current = 0
+        cursorRef.current = null
       }
       setError('')
       
-      const currentOffset = reset ? 0 : offsetRef.current
       const res = await axios.get(API, {
         params: {
           limit: PAGE_SIZE,
-          offset: currentOffset
+          cursor: reset ? null : cursorRef.current
         }
       })
       
@@ -72,13 +70,12 @@ export default function NotificationsPanel() {
       
       if (reset) {
         setItems(newItems)
-        offsetRef.current = newItems.length
       } else {
         setItems(prev => [...prev, ...newItems])
-        offsetRef.current = currentOffset + newItems.length
       }
+      cursorRef.current = res.headers['x-next-cursor'] || null
       
-      setHasMore(newItems.length === PAGE_SIZE)
+      setHasMore(Boolean(cursorRef.current))
     } catch (err) {
       setError(err?.response?.data?.detail || 'خطا در بارگذاری اعلان‌ها')
     } finally {
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Redis Codec Benchmark
+
+Encodes and decodes representative Redis payloads with every available
+codec (src/core/codecs.py) and reports ops/sec and encoded size. Payloads
+match what the app sends: a new-notification event, an unread-count
+update, a config update, an event_msg_map hash value and a large admin
+event. No Redis needed.
+
+Usage:
+    python src/_scripts/bench_codecs.py [iterations]
+
+    default: 20000 iterations per payload and codec
+"""
+
+import sys
+import os
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.codecs import available_codecs, decode, encode
+
+PAYLOADS = {
+    "notification": {
+        "type": "notification",
+        "payload": {
+            "notification": {
+                "id": 123456789,
+                "type": "broadcast",
+                "title": "Scheduled maintenance",
+                "message": "The service will be unavailable on Sunday from 02:00 to 03:00 UTC.",
+                "link": "/status",
+                "is_read": False,
+                "created_at": "2026-10-18T06:00:00+00:00",
+            },
+            "unread_count": 7,
+        },
+    },
+    "unread_count": {"type": "unread_count", "payload": {"unread_count": 3}},
+    "config_update": {"key": "maintenance_mode", "value": "false"},
+    "event_msg_map": {"message_id": 987654, "chat_id": -1001234567890, "sent": True},
+    "admin_bulk": {
+        "type": "users_updated",
+        "payload": {
+            "user_ids": list(range(1000)),
+            "changes": [{"id": i, "role": "member", "active": i % 3 != 0} for i in range(200)],
+        },
+    },
+}
+
+
+def bench(codec, payload, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        data = encode(payload, codec)
+    encode_rate = iterations / (time.perf_counter() - started)
+
+    # Time the codec's own loads: decode() always picks the fastest
+    # registered decoder of a format (orjson for all JSON when installed)
+    body = codec.dumps(payload)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        codec.loads(body)
+    decode_rate = iterations / (time.perf_counter() - started)
+
+    assert decode(data) == payload, f"{codec.name} round trip mismatch"
+    return encode_rate, decode_rate, len(data)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    codecs = available_codecs()
+    print(f"Codecs: {', '.join(codecs)} ({iterations} iterations each)")
+
+    for name, payload in PAYLOADS.items():
+        print(f"\n{name}")
+        baseline = None
+        for codec in codecs.values():
+            count = iterations if name != "admin_bulk" else max(1, iterations // 50)
+            encode_rate, decode_rate, size = bench(codec, payload, count)
+            if baseline is None:
+                baseline = (encode_rate, decode_rate)
+            print(f"  {codec.name:<8} encode {encode_rate:10.0f}/s ({encode_rate / baseline[0]:4.1f}x)  "
+                  f"decode {decode_rate:10.0f}/s ({decode_rate / baseline[1]:4.1f}x)  {size:7,} bytes")
+
+
+if __name__ == "__main__":
+    main()
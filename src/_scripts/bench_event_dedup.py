@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Event Deduplicator Benchmark
+
+1. Hashing: event ids/sec per hash function and the collision
+   (false-positive) rate over N distinct events. No Redis needed.
+2. Redis (skipped with --offline): events/sec through one-at-a-time
+   is_duplicate calls versus pipelined check_many batches, on a stream where
+   a share of events are repeats. Reports false positives (new events
+   flagged duplicate), false negatives (repeats let through) and local LRU
+   hits. Keys use a random event type and expire with the dedup TTL.
+
+Usage:
+    python src/_scripts/bench_event_dedup.py [events] [repeat_ratio] [batch_size] [--offline]
+
+    defaults: 100000 events, 0.3 repeat ratio, batch size 100
+"""
+
+import asyncio
+import random
+import sys
+import os
+import time
+import uuid
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.concurrency_manager import EventDeduplicator, xxhash
+
+HASHES = ["sha256", "blake2b"] + (["xxhash"] if xxhash is not None else [])
+
+
+def make_stream(events: int, repeat_ratio: float):
+    """Distinct notification-like events with repeats mixed in shortly after."""
+    stream = []
+    seen = []
+    for i in range(events):
+        if seen and random.random() < repeat_ratio:
+            stream.append((seen[random.randrange(max(0, len(seen) - 1000), len(seen))], True))
+        else:
+            payload = {"id": i, "user_id": i % 5000, "title": "Benchmark"}
+            seen.append(payload)
+            stream.append((payload, False))
+    return stream
+
+
+def bench_hashing(events: int):
+    print("Hashing")
+    payloads = [{"id": i, "user_id": i % 5000} for i in range(events)]
+    for name in HASHES:
+        dedup = EventDeduplicator(hash_name=name)
+        started = time.perf_counter()
+        ids = {dedup._generate_event_id("bench", p) for p in payloads}
+        elapsed = time.perf_counter() - started
+        collisions = events - len(ids)
+        print(f"  {name:<8} {events / elapsed:12.0f} ids/s  collisions={collisions} "
+              f"({collisions / events:.2e} false-positive rate)")
+    if xxhash is None:
+        print("  (xxhash not installed; skipped)")
+
+
+async def bench_redis(stream, batch_size: int):
+    print(f"\nRedis (events={len(stream)}, repeats={sum(r for _, r in stream)}, batch={batch_size})")
+    for name in HASHES:
+        for local_size in (0, 10000):
+            for mode in ("single", "batched"):
+                event_type = f"bench_{uuid.uuid4().hex[:8]}"
+                dedup = EventDeduplicator(ttl=300, hash_name=name, local_size=local_size)
+                started = time.perf_counter()
+                flags = []
+                if mode == "single":
+                    for payload, _ in stream:
+                        flags.append(await dedup.is_duplicate(event_type, payload))
+                else:
+                    for start in range(0, len(stream), batch_size):
+                        chunk = stream[start:start + batch_size]
+                        flags.extend(await dedup.check_many([(event_type, p) for p, _ in chunk]))
+                elapsed = time.perf_counter() - started
+                false_pos = sum(1 for (_, repeat), dup in zip(stream, flags) if dup and not repeat)
+                false_neg = sum(1 for (_, repeat), dup in zip(stream, flags) if repeat and not dup)
+                stats = dedup.get_stats()
+                print(f"  {name:<8} lru={local_size:<6} {mode:<8} {len(stream) / elapsed:10.0f} events/s  "
+                      f"fp={false_pos} fn={false_neg} local_hits={stats['local_hits']} "
+                      f"redis_errors={stats['redis_errors']}")
+
+
+async def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    events = int(args[0]) if len(args) > 0 else 100000
+    repeat_ratio = float(args[1]) if len(args) > 1 else 0.3
+    batch_size = int(args[2]) if len(args) > 2 else 100
+
+    bench_hashing(events)
+    if "--offline" not in sys.argv:
+        await bench_redis(make_stream(events, repeat_ratio), batch_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Notification bulk_create Benchmark
+
+Creates temporary users, then measures rows/sec of
+NotificationRepo.bulk_create (chunked INSERT ... RETURNING) against the old
+add_all + per-row refresh approach. Temporary users (and, by cascade,
+their notifications) are deleted afterwards.
+
+Usage:
+    python src/_scripts/bench_notification_bulk_create.py [sizes...] [--legacy]
+
+    sizes default to 10000 100000; --legacy also times the old approach
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+
+from src.db.base import AsyncSessionLocal, engine
+from src.db.models import Notification
+from src.db.repos import NotificationRepo
+
+EMAIL_PREFIX = "bench_notif_"
+
+
+async def create_users(count: int) -> list:
+    async with engine.begin() as conn:
+        q = await conn.execute(
+            text(
+                """
+                INSERT INTO users (email, hashed_password, is_active, role, telegram_enabled)
+                SELECT :prefix || g || '@bench.local', 'x', true, 'user', false
+                FROM generate_series(1, :count) AS g
+                RETURNING id
+                """
+            ),
+            {"prefix": EMAIL_PREFIX, "count": count},
+        )
+        return [row[0] for row in q.all()]
+
+
+async def drop_users():
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM users WHERE email LIKE :pattern"),
+            {"pattern": f"{EMAIL_PREFIX}%@bench.local"},
+        )
+
+
+async def legacy_bulk_create(user_ids: list):
+    """The previous implementation: ORM add_all, then one refresh per row."""
+    async with AsyncSessionLocal() as session:
+        notifs = [
+            Notification(user_id=uid, type="bench", title="Bench", message="Benchmark message")
+            for uid in user_ids
+        ]
+        session.add_all(notifs)
+        await session.commit()
+        for n in notifs:
+            await session.refresh(n)
+    return notifs
+
+
+async def time_it(name: str, coro_factory):
+    started = time.perf_counter()
+    created = await coro_factory()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<12} rows={len(created):<8} time={elapsed:8.2f}s rate={len(created) / elapsed:10.0f} rows/s")
+
+
+async def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sizes = [int(a) for a in args] or [10000, 100000]
+    legacy = "--legacy" in sys.argv
+    repo = NotificationRepo()
+
+    try:
+        for size in sizes:
+            await drop_users()
+            user_ids = await create_users(size)
+            print(f"\nRecipients: {size}")
+            await time_it(
+                "bulk_create",
+                lambda: repo.bulk_create(
+                    user_ids, "bench", "Bench", "Benchmark message", send_push=False
+                ),
+            )
+            if legacy:
+                await time_it("legacy", lambda: legacy_bulk_create(user_ids))
+    finally:
+        await drop_users()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
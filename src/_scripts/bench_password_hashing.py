@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Password Hashing Event-Loop Latency Benchmark
+
+Simulates concurrent logins and measures how late a 10 ms ticker wakes up
+while bcrypt verification runs either inline on the event loop (the old
+behaviour) or on the bounded password-hash worker pool.
+
+Usage:
+    python src/_scripts/bench_password_hashing.py [concurrent_logins] [workers]
+"""
+
+import asyncio
+import statistics
+import sys
+import os
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.password_hasher import PasswordHasher, hash_password_sync, verify_password_sync
+from src.core.worker_pool import BoundedWorkerPool
+
+TICK_INTERVAL = 0.01
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list):
+    """Record how late each 10 ms tick fires, in milliseconds."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_INTERVAL
+        await asyncio.sleep(TICK_INTERVAL)
+        samples.append(max(0.0, (loop.time() - expected) * 1000))
+
+
+async def run_scenario(name: str, login, concurrency: int, hashed: str):
+    stop = asyncio.Event()
+    samples: list = []
+    ticker = asyncio.create_task(measure_loop_lag(stop, samples))
+    await asyncio.sleep(TICK_INTERVAL * 5)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login("secret-password", hashed) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+    print(f"{name:<8} logins={concurrency:<4} wall={elapsed:6.2f}s "
+          f"loop lag: mean={statistics.mean(samples or [0]):7.1f}ms "
+          f"p99={p99:7.1f}ms max={max(samples or [0]):7.1f}ms ticks={len(samples)}")
+
+
+async def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    hashed = hash_password_sync("secret-password")
+
+    async def inline_login(password, hashed_password):
+        return verify_password_sync(password, hashed_password)
+
+    pool = BoundedWorkerPool("bench", max_workers=workers, max_pending=concurrency)
+    hasher = PasswordHasher(pool)
+
+    print(f"Concurrent logins: {concurrency}, pool workers: {workers}")
+    await run_scenario("inline", inline_login, concurrency, hashed)
+    await run_scenario("pool", hasher.verify, concurrency, hashed)
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
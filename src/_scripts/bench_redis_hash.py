@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Redis Hash Batch Benchmark
+
+Stores, reads and deletes N keys of one hash through OptimizedRedisManager,
+first with per-key calls (store_hash / get_hash / delete_hash_key) and then
+with the batched calls (store_many / get_many / delete_many), once per
+available codec. Reports keys/sec per operation and the stored size.
+
+Requires a running Redis at REDIS_URL. The hash is named
+"bench:redis_hash:<codec>" and deleted afterwards.
+
+Usage:
+    python src/_scripts/bench_redis_hash.py [keys] [batch_size]
+
+    defaults: 1000 keys, batch size 1000 (one batch)
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.codecs import available_codecs
+from src.core.redis_manager import redis_manager
+
+HASH_PREFIX = "bench:redis_hash:"
+
+
+def make_items(keys: int) -> dict:
+    """Event-map-like values: small dicts with a few ids and a title."""
+    return {
+        f"event:{i}": {"message_id": 100000 + i, "chat_id": i % 97, "title": f"Event {i}", "sent": True}
+        for i in range(keys)
+    }
+
+
+def chunks(keys, size):
+    for start in range(0, len(keys), size):
+        yield keys[start:start + size]
+
+
+async def bench(name: str, items: dict, batch_size: int):
+    hash_name = f"{HASH_PREFIX}{name}"
+    keys = list(items)
+    conn = await redis_manager.pool.get_connection()
+    results = {}
+
+    started = time.perf_counter()
+    for key, value in items.items():
+        await redis_manager.store_hash(hash_name, key, value, ttl=300)
+    results["store single"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in keys:
+        await redis_manager.get_hash(hash_name, key)
+    results["get single"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in keys:
+        await redis_manager.delete_hash_key(hash_name, key)
+    results["delete single"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for batch in chunks(keys, batch_size):
+        await redis_manager.store_many(hash_name, {key: items[key] for key in batch}, ttl=300)
+    results["store many"] = time.perf_counter() - started
+    size = await conn.memory_usage(hash_name)
+
+    started = time.perf_counter()
+    fetched = {}
+    for batch in chunks(keys, batch_size):
+        fetched.update(await redis_manager.get_many(hash_name, batch))
+    results["get many"] = time.perf_counter() - started
+    assert fetched == items, "round trip mismatch"
+
+    started = time.perf_counter()
+    for batch in chunks(keys, batch_size):
+        await redis_manager.delete_many(hash_name, batch)
+    results["delete many"] = time.perf_counter() - started
+
+    await conn.delete(hash_name)
+    print(f"\n{name} (hash memory {size:,} bytes)")
+    for op in ("store", "get", "delete"):
+        single, many = results[f"{op} single"], results[f"{op} many"]
+        print(f"  {op:<7} single {len(keys) / single:10.0f} keys/s   "
+              f"batched {len(keys) / many:10.0f} keys/s   ({single / many:5.1f}x)")
+
+
+async def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else keys
+    items = make_items(keys)
+    print(f"Redis hash benchmark: {keys} keys, batch size {batch_size}")
+
+    original = redis_manager.codec
+    try:
+        for name, codec in available_codecs().items():
+            redis_manager.codec = codec
+            await bench(name, items, batch_size)
+    finally:
+        redis_manager.codec = original
+        await redis_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Redis Pool Throughput Benchmark
+
+Runs many concurrent callers, each issuing GET/SET pairs through
+RedisPool.get_connection, and reports ops/sec, errors and pool wait
+statistics. --legacy also runs the previous implementation: an
+asyncio.Lock around every get_connection call, a fresh client per call
+and a non-blocking pool that raises when all connections are busy.
+
+Requires a running Redis at REDIS_URL. Keys are written under
+"bench:redis_pool:" and deleted afterwards.
+
+Usage:
+    python src/_scripts/bench_redis_pool.py [callers] [ops_per_caller] [pool_size] [--legacy]
+
+    defaults: 1000 callers, 20 ops each, pool size from REDIS_POOL_SIZE
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import redis.asyncio as aioredis
+
+from src.config.settings import settings
+from src.core.redis_manager import RedisPool
+
+KEY_PREFIX = "bench:redis_pool:"
+
+
+class LegacyRedisPool:
+    """The previous RedisPool.get_connection behaviour."""
+
+    def __init__(self, redis_url: str, pool_size: int):
+        self.redis_url = redis_url
+        self.pool_size = pool_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def get_connection(self) -> aioredis.Redis:
+        async with self._lock:
+            if self._pool is None:
+                self._pool = aioredis.ConnectionPool.from_url(
+                    self.redis_url, max_connections=self.pool_size
+                )
+            return aioredis.Redis(connection_pool=self._pool)
+
+    async def close(self):
+        if self._pool:
+            await self._pool.disconnect()
+
+
+async def caller(pool, index: int, ops: int, errors: list):
+    key = f"{KEY_PREFIX}{index}"
+    for i in range(ops // 2):
+        try:
+            conn = await pool.get_connection()
+            await conn.set(key, i)
+            conn = await pool.get_connection()
+            await conn.get(key)
+        except Exception as e:  # noqa: BLE001
+            errors.append(type(e).__name__)
+
+
+async def run(name: str, pool, callers: int, ops: int):
+    errors: list = []
+    started = time.perf_counter()
+    await asyncio.gather(*[caller(pool, i, ops, errors) for i in range(callers)])
+    elapsed = time.perf_counter() - started
+    done = callers * (ops // 2) * 2 - len(errors) * 2
+    print(f"{name:<8} callers={callers:<5} ops={done:<8} time={elapsed:7.2f}s "
+          f"rate={done / elapsed:10.0f} ops/s errors={len(errors)}"
+          + (f" ({errors[0]})" if errors else ""))
+    if isinstance(pool, RedisPool):
+        stats = pool.get_stats()
+        print(f"{'':<8} pool: max_waiters={stats['max_waiters']} avg_wait={stats['avg_wait_ms']}ms "
+              f"max_wait={stats['max_wait_ms']}ms acquire_errors={stats['acquire_errors']}")
+
+
+async def cleanup(pool: RedisPool):
+    conn = await pool.get_connection()
+    keys = [key async for key in conn.scan_iter(match=f"{KEY_PREFIX}*", count=1000)]
+    if keys:
+        await conn.delete(*keys)
+
+
+async def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    callers = int(args[0]) if len(args) > 0 else 1000
+    ops = int(args[1]) if len(args) > 1 else 20
+    pool_size = int(args[2]) if len(args) > 2 else settings.redis_pool_size
+
+    pool = RedisPool(settings.redis_url, pool_size=pool_size, timeout=settings.redis_pool_timeout)
+    try:
+        if "--legacy" in sys.argv:
+            legacy = LegacyRedisPool(settings.redis_url, pool_size)
+            try:
+                await run("legacy", legacy, callers, ops)
+            finally:
+                await legacy.close()
+        await run("shared", pool, callers, ops)
+    finally:
+        await cleanup(pool)
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
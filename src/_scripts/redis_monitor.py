@@ -147,6 +147,19 @@ async def print_redis_manager_stats():
     print(f"Events Batched:    {stats['events_batched']:,}")
     print(f"Active Channels:   {stats['active_channels']}")
     print(f"Pool Size:         {stats['pool_size']}")
+    pool = stats.get('pool', {})
+    if pool.get('initialized'):
+        print(f"Pool In Use:       {pool['in_use']}")
+        print(f"Pool Waiters:      {pool['waiters']} (max {pool['max_waiters']})")
+        print(f"Pool Wait:         avg {pool['avg_wait_ms']}ms, max {pool['max_wait_ms']}ms")
+        print(f"Pool Errors:       {pool['acquire_errors']:,}")
+    for channel, ch in stats.get('throttler', {}).get('channels', {}).items():
+        print(f"Channel {channel}: depth {ch['depth']}, published {ch['published']:,} "
+              f"in {ch['batches']:,} batches, coalesced {ch['coalesced']:,}, "
+              f"dropped {ch['dropped']:,}, failed {ch['failed']:,}")
+        buckets = ", ".join(f"{label[3:]}ms: {n}" for label, n in ch['latency_ms'].items() if n)
+        if buckets:
+            print(f"  Latency:         {buckets}")
     
     # Calculate throttling efficiency
     if stats['events_published'] > 0:
@@ -1,26 +1,41 @@
+import json
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
-from sqlalchemy import func, select
+from sqlalchemy import func, select, true
 from sqlalchemy.orm import joinedload
 
 from src.api.auth_api import get_current_admin, get_role_info
+from src.config.settings import settings
+from src.core.broadcast_worker import broadcast_worker
+from src.core.notification_retention import notification_retention
+from src.core.principal_cache import principal_cache
+from src.core.single_flight import SingleFlightCache
+from src.core.subscription_hub import subscription_hub
+from src.core.token_epochs import token_epochs
+from src.core.user_event_hub import user_event_hub
 from src.db.base import AsyncSessionLocal
 from src.db.models import (
+    BroadcastJob,
     ConfigKV,
     Payment,
     SubscriptionPlan,
     User,
     UserSubscription,
 )
-from src.db.repos import NotificationRepo
+from src.db.repos import AdminCounterRepo, BroadcastJobRepo, NotificationRepo, UserRepo
 
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 notification_repo = NotificationRepo()
+admin_counter_repo = AdminCounterRepo()
+user_repo = UserRepo()
+broadcast_job_repo = BroadcastJobRepo()
+kpi_cache = SingleFlightCache(ttl=settings.admin_kpi_cache_ttl)
 
 
 class AdminNotificationPayload(BaseModel):
@@ -71,99 +86,243 @@ class AdminNotificationPayload(BaseModel):
         return None
 
 
+# Rows fetched per round-trip when streaming NDJSON exports
+_OVERVIEW_STREAM_BATCH = 1000
+
+_OVERVIEW_USER_COLUMNS = (
+    User.id,
+    User.email,
+    User.phone_number,
+    User.full_name,
+    User.role,
+    User.is_active,
+    User.created_at,
+)
+
+_OVERVIEW_PAYMENT_COLUMNS = (
+    Payment.id,
+    User.email.label("user_email"),
+    Payment.amount,
+    Payment.status,
+    Payment.ref_id,
+    Payment.paid_at,
+)
+
+
+def _overview_users_query():
+    return select(*_OVERVIEW_USER_COLUMNS)
+
+
+def _overview_payments_query():
+    # One LEFT JOIN resolves the payer's email instead of a per-payment scan
+    return select(*_OVERVIEW_PAYMENT_COLUMNS).outerjoin(User, Payment.user_id == User.id)
+
+
+def _overview_user_row(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "email": row.email,
+        "phone_number": row.phone_number,
+        "full_name": row.full_name,
+        "role": get_role_info(row.role),
+        "is_active": row.is_active,
+        "created_at": row.created_at,
+    }
+
+
+def _overview_payment_row(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "user_email": row.user_email,
+        "amount": row.amount,
+        "status": row.status,
+        "ref_id": row.ref_id,
+        "paid_at": row.paid_at,
+    }
+
+
+_OVERVIEW_KINDS = {
+    "users": (_overview_users_query, User.id, _overview_user_row),
+    "payments": (_overview_payments_query, Payment.id, _overview_payment_row),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_line(item: Dict[str, Any]) -> bytes:
+    return (json.dumps(item, default=_json_default, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _stream_overview_ndjson(kind: str, cursor: Optional[int]):
+    """Stream every row (newest first) as NDJSON using a server-side cursor."""
+    build_query, id_column, to_item = _OVERVIEW_KINDS[kind]
+    query = build_query().order_by(id_column.desc())
+    if cursor is not None:
+        query = query.where(id_column < cursor)
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=_OVERVIEW_STREAM_BATCH)
+        )
+        async for partition in result.partitions():
+            yield b"".join(_ndjson_line(to_item(row)) for row in partition)
+
+
 @router.get("/overview")
 async def admin_overview(current_admin=Depends(get_current_admin)):
-    """Basic overview of users and payments (legacy endpoint kept for compatibility)."""
+    """Basic overview of users and payments (legacy endpoint kept for compatibility).
+
+    Prefer `/overview/{kind}`, which paginates or streams instead of loading
+    both tables into memory.
+    """
     async with AsyncSessionLocal() as session:
-        users_q = await session.execute(select(User))
-        users = users_q.scalars().all()
+        users_q = await session.execute(_overview_users_query())
+        users = users_q.all()
 
-        payments_q = await session.execute(select(Payment))
-        payments = payments_q.scalars().all()
+        payments_q = await session.execute(_overview_payments_query())
+        payments = payments_q.all()
 
     return {
-        "users": [
-            {
-                "id": u.id,
-                "email": u.email,
-                "phone_number": u.phone_number,
-                "full_name": u.full_name,
-                "role": get_role_info(u.role),
-                "is_active": u.is_active,
-                "created_at": u.created_at,
-            }
-            for u in users
-        ],
-        "payments": [
-            {
-                "id": p.id,
-                "user_email": next(
-                    (u.email for u in users if u.id == p.user_id), None
-                ),
-                "amount": p.amount,
-                "status": p.status,
-                "ref_id": p.ref_id,
-                "paid_at": p.paid_at,
-            }
-            for p in payments
-        ],
+        "users": [_overview_user_row(u) for u in users],
+        "payments": [_overview_payment_row(p) for p in payments],
     }
 
 
-@router.get("/stats")
-async def admin_stats(current_admin=Depends(get_current_admin)):
-    """High-level KPIs for the admin dashboard."""
-    now = datetime.now(timezone.utc)
-    day_ago = now - timedelta(days=1)
-
-    async with AsyncSessionLocal() as session:
-        total_users_q = await session.execute(select(func.count(User.id)))
-        total_users = total_users_q.scalar_one() or 0
+@router.get("/overview/{kind}")
+async def admin_overview_page(
+    kind: str,
+    current_admin=Depends(get_current_admin),
+    cursor: Optional[int] = Query(default=None, description="Return rows with id below this value"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    format: str = Query(default="json", regex="^(json|ndjson)$"),
+):
+    """Keyset-paginated users/payments overview, newest first.
 
-        active_users_q = await session.execute(
-            select(func.count(User.id)).where(User.is_active.is_(True))
+    `format=ndjson` streams every row after `cursor` (ignoring `limit`) with
+    constant memory, for exports.
+    """
+    if kind not in _OVERVIEW_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="نوع گزارش نامعتبر است.",
         )
-        active_users = active_users_q.scalar_one() or 0
 
-        admins_q = await session.execute(
-            select(func.count(User.id)).where(User.role.in_(("admin", "super_admin")))
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_overview_ndjson(kind, cursor),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{kind}.ndjson"'},
         )
-        admins_count = admins_q.scalar_one() or 0
 
-        total_revenue_q = await session.execute(
-            select(func.coalesce(func.sum(Payment.amount), 0.0)).where(
-                Payment.status == "paid"
-            )
+    build_query, id_column, to_item = _OVERVIEW_KINDS[kind]
+    query = build_query().order_by(id_column.desc()).limit(limit)
+    if cursor is not None:
+        query = query.where(id_column < cursor)
+
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(query)).all()
+
+    return {
+        "items": [to_item(row) for row in rows],
+        "next_cursor": rows[-1].id if len(rows) == limit else None,
+    }
+
+
+async def _collect_kpis() -> Dict[str, Any]:
+    """Aggregate every dashboard KPI in one round-trip.
+
+    Each table is scanned once by a single-row aggregate using FILTER
+    clauses; the subqueries are cross-joined into one statement. Totals
+    kept by AdminCounterRepo are read from there and left out of the scan.
+    """
+    last_7d = datetime.now(timezone.utc) - timedelta(days=7)
+
+    counters: Dict[str, float] = {}
+    if admin_counter_repo.enabled:
+        counters = await admin_counter_repo.get_many(
+            [AdminCounterRepo.TOTAL_USERS, AdminCounterRepo.TOTAL_REVENUE]
         )
-        total_revenue = float(total_revenue_q.scalar_one() or 0.0)
 
-        active_subs_q = await session.execute(
-            select(func.count(UserSubscription.id)).where(
-                UserSubscription.is_active.is_(True)
+    users_columns = [
+        func.count(User.id).filter(User.is_active.is_(True)).label("users_active"),
+        func.count(User.id)
+        .filter(User.role.in_(("admin", "super_admin")))
+        .label("admins_count"),
+    ]
+    if AdminCounterRepo.TOTAL_USERS not in counters:
+        users_columns.append(func.count(User.id).label("users_total"))
+    payments_columns = [
+        func.count(Payment.id).label("payments_total"),
+        func.count(Payment.id)
+        .filter(Payment.status.in_(("failed", "cancelled")))
+        .label("payments_failed"),
+        func.count(Payment.id).filter(Payment.created_at >= last_7d).label("payments_last_7d"),
+    ]
+    if AdminCounterRepo.TOTAL_REVENUE not in counters:
+        payments_columns.append(
+            func.coalesce(func.sum(Payment.amount).filter(Payment.status == "paid"), 0.0).label(
+                "total_revenue"
             )
         )
-        active_subscriptions = active_subs_q.scalar_one() or 0
 
-        plans_q = await session.execute(
-            select(func.count(SubscriptionPlan.id)).where(
-                SubscriptionPlan.is_active.is_(True)
+    users_agg = select(*users_columns).subquery()
+    payments_agg = select(*payments_columns).subquery()
+    subs_agg = select(
+        func.count(UserSubscription.id)
+        .filter(UserSubscription.is_active.is_(True))
+        .label("active_subscriptions"),
+    ).subquery()
+    plans_agg = select(
+        func.count(SubscriptionPlan.id)
+        .filter(SubscriptionPlan.is_active.is_(True))
+        .label("active_plans"),
+    ).subquery()
+    config_agg = select(func.count(ConfigKV.id).label("config_items")).subquery()
+
+    async with AsyncSessionLocal() as session:
+        # Explicit ON TRUE joins of single-row subqueries (no cartesian lint)
+        q = await session.execute(
+            select(users_agg, payments_agg, subs_agg, plans_agg, config_agg).select_from(
+                users_agg.join(payments_agg, true())
+                .join(subs_agg, true())
+                .join(plans_agg, true())
+                .join(config_agg, true())
             )
         )
-        active_plans = plans_q.scalar_one() or 0
+        row = q.one()
+
+    kpis = dict(row._mapping)
+    if AdminCounterRepo.TOTAL_USERS in counters:
+        kpis["users_total"] = int(counters[AdminCounterRepo.TOTAL_USERS])
+    kpis["total_revenue"] = float(
+        counters.get(AdminCounterRepo.TOTAL_REVENUE, kpis.get("total_revenue")) or 0.0
+    )
+    return kpis
+
+
+async def _get_kpis() -> Dict[str, Any]:
+    # Many admins polling the dashboard share one aggregation per TTL
+    return await kpi_cache.get_or_compute("kpis", _collect_kpis)
 
-        config_count_q = await session.execute(
-            select(func.count(ConfigKV.id))
-        )
-        config_items = config_count_q.scalar_one() or 0
 
+@router.get("/stats")
+async def admin_stats(current_admin=Depends(get_current_admin)):
+    """High-level KPIs for the admin dashboard."""
+    kpis = await _get_kpis()
     return {
-        "total_users": total_users,
-        "active_users": active_users,
-        "admins_count": admins_count,
-        "total_revenue": total_revenue,
-        "active_subscriptions": active_subscriptions,
-        "active_plans": active_plans,
-        "config_items": config_items,
+        "total_users": kpis["users_total"],
+        "active_users": kpis["users_active"],
+        "admins_count": kpis["admins_count"],
+        "total_revenue": kpis["total_revenue"],
+        "active_subscriptions": kpis["active_subscriptions"],
+        "active_plans": kpis["active_plans"],
+        "config_items": kpis["config_items"],
     }
 
 
@@ -173,48 +332,33 @@ async def list_users(
     search: str | None = Query(default=None, description="Email, phone or name"),
     is_active: bool | None = Query(default=None),
     role: str | None = Query(default=None),
-    skip: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description="next_cursor of the previous page"),
+    skip: int = Query(default=0, ge=0, description="Legacy offset, ignored with cursor"),
     limit: int = Query(default=50, ge=1, le=200),
+    count: str = Query(default="estimated", regex="^(exact|estimated|none)$"),
 ):
-    """Paginated, filterable list of users for admin management."""
-    async with AsyncSessionLocal() as session:
-        base_query = select(User)
-        if search:
-            like = f"%{search}%"
-            base_query = base_query.where(
-                (User.email.ilike(like))
-                | (User.phone_number.ilike(like))
-                | (User.full_name.ilike(like))
-            )
-        if is_active is not None:
-            base_query = base_query.where(User.is_active.is_(is_active))
-        if role:
-            base_query = base_query.where(User.role == role)
-
-        total_q = await session.execute(
-            base_query.with_only_columns(func.count(User.id)).order_by(None)
+    """Keyset-paginated, filterable list of users for admin management."""
+    try:
+        page = await user_repo.search(
+            search=search,
+            is_active=is_active,
+            role=role,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            count=count,
         )
-        total = total_q.scalar_one() or 0
-
-        users_q = await session.execute(
-            base_query.order_by(User.created_at.desc()).offset(skip).limit(limit)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="مقدار cursor نامعتبر است.",
         )
-        users = users_q.scalars().all()
 
     return {
-        "total": total,
-        "items": [
-            {
-                "id": u.id,
-                "email": u.email,
-                "phone_number": u.phone_number,
-                "full_name": u.full_name,
-                "role": get_role_info(u.role),
-                "is_active": u.is_active,
-                "created_at": u.created_at,
-            }
-            for u in users
-        ],
+        "total": page["total"],
+        "total_is_estimate": page["total_is_estimate"],
+        "next_cursor": page["next_cursor"],
+        "items": [_overview_user_row(u) for u in page["rows"]],
     }
 
 
@@ -242,6 +386,9 @@ async def update_user_admin(
                 detail="کاربر یافت نشد.",
             )
 
+        previous_role = user.role
+        previous_is_active = user.is_active
+
         if "role" in payload:
             new_role = payload["role"]
             if new_role not in {"user", "admin", "super_admin"}:
@@ -258,6 +405,12 @@ async def update_user_admin(
             user.role = new_role
         if "is_active" in payload:
             user.is_active = bool(payload["is_active"])
+        # Role changes and deactivation must revoke tokens that still carry
+        # the old claims (see get_current_principal).
+        revoke_tokens = (
+            ("role" in payload and user.role != previous_role)
+            or (previous_is_active and not user.is_active)
+        )
         if "full_name" in payload:
             user.full_name = payload["full_name"]
         if "phone_number" in payload:
@@ -266,10 +419,23 @@ async def update_user_admin(
             # ایمیل را به صورت lowercase ذخیره می‌کنیم تا یکتا بودن و جستجو راحت‌تر شود
             user.email = (payload["email"] or "").strip().lower()
 
+        # The epoch is bumped in the same transaction as the claims it
+        # revokes, so a token is never minted from the new epoch and the
+        # old role (tokens take both from one row, see issue_access_token).
+        if revoke_tokens:
+            user.token_epoch = User.token_epoch + 1
+
         session.add(user)
         await session.commit()
         await session.refresh(user)
 
+    await principal_cache.invalidate(user.id)
+    # Then publish it to the fast path (retried; see TokenEpochStore.publish)
+    if revoke_tokens and not await token_epochs.publish(user.id, user.token_epoch):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="تغییرات ذخیره شد اما باطل کردن نشست‌های فعلی کاربر ممکن نشد.",
+        )
     return {
         "id": user.id,
         "email": user.email,
@@ -281,38 +447,58 @@ async def update_user_admin(
     }
 
 
-@router.post("/notifications/send")
+def _broadcast_job_out(job: BroadcastJob) -> Dict[str, Any]:
+    elapsed = None
+    if job.started_at:
+        end = job.finished_at or datetime.now(timezone.utc)
+        elapsed = max((end - job.started_at).total_seconds(), 0.0)
+    return {
+        "id": job.id,
+        "status": job.status,
+        "type": job.type,
+        "send_to_all": job.send_to_all,
+        "total": job.total,
+        "processed": job.processed,
+        "failed": job.failed,
+        "rate_per_sec": round(job.processed / elapsed, 2) if elapsed else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@router.post("/notifications/send", status_code=status.HTTP_202_ACCEPTED)
 async def admin_send_notifications(
     payload: AdminNotificationPayload,
     current_admin=Depends(get_current_admin),
 ):
-    """Send an in-app + web push notification to all active users or selected users."""
+    """Queue an in-app + web push notification for all active users or selected users.
+
+    Fan-out runs on the background broadcast worker; poll
+    `/notifications/broadcasts/{job_id}` for progress.
+    """
     target_user_ids: list[int] = []
     skipped_user_ids: list[int] = []
 
-    async with AsyncSessionLocal() as session:
-        if payload.send_to_all:
-            q = await session.execute(
-                select(User.id).where(User.is_active.is_(True))
+    if not payload.send_to_all:
+        requested_ids = sorted(set(payload.user_ids or []))
+        if not requested_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="برای ارسال هدف خاص، حداقل یک کاربر لازم است.",
             )
-            target_user_ids = [row[0] for row in q.all() if row[0] is not None]
-        else:
-            requested_ids = sorted(set(payload.user_ids or []))
-            if not requested_ids:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="برای ارسال هدف خاص، حداقل یک کاربر لازم است.",
-                )
 
+        async with AsyncSessionLocal() as session:
             q = await session.execute(
                 select(User.id, User.is_active).where(User.id.in_(requested_ids))
             )
             rows = q.all()
-            found_ids = {row[0] for row in rows}
-            inactive_ids = {row[0] for row in rows if not row[1]}
+        found_ids = {row[0] for row in rows}
+        inactive_ids = {row[0] for row in rows if not row[1]}
 
-            target_user_ids = [row[0] for row in rows if row[1]]
-            skipped_user_ids = sorted((set(requested_ids) - found_ids) | inactive_ids)
+        target_user_ids = [row[0] for row in rows if row[1]]
+        skipped_user_ids = sorted((set(requested_ids) - found_ids) | inactive_ids)
 
         if not target_user_ids:
             raise HTTPException(
@@ -320,23 +506,39 @@ async def admin_send_notifications(
                 detail="کاربر فعالی برای ارسال اعلان یافت نشد.",
             )
 
-    created = await notification_repo.bulk_create(
-        user_ids=target_user_ids,
+    job = await broadcast_job_repo.create(
+        created_by=current_admin.id,
         type=payload.type,
         title=payload.title,
         message=payload.message,
         link=payload.link,
+        send_to_all=payload.send_to_all,
+        user_ids=target_user_ids,
     )
+    broadcast_worker.notify()
 
     return {
-        "target_count": len(target_user_ids),
-        "created_count": len(created),
+        "job_id": job.id,
+        "status": job.status,
+        "target_count": job.total,
         "skipped_user_ids": skipped_user_ids,
         "send_to_all": payload.send_to_all,
         "type": payload.type,
     }
 
 
+@router.get("/notifications/broadcasts/{job_id}")
+async def admin_broadcast_status(job_id: int, current_admin=Depends(get_current_admin)):
+    """Progress of a broadcast job (processed, failed, rate)."""
+    job = await broadcast_job_repo.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="عملیات ارسال یافت نشد.",
+        )
+    return _broadcast_job_out(job)
+
+
 @router.get("/subscriptions")
 async def admin_subscriptions(current_admin=Depends(get_current_admin)):
     """Overview of user subscriptions and plans for admin dashboard."""
@@ -392,45 +594,21 @@ async def admin_plans(current_admin=Depends(get_current_admin)):
 @router.get("/health")
 async def admin_health(current_admin=Depends(get_current_admin)):
     """Operational health summary based on recent activity."""
-    now = datetime.now(timezone.utc)
-    last_7d = now - timedelta(days=7)
-
-    async with AsyncSessionLocal() as session:
-        # Payments
-        pay_total_q = await session.execute(select(func.count(Payment.id)))
-        payments_total = pay_total_q.scalar_one() or 0
-
-        pay_failed_q = await session.execute(
-            select(func.count(Payment.id)).where(
-                Payment.status.in_(("failed", "cancelled"))
-            )
-        )
-        payments_failed = pay_failed_q.scalar_one() or 0
-
-        pay_7d_q = await session.execute(
-            select(func.count(Payment.id)).where(Payment.created_at >= last_7d)
-        )
-        payments_last_7d = pay_7d_q.scalar_one() or 0
-
-        # Users
-        users_total_q = await session.execute(select(func.count(User.id)))
-        users_total = users_total_q.scalar_one() or 0
-
-        active_users_q = await session.execute(
-            select(func.count(User.id)).where(User.is_active.is_(True))
-        )
-        active_users = active_users_q.scalar_one() or 0
-
+    kpis = await _get_kpis()
     return {
         "payments": {
-            "total": payments_total,
-            "failed": payments_failed,
-            "last_7d": payments_last_7d,
+            "total": kpis["payments_total"],
+            "failed": kpis["payments_failed"],
+            "last_7d": kpis["payments_last_7d"],
         },
         "users": {
-            "total": users_total,
-            "active": active_users,
+            "total": kpis["users_total"],
+            "active": kpis["users_active"],
         },
+        "principal_cache": principal_cache.get_stats(),
+        "pubsub": subscription_hub.get_stats(),
+        "notification_streams": user_event_hub.get_stats(),
+        "notification_retention": notification_retention.get_stats(),
     }
 
 
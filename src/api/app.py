@@ -11,8 +11,9 @@ CLI Commands:
   wework make:hook <name>      - Generate a new React hook
   wework make:migration <name> - Generate a new database migration
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from src.config.loader import ConfigLoader
 from src.api.auth_api import router as auth_router
@@ -20,8 +21,20 @@ from src.api.billing_api import router as billing_router
 from src.api.admin_api import router as admin_router
 from src.api.notifications_api import router as notifications_router
 from src.config.settings import settings
+from src.core.broadcast_worker import broadcast_worker
+from src.core.concurrency_manager import concurrency_manager
+from src.core.metrics import Metric, MetricsMiddleware, registry, stats_metrics
+from src.core.notification_retention import notification_retention
+from src.core.redis_manager import redis_manager
+from src.core import sql_profiler
+from src.core.subscription_hub import subscription_hub
+from src.core.unread_counters import unread_counters
+from src.core.user_event_hub import user_event_hub
+from src.db.base import engine
+from src.integrations.webpush import push_engine
 import logging
 import asyncio
+import secrets
 
 # Configure uvicorn logging
 logging.getLogger("uvicorn").setLevel(logging.INFO)
@@ -39,9 +52,24 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=['*'],
     allow_methods=['*'],
-    allow_headers=['*']
+    allow_headers=['*'],
+    expose_headers=['X-Next-Cursor']
 )
 
+# Per-request SQL statement counts, DB time and slow-request log
+if settings.sql_profiler_enabled:
+    sql_profiler.install(engine)
+    app.add_middleware(
+        sql_profiler.SQLProfilerMiddleware,
+        headers=settings.debug,
+        slow_ms=settings.sql_profiler_slow_ms,
+        query_threshold=settings.sql_profiler_query_threshold,
+        sample_rate=settings.sql_profiler_sample_rate,
+    )
+
+# Request latency per route template, exposed at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Config loader
 cfg = ConfigLoader()
 
@@ -61,6 +89,9 @@ async def startup():
     """Application startup event"""
     await cfg.load()
     asyncio.create_task(cfg.start_listener())
+    broadcast_worker.start()
+    unread_counters.start()
+    notification_retention.start()
     # Add your startup tasks here
     logging.info("WeWork Framework started successfully")
 
@@ -68,10 +99,65 @@ async def startup():
 @app.on_event('shutdown')
 async def shutdown():
     """Application shutdown event"""
+    await broadcast_worker.stop()
+    await unread_counters.stop()
+    await notification_retention.stop()
+    await user_event_hub.close()
+    await subscription_hub.close()
+    push_engine.close()
     # Add your cleanup tasks here
     logging.info("WeWork Framework shutting down")
 
 
+def _db_pool_metrics():
+    pool = engine.sync_engine.pool
+    return [
+        Metric('db_pool_size', 'gauge', 'Persistent connections in the SQLAlchemy pool', [({}, pool.size())]),
+        Metric('db_pool_checked_out', 'gauge', 'Connections currently checked out', [({}, pool.checkedout())]),
+        Metric('db_pool_overflow', 'gauge', 'Connections beyond pool_size (negative while below it)', [({}, pool.overflow())]),
+        Metric('db_pool_timeouts_total', 'counter', 'Checkouts that hit pool_timeout', [({}, getattr(pool, 'timeouts', 0))]),
+    ]
+
+
+def _redis_metrics():
+    stats = redis_manager.get_stats()
+    metrics = stats_metrics('redis_pool', stats['pool']) + stats_metrics('redis_manager', stats)
+    for channel, channel_stats in stats['throttler']['channels'].items():
+        labels = {'channel': channel}
+        metrics += stats_metrics('event_throttler', channel_stats, labels)
+        cumulative = 0
+        samples = []
+        for bucket, count in channel_stats['latency_ms'].items():
+            cumulative += count
+            samples.append(({**labels, 'le': bucket[3:].replace('inf', '+Inf')}, cumulative))
+        metrics.append(Metric(
+            'event_throttler_latency_ms_bucket', 'untyped',
+            'Throttled events published within le milliseconds of being queued', samples,
+        ))
+    return metrics
+
+
+def _dedup_metrics():
+    return stats_metrics('event_dedup', concurrency_manager.deduplicator.get_stats())
+
+
+registry.register_collector(_db_pool_metrics)
+registry.register_collector(_redis_metrics)
+registry.register_collector(_dedup_metrics)
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus text exposition of request, DB pool, Redis, dedup and lock metrics"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.metrics_token:
+        supplied = request.headers.get("authorization", "")
+        if not secrets.compare_digest(supplied.encode(), f"Bearer {settings.metrics_token}".encode()):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get('/')
 async def root():
     """Root endpoint"""
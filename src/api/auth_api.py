@@ -7,12 +7,20 @@ from fastapi import APIRouter, Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from jose.exceptions import ExpiredSignatureError
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr, constr
 
 from src.config.settings import settings
+from src.core.password_hasher import (
+    password_hasher,
+    hash_password_sync,
+    verify_password_sync,
+)
+from src.core.principal_cache import principal_cache
+from src.core.token_epochs import token_epochs
+from src.core.worker_pool import PoolSaturatedError
 from src.db.base import AsyncSessionLocal
 from src.db.models import LoginOTP, User
+from src.db.repos import AdminCounterRepo
 from sqlalchemy import select
 
 from src.integrations.wecan_sms import wecan_sms_client
@@ -20,8 +28,8 @@ from src.integrations.wecan_sms import wecan_sms_client
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+admin_counter_repo = AdminCounterRepo()
 
 
 class Token(BaseModel):
@@ -112,11 +120,35 @@ def user_to_user_out(user: User) -> dict:
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_password_sync(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_password_sync(password)
+
+
+def _password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="سرور در حال حاضر مشغول است. لطفاً چند لحظه دیگر دوباره تلاش کنید.",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt worker pool (503 when saturated)."""
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PoolSaturatedError:
+        raise _password_pool_busy()
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the bcrypt worker pool (503 when saturated)."""
+    try:
+        return await password_hasher.hash(password)
+    except PoolSaturatedError:
+        raise _password_pool_busy()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -156,7 +188,7 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
     user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     if not user.is_active:
         raise HTTPException(
@@ -166,10 +198,10 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
     return user
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    """Resolve the current user from a Bearer JWT token."""
+def _decode_access_token(token: str) -> dict:
+    """Decode and verify a Bearer JWT, raising 401 on any problem."""
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token,
             settings.jwt_secret_key,
             algorithms=[settings.jwt_algorithm],
@@ -189,6 +221,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+
+def _token_data_from_payload(payload: dict) -> TokenData:
     user_id_raw = payload.get("sub")
     role: str | None = payload.get("role")
     if user_id_raw is None:
@@ -208,9 +242,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token_data = TokenData(user_id=user_id_int, role=role)
+    return TokenData(user_id=user_id_int, role=role)
 
-    user = await get_user_by_id(token_data.user_id)  # type: ignore[arg-type]
+
+async def _load_user_or_401(user_id: int) -> User:
+    user = await principal_cache.get(user_id, get_user_by_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -220,6 +256,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     return user
 
 
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """Resolve the current user from a Bearer JWT token."""
+    payload = _decode_access_token(token)
+    token_data = _token_data_from_payload(payload)
+    return await _load_user_or_401(token_data.user_id)  # type: ignore[arg-type]
+
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(
@@ -229,6 +272,81 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
+class ClaimsPrincipal:
+    """Lightweight principal filled from signed JWT claims.
+
+    Carries only what most handlers need (`id`, `role`, `is_active`); the ORM
+    `User` is loaded on demand through `load_user()`.
+    """
+
+    __slots__ = ("id", "role", "is_active", "_user")
+
+    def __init__(self, id: int, role: str, is_active: bool = True):
+        self.id = id
+        self.role = role
+        self.is_active = is_active
+        self._user: Optional[User] = None
+
+    async def load_user(self) -> User:
+        """Load (and memoize) the full ORM user behind this principal."""
+        if self._user is None:
+            self._user = await _load_user_or_401(self.id)
+        return self._user
+
+
+def _revoked_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="توکن باطل شده است. لطفاً دوباره وارد شوید.",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> ClaimsPrincipal:
+    """Opt-in fast path: resolve an active principal without a DB round-trip.
+
+    Tokens carry the token epoch of the user row they were issued from
+    (`ep` claim). A token whose epoch is older than the cached one has been
+    revoked (e.g. the user was deactivated). Tokens without an epoch, users
+    whose epoch is not cached and requests made while Redis is unavailable
+    are checked against the database instead.
+    """
+    payload = _decode_access_token(token)
+    token_data = _token_data_from_payload(payload)
+    user_id: int = token_data.user_id  # type: ignore[assignment]
+
+    token_epoch = payload.get("ep")
+    current_epoch = await token_epochs.current(user_id) if token_epoch is not None else None
+    if current_epoch is None:
+        if token_epoch is None:
+            user = await _load_user_or_401(user_id)
+        else:
+            # The row is the authority on revocation: read it fresh (cached
+            # copies may predate a bump) and re-cache its epoch.
+            user = await get_user_by_id(user_id)
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="کاربر مربوط به این توکن یافت نشد.",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            await token_epochs.advance(user_id, user.token_epoch or 0)
+            if int(token_epoch) < (user.token_epoch or 0):
+                raise _revoked_token()
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="حساب کاربری شما غیرفعال است.",
+            )
+        principal = ClaimsPrincipal(id=user.id, role=user.role, is_active=True)
+        principal._user = user
+        return principal
+
+    if int(token_epoch) < current_epoch:
+        raise _revoked_token()
+    return ClaimsPrincipal(id=user_id, role=token_data.role or "user", is_active=True)
+
+
 def require_profile_fields(required_fields: list[str]):
     """
     Factory function to create a dependency that checks required profile fields.
@@ -308,6 +426,16 @@ async def get_current_super_admin(current_user: User = Depends(get_current_activ
     return current_user
 
 
+async def issue_access_token(user: User) -> str:
+    """Create an access token for a user, embedding its token epoch.
+
+    The epoch comes from the same row as the role, so a token minted from a
+    row read before a revocation carries the old epoch and is rejected.
+    """
+    data = {"sub": user.id, "role": user.role, "ep": user.token_epoch or 0}
+    return create_access_token(data=data)  # type: ignore[arg-type]
+
+
 async def get_optional_user(token: Optional[str] = None) -> Optional[User]:
     """Optional user dependency - returns None if no token or invalid token."""
     if not token:
@@ -325,7 +453,7 @@ async def get_optional_user(token: Optional[str] = None) -> Optional[User]:
             user_id_int = int(user_id_raw)
         except (TypeError, ValueError):
             return None
-        user = await get_user_by_id(user_id_int)
+        user = await principal_cache.get(user_id_int, get_user_by_id)
         if user and not user.is_active:
             return None
         return user
@@ -359,15 +487,18 @@ async def register_user(payload: UserCreate):
                 detail="این شماره موبایل قبلاً ثبت شده است.",
             )
 
+    hashed_password = await get_password_hash_async(payload.password)
+
     async with AsyncSessionLocal() as session:
         user = User(
             email=payload.email,
             full_name=payload.full_name,
             phone_number=payload.phone_number,
-            hashed_password=get_password_hash(payload.password),
+            hashed_password=hashed_password,
             role="user",
         )
         session.add(user)
+        await admin_counter_repo.increment(session, AdminCounterRepo.TOTAL_USERS)
         await session.commit()
         await session.refresh(user)
         return user_to_user_out(user)
@@ -383,9 +514,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(
-        data={"sub": user.id, "role": user.role}  # type: ignore[arg-type]
-    )
+    access_token = await issue_access_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -439,7 +568,9 @@ async def update_users_me(
         session.add(db_user)
         await session.commit()
         await session.refresh(db_user)
-        return user_to_user_out(db_user)
+
+    await principal_cache.invalidate(db_user.id)
+    return user_to_user_out(db_user)
 
 
 class PublicUserProfile(BaseModel):
@@ -553,12 +684,13 @@ async def update_telegram_settings(
         session.add(db_user)
         await session.commit()
         await session.refresh(db_user)
-        
-        return {
-            "telegram_enabled": db_user.telegram_enabled or False,
-            "telegram_bot_token": db_user.telegram_bot_token,
-            "telegram_chat_id": db_user.telegram_chat_id,
-        }
+
+    await principal_cache.invalidate(db_user.id)
+    return {
+        "telegram_enabled": db_user.telegram_enabled or False,
+        "telegram_bot_token": db_user.telegram_bot_token,
+        "telegram_chat_id": db_user.telegram_chat_id,
+    }
 
 
 def _hash_otp(phone_number: str, code: str) -> str:
@@ -642,12 +774,13 @@ async def login_with_otp(payload: OTPVerify):
                 email=placeholder_email,
                 phone_number=payload.phone_number,
                 full_name=payload.full_name,
-                hashed_password=get_password_hash(secrets.token_urlsafe(8)),
+                hashed_password=await get_password_hash_async(secrets.token_urlsafe(8)),
                 role="user",
             )
             session.add(user)
             await session.flush()
             otp.user_id = user.id
+            await admin_counter_repo.increment(session, AdminCounterRepo.TOTAL_USERS)
         else:
             if payload.full_name and not (user.full_name):
                 user.full_name = payload.full_name
@@ -656,7 +789,9 @@ async def login_with_otp(payload: OTPVerify):
         await session.commit()
         await session.refresh(user)
 
-    access_token = create_access_token(data={"sub": user.id, "role": user.role})
+    # The cached copy may predate the full_name set above
+    await principal_cache.invalidate(user.id)
+    access_token = await issue_access_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -11,14 +11,15 @@ from src.api.auth_api import get_current_active_user
 from src.config.settings import settings
 from src.db.base import AsyncSessionLocal
 from src.db.models import SubscriptionPlan, UserSubscription, Payment, User
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
-from src.db.repos import NotificationRepo
+from src.db.repos import AdminCounterRepo, NotificationRepo
 
 
 router = APIRouter(prefix="/api/billing", tags=["billing"])
 
 notification_repo = NotificationRepo()
+admin_counter_repo = AdminCounterRepo()
 
 
 class PlanPreviewRequest(BaseModel):
@@ -267,19 +268,30 @@ async def zarinpal_callback(
     if code == 100:
         ref_id = data["data"]["ref_id"]
         async with AsyncSessionLocal() as session:
-            q = await session.execute(select(Payment).where(Payment.id == payment_id))
-            db_payment = q.scalar_one()
-            db_payment.status = "paid"
-            db_payment.ref_id = str(ref_id)
-            db_payment.paid_at = datetime.now(timezone.utc)
-            db_payment.gateway_response = data
-            session.add(db_payment)
+            # Only the callback that flips the row to "paid" books the revenue
+            # and activates the plan; repeated callbacks match no row.
+            q = await session.execute(
+                update(Payment)
+                .where(Payment.id == payment_id, Payment.status != "paid")
+                .values(
+                    status="paid",
+                    ref_id=str(ref_id),
+                    paid_at=datetime.now(timezone.utc),
+                    gateway_response=data,
+                )
+                .returning(Payment.amount, Payment.subscription_id)
+            )
+            paid = q.one_or_none()
+            if paid is not None:
+                await admin_counter_repo.increment(
+                    session, AdminCounterRepo.TOTAL_REVENUE, float(paid.amount or 0.0)
+                )
 
             # Activate subscription (if this payment is for a plan)
-            if db_payment.subscription_id:
+            if paid is not None and paid.subscription_id:
                 q2 = await session.execute(
                     select(UserSubscription).where(
-                        UserSubscription.id == db_payment.subscription_id
+                        UserSubscription.id == paid.subscription_id
                     )
                 )
                 sub = q2.scalar_one()
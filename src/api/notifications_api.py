@@ -1,11 +1,15 @@
+import asyncio
+import json
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from src.api.auth_api import get_current_active_user
-from src.db.models import User
-from src.db.repos import NotificationRepo, PushSubscriptionRepo
+from src.api.auth_api import ClaimsPrincipal, get_current_principal
+from src.config.settings import settings
+from src.core.user_event_hub import ClientLimitError, user_event_hub
+from src.db.repos import NotificationRepo, PushSubscriptionRepo, encode_keyset_cursor
 
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
@@ -33,14 +37,31 @@ class PushSubscriptionIn(BaseModel):
 
 @router.get("", response_model=List[NotificationOut])
 async def list_notifications(
-  limit: int = 20,
-  offset: int = 0,
+  response: Response,
+  limit: int = Query(default=20, ge=1, le=100),
+  offset: int = Query(default=0, ge=0, description="Legacy offset, ignored with cursor"),
+  cursor: Optional[str] = Query(default=None, description="X-Next-Cursor of the previous page"),
   unread_only: bool = False,
-  current_user: User = Depends(get_current_active_user),
+  current_user: ClaimsPrincipal = Depends(get_current_principal),
 ):
-  items = await notification_repo.list_for_user(
-    user_id=current_user.id, limit=limit, offset=offset, unread_only=unread_only
-  )
+  """List notifications newest first.
+
+  When a full page is returned, `X-Next-Cursor` holds the cursor of the
+  next page.
+  """
+  try:
+    items = await notification_repo.list_for_user(
+      user_id=current_user.id,
+      limit=limit,
+      offset=offset,
+      unread_only=unread_only,
+      cursor=cursor,
+      slim=True,
+    )
+  except ValueError:
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+  if len(items) == limit and items[-1].created_at is not None:
+    response.headers["X-Next-Cursor"] = encode_keyset_cursor(items[-1].created_at, items[-1].id)
   return [
     NotificationOut(
       id=n.id,
@@ -56,14 +77,64 @@ async def list_notifications(
 
 
 @router.get("/unread-count")
-async def get_unread_count(current_user: User = Depends(get_current_active_user)):
+async def get_unread_count(current_user: ClaimsPrincipal = Depends(get_current_principal)):
   count = await notification_repo.count_unread(current_user.id)
   return {"unread_count": count}
 
 
+def _sse(event_type: str, payload: dict) -> str:
+  return f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+
+
+@router.get("/stream")
+async def stream_notifications(current_user: ClaimsPrincipal = Depends(get_current_principal)):
+  """Server-Sent Events stream of new notifications and unread-count changes.
+
+  Events: `unread_count` (sent first, then on every read), `notification`
+  (a new notification plus the updated `unread_count`, which may be null)
+  and `resync` (events may have been missed; refetch). Comment lines are
+  sent as keep-alives.
+  """
+  # Checked up front to answer 503; the slot itself is taken by events(),
+  # so a response that is never iterated cannot leak it.
+  if not user_event_hub.has_capacity():
+    raise HTTPException(
+      status_code=503, detail="Too many open streams", headers={"Retry-After": "30"}
+    )
+
+  async def events():
+    queue = None
+    try:
+      try:
+        queue = user_event_hub.connect(current_user.id)
+      except ClientLimitError:
+        # Filled up since the check: end the stream, the client reconnects
+        return
+      count = await notification_repo.count_unread(current_user.id)
+      yield _sse("unread_count", {"unread_count": count})
+      while True:
+        try:
+          event = await asyncio.wait_for(
+            queue.get(), timeout=settings.notification_stream_keepalive
+          )
+        except asyncio.TimeoutError:
+          yield ": keep-alive\n\n"
+          continue
+        yield _sse(event.get("type", "message"), event.get("payload") or {})
+    finally:
+      if queue is not None:
+        user_event_hub.disconnect(current_user.id, queue)
+
+  return StreamingResponse(
+    events(),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+  )
+
+
 @router.post("/{notification_id}/read")
 async def mark_notification_read(
-  notification_id: int, current_user: User = Depends(get_current_active_user)
+  notification_id: int, current_user: ClaimsPrincipal = Depends(get_current_principal)
 ):
   ok = await notification_repo.mark_read(current_user.id, notification_id)
   if not ok:
@@ -73,7 +144,7 @@ async def mark_notification_read(
 
 @router.post("/read-all")
 async def mark_all_notifications_read(
-  current_user: User = Depends(get_current_active_user),
+  current_user: ClaimsPrincipal = Depends(get_current_principal),
 ):
   count = await notification_repo.mark_all_read(current_user.id)
   return {"status": "ok", "count": count}
@@ -82,7 +153,7 @@ async def mark_all_notifications_read(
 @router.post("/push-subscriptions")
 async def register_push_subscription(
   payload: PushSubscriptionIn,
-  current_user: User = Depends(get_current_active_user),
+  current_user: ClaimsPrincipal = Depends(get_current_principal),
 ):
   await push_repo.upsert_subscription(
     user_id=current_user.id,
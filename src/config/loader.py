@@ -1,7 +1,8 @@
-import asyncio, os, json
+import asyncio, os
 from src.db.repos import ConfigRepo
-from src.config.settings import settings
-import redis.asyncio as aioredis
+from src.core.codecs import decode
+from src.core.redis_manager import redis_manager
+from src.core.subscription_hub import LAGGED, subscription_hub
 
 
 class ConfigLoader:
@@ -11,7 +12,6 @@ class ConfigLoader:
             # Example: 'app_name': settings.app_name,
         }
         self.repo = ConfigRepo()
-        self._redis = None
         self._listener_task = None
 
     async def load(self):
@@ -22,9 +22,8 @@ class ConfigLoader:
 
     async def persist(self, key, value):
         await self.repo.upsert_config(key, str(value))
-        if self._redis is None:
-            self._redis = await aioredis.from_url(settings.redis_url)
-        await self._redis.publish('cfg_updates', json.dumps({'key': key, 'value': str(value)}))
+        r = await redis_manager.pool.get_connection()
+        await r.publish('cfg_updates', redis_manager.encode({'key': key, 'value': str(value)}))
 
     def get(self, key, default=None):
         return self._cfg.get(key, default)
@@ -34,17 +33,19 @@ class ConfigLoader:
         asyncio.create_task(self.persist(key, value))
 
     async def start_listener(self):
-        if self._redis is None:
-            self._redis = await aioredis.from_url(settings.redis_url)
-        pub = self._redis.pubsub()
-        await pub.subscribe('cfg_updates')
+        sub = await subscription_hub.subscribe(channels=['cfg_updates'])
 
         async def _loop():
-            async for msg in pub.listen():
-                if msg is None or msg.get('type') != 'message':
+            async for msg in sub.listen():
+                if msg is LAGGED:
+                    # Updates may have been missed while disconnected
+                    try:
+                        await self.load()
+                    except Exception:
+                        pass
                     continue
                 try:
-                    parsed = json.loads(msg.get('data'))
+                    parsed = decode(msg.get('data'))
                     k = parsed.get('key');
                     v = parsed.get('value')
                     self._cfg[k] = self._coerce_type(v)
@@ -15,6 +15,8 @@ class Settings:
         load_dotenv(env_path)
         
         self.log_level: str = os.getenv('LOG_LEVEL', 'INFO').upper()
+        # Debug mode: adds diagnostics such as X-DB-* response headers
+        self.debug: bool = os.getenv('DEBUG', 'false').lower() == 'true'
 
         # Database settings
         self.postgres_host: str = os.getenv('POSTGRES_HOST', 'localhost')
@@ -33,9 +35,75 @@ class Settings:
             os.getenv('JWT_ACCESS_TOKEN_EXPIRE_MINUTES', '60')
         )
         
+        # Password hashing worker pool (bcrypt runs off the event loop)
+        # executor: "thread" (bcrypt releases the GIL) or "process"
+        self.password_hash_executor: str = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread').lower()
+        self.password_hash_workers: int = int(os.getenv('PASSWORD_HASH_WORKERS', '4'))
+        self.password_hash_max_pending: int = int(
+            os.getenv('PASSWORD_HASH_MAX_PENDING', '64')
+        )
+
         # Redis settings
         self.redis_url: str = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        # Shared connection pool (src/core/redis_manager.py); callers wait up to
+        # REDIS_POOL_TIMEOUT seconds for a free connection
+        self.redis_pool_size: int = int(os.getenv('REDIS_POOL_SIZE', '20'))
+        self.redis_pool_timeout: float = float(os.getenv('REDIS_POOL_TIMEOUT', '5'))
+        # Encoding of published events and Redis hash values: json, orjson
+        # or msgpack (src/core/codecs.py; the latter two need the package)
+        self.redis_codec: str = os.getenv('REDIS_CODEC', 'json').lower()
+        # Messages buffered per local pub/sub subscriber before it is told it
+        # lagged (src/core/subscription_hub.py)
+        self.pubsub_queue_size: int = int(os.getenv('PUBSUB_QUEUE_SIZE', '10000'))
+
+        # Pub/sub event batching per channel (EventThrottler): flush after
+        # EVENT_BATCH_MAX_EVENTS messages, EVENT_BATCH_MAX_BYTES bytes or
+        # EVENT_BATCH_MAX_DELAY seconds; drop the oldest past EVENT_QUEUE_MAX
+        self.event_batch_max_events: int = int(os.getenv('EVENT_BATCH_MAX_EVENTS', '100'))
+        self.event_batch_max_bytes: int = int(os.getenv('EVENT_BATCH_MAX_BYTES', '65536'))
+        self.event_batch_max_delay: float = float(os.getenv('EVENT_BATCH_MAX_DELAY', '2'))
+        self.event_queue_max: int = int(os.getenv('EVENT_QUEUE_MAX', '1000'))
+
+        # Entries of the event_msg_map hash kept by Redis cleanup
+        self.event_msg_map_max_entries: int = int(os.getenv('EVENT_MSG_MAP_MAX_ENTRIES', '1000'))
+
+        # EventDispatcher transport: "pubsub" (fire-and-forget), "streams"
+        # (durable Redis Streams, src/core/event_stream.py) or "both"
+        self.event_transport: str = os.getenv('EVENT_TRANSPORT', 'pubsub').lower()
+        self.event_stream_maxlen: int = int(os.getenv('EVENT_STREAM_MAXLEN', '100000'))
+        self.event_stream_claim_idle_ms: int = int(
+            os.getenv('EVENT_STREAM_CLAIM_IDLE_MS', '60000')
+        )
+        self.event_stream_max_deliveries: int = int(
+            os.getenv('EVENT_STREAM_MAX_DELIVERIES', '5')
+        )
+
+        # Event deduplication (src/core/concurrency_manager.py)
+        # hash: sha256 (default, historic keys), blake2b or xxhash (optional package)
+        self.event_dedup_hash: str = os.getenv('EVENT_DEDUP_HASH', 'sha256').lower()
+        self.event_dedup_local_size: int = int(os.getenv('EVENT_DEDUP_LOCAL_SIZE', '10000'))
+        self.event_dedup_local_ttl: float = float(os.getenv('EVENT_DEDUP_LOCAL_TTL', '60'))
+
+        # Authenticated principal cache (see src/core/principal_cache.py)
+        self.principal_cache_size: int = int(os.getenv('PRINCIPAL_CACHE_SIZE', '10000'))
+        self.principal_cache_ttl: float = float(os.getenv('PRINCIPAL_CACHE_TTL', '15'))
+        self.principal_cache_redis_ttl: int = int(
+            os.getenv('PRINCIPAL_CACHE_REDIS_TTL', '300')
+        )
+        self.principal_cache_redis: bool = (
+            os.getenv('PRINCIPAL_CACHE_REDIS', 'true').lower() == 'true'
+        )
         
+        # Admin dashboard KPIs
+        self.admin_kpi_cache_ttl: float = float(os.getenv('ADMIN_KPI_CACHE_TTL', '10'))
+        # Estimated user-list totals count at most this many matching rows
+        self.admin_user_count_cap: int = int(os.getenv('ADMIN_USER_COUNT_CAP', '10000'))
+        # Serve total_users / total_revenue from the admin_counters table.
+        # Run src/db/migrate_add_admin_counters.py before enabling.
+        self.admin_counters_enabled: bool = (
+            os.getenv('ADMIN_COUNTERS_ENABLED', 'false').lower() == 'true'
+        )
+
         # Zarinpal settings
         # See: https://docs.zarinpal.com/paymentGateway/guide/
         self.zarinpal_merchant_id: str = os.getenv('ZARINPAL_MERCHANT_ID', '')
@@ -67,10 +135,89 @@ class Settings:
         self.wecan_from_number: Optional[str] = os.getenv('WECAN_FROM_NUMBER')
         self.wecan_otp_template_id: Optional[int] = os.getenv('WECAN_OTP_TEMPLATE_ID')
         
+        # Notifications
+        # Rows per INSERT ... RETURNING statement in NotificationRepo.bulk_create
+        self.notification_bulk_batch_size: int = int(
+            os.getenv('NOTIFICATION_BULK_BATCH_SIZE', '1000')
+        )
+
+        # Prometheus text exposition at GET /metrics (src/core/metrics.py), off
+        # by default; when METRICS_TOKEN is set scrapers must send it as a
+        # bearer token
+        self.metrics_enabled: bool = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+        self.metrics_token: str = os.getenv('METRICS_TOKEN', '')
+
+        # Per-request SQL profiling (src/core/sql_profiler.py): log requests
+        # slower than SQL_PROFILER_SLOW_MS or running at least
+        # SQL_PROFILER_QUERY_THRESHOLD statements, sampled at SQL_PROFILER_SAMPLE_RATE
+        self.sql_profiler_enabled: bool = os.getenv('SQL_PROFILER_ENABLED', 'true').lower() == 'true'
+        self.sql_profiler_slow_ms: float = float(os.getenv('SQL_PROFILER_SLOW_MS', '500'))
+        self.sql_profiler_query_threshold: int = int(os.getenv('SQL_PROFILER_QUERY_THRESHOLD', '20'))
+        self.sql_profiler_sample_rate: float = float(os.getenv('SQL_PROFILER_SAMPLE_RATE', '1.0'))
+
+        # Redis unread notification counters (src/core/unread_counters.py)
+        self.notification_unread_ttl: int = int(os.getenv('NOTIFICATION_UNREAD_TTL', '86400'))
+        self.notification_unread_reconcile_interval: float = float(
+            os.getenv('NOTIFICATION_UNREAD_RECONCILE_INTERVAL', '300')
+        )
+
+        # Notification retention (src/core/notification_retention.py), opt-in:
+        # nothing is purged until a TTL is set.
+        # Days a notification is kept (0 keeps forever); per-type overrides as
+        # "type=days,type=days", e.g. "admin=30,payment=365"
+        self.notification_retention_days: int = int(
+            os.getenv('NOTIFICATION_RETENTION_DAYS', '0')
+        )
+        self.notification_retention_by_type: dict = {
+            name.strip(): int(days)
+            for name, _, days in (
+                item.partition('=')
+                for item in os.getenv('NOTIFICATION_RETENTION_BY_TYPE', '').split(',')
+                if item.strip()
+            )
+        }
+        # Move expired rows to notifications_archive (false: delete them)
+        self.notification_archive_enabled: bool = (
+            os.getenv('NOTIFICATION_ARCHIVE_ENABLED', 'true').lower() == 'true'
+        )
+        self.notification_archive_retention_days: int = int(
+            os.getenv('NOTIFICATION_ARCHIVE_RETENTION_DAYS', '0')
+        )
+        self.notification_purge_batch_size: int = int(
+            os.getenv('NOTIFICATION_PURGE_BATCH_SIZE', '2000')
+        )
+        self.notification_purge_interval: float = float(
+            os.getenv('NOTIFICATION_PURGE_INTERVAL', '3600')
+        )
+
+        # Notification event stream (src/core/user_event_hub.py)
+        self.notification_stream_queue_size: int = int(
+            os.getenv('NOTIFICATION_STREAM_QUEUE_SIZE', '100')
+        )
+        self.notification_stream_max_clients: int = int(
+            os.getenv('NOTIFICATION_STREAM_MAX_CLIENTS', '50000')
+        )
+        self.notification_stream_keepalive: float = float(
+            os.getenv('NOTIFICATION_STREAM_KEEPALIVE', '20')
+        )
+
+        # Admin broadcast jobs (src/core/broadcast_worker.py)
+        self.broadcast_chunk_size: int = int(os.getenv('BROADCAST_CHUNK_SIZE', '1000'))
+        self.broadcast_poll_interval: float = float(
+            os.getenv('BROADCAST_POLL_INTERVAL', '5')
+        )
+
         # Web Push (VAPID) settings
         self.vapid_public_key: str = os.getenv('VAPID_PUBLIC_KEY', '')
         self.vapid_private_key: str = os.getenv('VAPID_PRIVATE_KEY', '')
         self.vapid_subject: str = os.getenv('VAPID_SUBJECT', 'mailto:admin@example.com')
+
+        # Web Push delivery engine (src/integrations/webpush.py)
+        self.webpush_max_workers: int = int(os.getenv('WEBPUSH_MAX_WORKERS', '16'))
+        # Sustained sends/sec and burst allowed per push service origin
+        self.webpush_origin_rate: float = float(os.getenv('WEBPUSH_ORIGIN_RATE', '50'))
+        self.webpush_origin_burst: float = float(os.getenv('WEBPUSH_ORIGIN_BURST', '100'))
+        self.webpush_timeout: float = float(os.getenv('WEBPUSH_TIMEOUT', '10'))
     
     def get(self, key: str, default=None):
         """Get a specific setting by key, with optional default value."""
@@ -0,0 +1,233 @@
+"""Background worker that fans admin broadcast notifications out in chunks."""
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from src.config.settings import settings
+from src.db.base import AsyncSessionLocal
+from src.db.models import BroadcastJob, User
+from src.db.repos import BroadcastJobRepo, CreatedNotification, NotificationRepo
+from src.utils.logging import get_logger
+
+logger = get_logger("broadcast_worker")
+
+
+class BroadcastWorker:
+    """Processes `BroadcastJob` rows one chunk (transaction) at a time.
+
+    Each chunk locks its job row with `FOR UPDATE SKIP LOCKED`, inserts the
+    notifications and advances the job cursor in the same transaction. A
+    crash therefore loses at most the uncommitted chunk, and any worker in
+    any process resumes the job from its cursor.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        poll_interval: float = 5.0,
+        max_chunk_attempts: int = 3,
+    ):
+        """
+        Initialize broadcast worker.
+
+        Args:
+            chunk_size: Recipients handled per transaction
+            poll_interval: Seconds between scans for runnable jobs when idle
+            max_chunk_attempts: Failures tolerated on one chunk before its
+                recipients are counted as failed and skipped
+        """
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.max_chunk_attempts = max_chunk_attempts
+        self.job_repo = BroadcastJobRepo()
+        self.notification_repo = NotificationRepo()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the worker loop in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker loop; in-flight chunks roll back and are retried later."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self):
+        """Wake the worker up right away (e.g. after a job was enqueued)."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                progressed = False
+                for job_id in await self.job_repo.list_runnable_ids():
+                    while await self.process_chunk(job_id):
+                        progressed = True
+
+                if not progressed:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Broadcast worker loop error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def process_chunk(self, job_id: int) -> bool:
+        """
+        Process the next chunk of a job.
+
+        Returns:
+            True if the job advanced and has more work, False if it is
+            finished, missing or locked by another worker
+        """
+        try:
+            more, created, push_args = await self._process_chunk(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast job {job_id} chunk failed: {e}")
+            await self._record_chunk_failure(job_id, str(e))
+            return False
+
+        # The chunk is committed: an announce failure must not be charged to
+        # the job's chunk attempts (that would skip the next, untouched chunk).
+        if created:
+            await self._announce(job_id, created, push_args)
+        return more
+
+    async def _process_chunk(
+        self, job_id: int
+    ) -> Tuple[bool, List[CreatedNotification], tuple]:
+        """
+        Insert the next chunk and advance the job in one transaction.
+
+        Returns:
+            Whether the job has more work, the notifications created and the
+            (type, title, message, link) to announce them with
+        """
+        now = datetime.now(timezone.utc)
+
+        async with AsyncSessionLocal() as session:
+            q = await session.execute(
+                select(BroadcastJob)
+                .where(
+                    BroadcastJob.id == job_id,
+                    BroadcastJob.status.in_(("pending", "running")),
+                )
+                .with_for_update(skip_locked=True)
+            )
+            job = q.scalar_one_or_none()
+            if job is None:
+                return False, [], ()
+
+            if job.status == "pending":
+                job.status = "running"
+                job.started_at = now
+                if job.total is None:
+                    total_q = await session.execute(
+                        select(func.count(User.id)).where(User.is_active.is_(True))
+                    )
+                    job.total = int(total_q.scalar() or 0)
+
+            recipient_ids, chunk_end = await self._next_recipients(session, job)
+            job.cursor = chunk_end
+            if not recipient_ids:
+                job.status = "completed"
+                job.finished_at = now
+                await session.commit()
+                logger.info(
+                    f"Broadcast job {job.id} completed: {job.processed} sent, {job.failed} failed"
+                )
+                return False, [], ()
+
+            created = await self.notification_repo.insert_many(
+                session, recipient_ids, job.type, job.title, job.message, job.link
+            )
+            job.processed += len(created)
+            job.chunk_attempts = 0
+            await session.commit()
+
+            push_args = (job.type, job.title, job.message, job.link)
+
+        return True, created, push_args
+
+    async def _announce(self, job_id: int, created: List[CreatedNotification], push_args: tuple):
+        """Publish realtime events and Web Push for a committed chunk (best effort)."""
+        try:
+            await self.notification_repo.announce_created(created, *push_args)
+            await self.notification_repo.send_push(created, *push_args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Recipients still see the notifications on their next fetch
+            logger.error(f"Broadcast job {job_id}: announcing {len(created)} notifications failed: {e}")
+
+    async def _next_recipients(self, session, job: BroadcastJob) -> Tuple[List[int], int]:
+        """
+        Select the next chunk of recipients after the job cursor.
+
+        Returns:
+            The active recipient ids and the cursor value that ends the chunk
+            (explicit targets may end on a user who has since been deactivated)
+        """
+        if job.send_to_all:
+            q = await session.execute(
+                select(User.id)
+                .where(User.is_active.is_(True), User.id > job.cursor)
+                .order_by(User.id)
+                .limit(self.chunk_size)
+            )
+            ids = [row[0] for row in q.all()]
+            return ids, (ids[-1] if ids else job.cursor)
+
+        cursor = job.cursor
+        while True:
+            pending = [uid for uid in (job.user_ids or []) if uid > cursor][:self.chunk_size]
+            if not pending:
+                return [], cursor
+            # Users may have been deactivated or removed since the job was queued
+            q = await session.execute(
+                select(User.id)
+                .where(User.id.in_(pending), User.is_active.is_(True))
+                .order_by(User.id)
+            )
+            active = [row[0] for row in q.all()]
+            job.failed += len(pending) - len(active)
+            cursor = pending[-1]
+            if active:
+                return active, cursor
+
+    async def _record_chunk_failure(self, job_id: int, error: str):
+        try:
+            async with AsyncSessionLocal() as session:
+                job = await session.get(BroadcastJob, job_id, with_for_update=True)
+                if job is None:
+                    return
+                job.chunk_attempts += 1
+                job.error = error[:2000]
+                if job.chunk_attempts >= self.max_chunk_attempts:
+                    # Poison chunk: count its recipients as failed and move on
+                    recipient_ids, chunk_end = await self._next_recipients(session, job)
+                    job.failed += len(recipient_ids)
+                    job.cursor = chunk_end
+                    job.chunk_attempts = 0
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to record failure for broadcast job {job_id}: {e}")
+
+
+# Global broadcast worker instance
+broadcast_worker = BroadcastWorker(
+    chunk_size=settings.broadcast_chunk_size,
+    poll_interval=settings.broadcast_poll_interval,
+)
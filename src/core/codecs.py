@@ -0,0 +1,105 @@
+"""Codec registry for values and messages stored in or sent through Redis.
+
+Encoded data is either plain JSON (the original, untagged format) or
+`TAG + format id + body`. 0xC1 never starts valid UTF-8 text and is unused
+in msgpack, so it cannot be mistaken for either, and `decode` accepts all
+of them whatever codec this process encodes with. Mixed deployments keep
+working as long as every process can decode the formats in use: roll out
+code first, then switch REDIS_CODEC.
+"""
+import json
+from typing import Any, Callable, Dict, NamedTuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional: REDIS_CODEC=orjson
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: REDIS_CODEC=msgpack
+    msgpack = None
+
+TAG = b"\xc1"
+
+# Wire formats; several codecs may produce the same format
+FORMAT_JSON = 1
+FORMAT_MSGPACK = 2
+
+
+class Codec(NamedTuple):
+    """A named encoder/decoder for one wire format."""
+    name: str
+    format: int
+    dumps: Callable[[Any], Union[str, bytes]]
+    loads: Callable[[Union[str, bytes]], Any]
+    # JSON is written untagged so processes without this module can read it
+    tagged: bool = True
+
+
+_codecs: Dict[str, Codec] = {}
+# Decoder used per format: the last registered (fastest available) codec
+_decoders: Dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec):
+    """Make a codec available to `get_codec` and `decode`."""
+    _codecs[codec.name] = codec
+    _decoders[codec.format] = codec
+
+
+def get_codec(name: str) -> Codec:
+    """Look up a registered codec by name (json, orjson, msgpack)."""
+    try:
+        return _codecs[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown or unavailable codec {name!r} (available: {', '.join(_codecs)})"
+        ) from None
+
+
+def available_codecs() -> Dict[str, Codec]:
+    """All registered codecs by name."""
+    return dict(_codecs)
+
+
+def encode(value: Any, codec: Codec) -> Union[str, bytes]:
+    """Encode a value, tagging it unless the codec writes plain JSON."""
+    body = codec.dumps(value)
+    if not codec.tagged:
+        return body
+    if isinstance(body, str):
+        body = body.encode()
+    return TAG + bytes((codec.format,)) + body
+
+
+def decode(data: Union[str, bytes]) -> Any:
+    """Decode data written by `encode` with any registered codec, or plain JSON."""
+    if isinstance(data, (bytes, bytearray)) and data[:1] == TAG:
+        codec = _decoders.get(data[1])
+        if codec is None:
+            raise ValueError(f"No codec registered for format {data[1]}")
+        return codec.loads(data[2:])
+    try:
+        return _decoders[FORMAT_JSON].loads(data)
+    except ValueError:
+        # orjson rejects NaN/Infinity, which json.dumps writes
+        return json.loads(data)
+
+
+register_codec(Codec('json', FORMAT_JSON, json.dumps, json.loads, tagged=False))
+if orjson is not None:
+    register_codec(Codec(
+        'orjson',
+        FORMAT_JSON,
+        lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS),
+        orjson.loads,
+        tagged=False,
+    ))
+if msgpack is not None:
+    register_codec(Codec(
+        'msgpack',
+        FORMAT_MSGPACK,
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False),
+    ))
@@ -2,32 +2,166 @@
 import asyncio
 import hashlib
 import json
+import random
 import time
 import uuid
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+try:
+    import xxhash
+except ImportError:  # optional: EVENT_DEDUP_HASH=xxhash
+    xxhash = None
+
+from src.config.settings import settings
+from src.core.metrics import registry
 from src.core.redis_manager import redis_manager
+from src.core.subscription_hub import LAGGED, subscription_hub
 from src.utils.logging import get_logger
 
 logger = get_logger("concurrency_manager")
 
+lock_wait = registry.histogram(
+    "lock_acquire_wait_seconds",
+    "Time spent in DistributedLock.acquire by outcome",
+    labelnames=("result",),
+)
+
+
+# Take the lock and hand out the next fencing token in one round trip
+_ACQUIRE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return redis.call('INCR', KEYS[2])
+end
+return nil
+"""
+
+# Delete our own lock only, then wake waiters in every process
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('PUBLISH', ARGV[2], '1')
+    return 1
+end
+return 0
+"""
+
+_EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+LOCK_RELEASED_PREFIX = "lock_released:"
+
+
+class _LockReleaseListener:
+    """One `lock_released:*` pattern subscription per process, waking local lock waiters.
+
+    Waiters register an `asyncio.Event` per lock key before trying the lock,
+    so a release published between a failed attempt and the wait is not
+    missed. If the subscription is down, waiters still wake on their own
+    jittered backoff.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, key: str) -> asyncio.Event:
+        event = asyncio.Event()
+        self._waiters.setdefault(key, set()).add(event)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return event
+
+    def unregister(self, key: str, event: asyncio.Event):
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        waiters.discard(event)
+        if not waiters:
+            del self._waiters[key]
+
+    async def _run(self):
+        sub = await subscription_hub.subscribe(patterns=[f"{LOCK_RELEASED_PREFIX}*"])
+        try:
+            async for message in sub.listen():
+                if message is LAGGED:
+                    # Releases may have been missed: let every waiter retry
+                    for waiters in self._waiters.values():
+                        for event in waiters:
+                            event.set()
+                    continue
+                for event in self._waiters.get(message['channel'][len(LOCK_RELEASED_PREFIX):], ()):
+                    event.set()
+        finally:
+            await sub.close()
+
+
+_release_listener = _LockReleaseListener()
+
 
 class DistributedLock:
-    """Distributed lock using Redis."""
+    """Distributed lock using Redis.
+
+    - TTLs are set in milliseconds (`PX`), so sub-second timeouts work
+    - every successful acquire returns a fencing token (`self.token`) that
+      increases monotonically per key; pass it to the protected resource so
+      it can reject writes from a holder whose lock already expired
+    - waiters sleep until a release is published (or the holder's TTL runs
+      out) instead of polling, with jittered exponential backoff as a fallback
+    - `auto_renew=True` keeps extending the TTL while the lock is held
+    """
     
-    def __init__(self, key: str, timeout: float = 30.0, retry_interval: float = 0.1):
+    def __init__(
+        self,
+        key: str,
+        timeout: float = 30.0,
+        retry_interval: float = 0.1,
+        auto_renew: bool = False,
+    ):
         """
         Initialize distributed lock.
         
         Args:
             key: Lock key in Redis
             timeout: Lock timeout in seconds (auto-release if not released)
-            retry_interval: Interval between retry attempts in seconds
+            retry_interval: Initial fallback backoff between attempts in seconds
+            auto_renew: Extend the lock every timeout/3 until released
         """
+        self.name = key
         self.key = f"lock:{key}"
+        self.fence_key = f"lock:{key}:fence"
+        self.release_channel = f"{LOCK_RELEASED_PREFIX}{key}"
         self.timeout = timeout
         self.retry_interval = retry_interval
+        self.auto_renew = auto_renew
         self.lock_value = str(uuid.uuid4())
         self.acquired = False
+        self.token: Optional[int] = None
+        # Set by the watchdog if the lock was lost while held
+        self.lost = False
+        self._watchdog: Optional[asyncio.Task] = None
+
+    @property
+    def _ttl_ms(self) -> int:
+        return max(1, int(self.timeout * 1000))
+
+    async def _try_acquire(self, conn) -> bool:
+        token = await conn.eval(
+            _ACQUIRE_SCRIPT, 2, self.key, self.fence_key, self.lock_value, self._ttl_ms
+        )
+        if token is None:
+            return False
+        self.acquired = True
+        self.lost = False
+        self.token = int(token)
+        if self.auto_renew:
+            self._watchdog = asyncio.create_task(self._renew_loop())
+        logger.debug(f"Lock acquired: {self.key} (token {self.token})")
+        return True
     
     async def acquire(self, wait: bool = True, max_wait: float = 5.0) -> bool:
         """
@@ -40,39 +174,92 @@ class DistributedLock:
         Returns:
             True if lock acquired, False otherwise
         """
-        start_time = time.time()
+        started = time.monotonic()
+        deadline = started + max_wait
+        backoff = self.retry_interval
+        released = _release_listener.register(self.name) if wait else None
+        result = 'timeout'
         
-        while True:
-            try:
-                conn = await redis_manager.pool.get_connection()
-                # Try to set lock with NX (only if not exists) and EX (expiration)
-                result = await conn.set(
-                    self.key,
-                    self.lock_value,
-                    ex=int(self.timeout),
-                    nx=True
-                )
-                
-                if result:
-                    self.acquired = True
-                    logger.debug(f"Lock acquired: {self.key}")
-                    return True
-                
-                if not wait:
-                    return False
-                
-                # Check if we've exceeded max wait time
-                if time.time() - start_time >= max_wait:
+        try:
+            while True:
+                delay = backoff
+                try:
+                    conn = await redis_manager.pool.get_connection()
+                    if released is not None:
+                        released.clear()
+                    if await self._try_acquire(conn):
+                        result = 'acquired'
+                        return True
+                    if not wait:
+                        result = 'busy'
+                        return False
+                    # If the holder dies no release is published; wake when its TTL ends
+                    pttl = await conn.pttl(self.key)
+                    if pttl and pttl > 0:
+                        delay = min(delay, pttl / 1000)
+                except Exception as e:
+                    logger.error(f"Error acquiring lock {self.key}: {e}")
+                    if not wait:
+                        result = 'error'
+                        return False
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     logger.warning(f"Failed to acquire lock {self.key} within {max_wait}s")
                     return False
-                
-                await asyncio.sleep(self.retry_interval)
-                
-            except Exception as e:
-                logger.error(f"Error acquiring lock {self.key}: {e}")
-                if not wait:
-                    return False
-                await asyncio.sleep(self.retry_interval)
+
+                try:
+                    await asyncio.wait_for(
+                        released.wait(),
+                        timeout=min(remaining, delay * random.uniform(0.5, 1.5)),
+                    )
+                except asyncio.TimeoutError:
+                    backoff = min(backoff * 2, 1.0)
+        finally:
+            lock_wait.observe(time.monotonic() - started, result)
+            if released is not None:
+                _release_listener.unregister(self.name, released)
+
+    async def extend(self, timeout: Optional[float] = None) -> bool:
+        """
+        Reset the lock TTL if we still hold it.
+
+        Args:
+            timeout: New TTL in seconds (defaults to the lock timeout)
+
+        Returns:
+            True if the lock is still ours and was extended
+        """
+        if not self.acquired:
+            return False
+        ttl_ms = max(1, int((timeout or self.timeout) * 1000))
+        try:
+            conn = await redis_manager.pool.get_connection()
+            return bool(await conn.eval(_EXTEND_SCRIPT, 1, self.key, self.lock_value, ttl_ms))
+        except Exception as e:
+            logger.error(f"Error extending lock {self.key}: {e}")
+            return False
+
+    async def _renew_loop(self):
+        interval = self.timeout / 3
+        task = asyncio.current_task()
+        # _stop_watchdog detaches the task before cancelling it, so the loop
+        # also ends if the cancellation is lost inside a Redis call (Python
+        # 3.11's wait_for can swallow one that races a reply)
+        while self.acquired and self._watchdog is task:
+            await asyncio.sleep(interval)
+            if not self.acquired or self._watchdog is not task:
+                return
+            if not await self.extend():
+                self.lost = True
+                logger.warning(f"Lock {self.key} lost while held (token {self.token})")
+                return
+
+    async def _stop_watchdog(self):
+        task, self._watchdog = self._watchdog, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
     
     async def release(self) -> bool:
         """
@@ -83,21 +270,17 @@ class DistributedLock:
         """
         if not self.acquired:
             return False
+
+        await self._stop_watchdog()
         
         try:
             conn = await redis_manager.pool.get_connection()
-            # Use Lua script to ensure we only delete our own lock
-            lua_script = """
-            if redis.call("get", KEYS[1]) == ARGV[1] then
-                return redis.call("del", KEYS[1])
-            else
-                return 0
-            end
-            """
-            result = await conn.eval(lua_script, 1, self.key, self.lock_value)
+            result = await conn.eval(
+                _RELEASE_SCRIPT, 1, self.key, self.lock_value, self.release_channel
+            )
+            self.acquired = False
             
             if result:
-                self.acquired = False
                 logger.debug(f"Lock released: {self.key}")
                 return True
             else:
@@ -118,18 +301,73 @@ class DistributedLock:
         await self.release()
 
 
+def _sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _blake2b_hex(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _xxhash_hex(data: bytes) -> str:
+    return xxhash.xxh3_64_hexdigest(data)
+
+
+# All produce 64-bit ids (16 hex chars); sha256 keeps the historic keys
+_EVENT_HASHES = {
+    'sha256': _sha256_hex,
+    'blake2b': _blake2b_hex,
+    'xxhash': _xxhash_hex,
+}
+
+
 class EventDeduplicator:
-    """Prevents duplicate event processing."""
+    """Prevents duplicate event processing.
+
+    Event ids are checked against a small in-process LRU of recently seen
+    ids first; only misses go to Redis (`SET NX EX`). Local entries expire
+    after `local_ttl`, never later than the Redis key would, so the LRU can
+    only answer "duplicate" when Redis would have said the same.
+    """
     
-    def __init__(self, ttl: int = 3600):
+    def __init__(
+        self,
+        ttl: int = 3600,
+        hash_name: str = 'sha256',
+        local_size: int = 10000,
+        local_ttl: float = 60.0,
+    ):
         """
         Initialize event deduplicator.
         
         Args:
             ttl: Time to live for event IDs in seconds (default 1 hour)
+            hash_name: "sha256", "blake2b" or "xxhash" (needs the xxhash
+                package; falls back to blake2b). Changing it changes the
+                Redis keys, so events seen just before the switch are not
+                recognised after it.
+            local_size: Recently seen ids kept in process (0 disables)
+            local_ttl: Seconds a locally cached id is trusted
         """
         self.ttl = ttl
         self._prefix = "event:"
+        if hash_name == 'xxhash' and xxhash is None:
+            logger.warning("xxhash is not installed; event dedup falls back to blake2b")
+            hash_name = 'blake2b'
+        if hash_name not in _EVENT_HASHES:
+            raise ValueError(f"Unknown event hash: {hash_name}")
+        self.hash_name = hash_name
+        self._hash = _EVENT_HASHES[hash_name]
+        self.local_size = local_size
+        self.local_ttl = min(local_ttl, ttl)
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._stats = {
+            'checked': 0,
+            'duplicates': 0,
+            'local_hits': 0,
+            'redis_checks': 0,
+            'redis_errors': 0,
+        }
     
     def _generate_event_id(self, event_type: str, payload: Dict[str, Any]) -> str:
         """Generate a unique event ID from event type and payload."""
@@ -144,9 +382,31 @@ class EventDeduplicator:
             key_fields = payload
         
         # Create deterministic hash
-        event_data = json.dumps({**key_fields, 'type': event_type}, sort_keys=True)
-        event_hash = hashlib.sha256(event_data.encode()).hexdigest()
-        return f"{event_type}:{event_hash[:16]}"
+        if len(key_fields) == 1 and type(key_fields.get('id')) in (int, str):
+            # Same bytes json.dumps(..., sort_keys=True) would produce, minus its overhead
+            event_data = f'{{"id": {json.dumps(key_fields["id"])}, "type": {json.dumps(event_type)}}}'
+        else:
+            event_data = json.dumps({**key_fields, 'type': event_type}, sort_keys=True)
+        event_hash = self._hash(event_data.encode())
+        return f"{event_type}:{event_hash}"
+
+    def _seen_locally(self, event_id: str, now: float) -> bool:
+        expires = self._seen.get(event_id)
+        if expires is None:
+            return False
+        if expires <= now:
+            del self._seen[event_id]
+            return False
+        self._seen.move_to_end(event_id)
+        return True
+
+    def _remember(self, event_id: str, now: float):
+        if self.local_size <= 0:
+            return
+        self._seen[event_id] = now + self.local_ttl
+        self._seen.move_to_end(event_id)
+        while len(self._seen) > self.local_size:
+            self._seen.popitem(last=False)
     
     async def is_duplicate(self, event_type: str, payload: Dict[str, Any]) -> bool:
         """
@@ -159,28 +419,58 @@ class EventDeduplicator:
         Returns:
             True if duplicate, False otherwise
         """
-        event_id = self._generate_event_id(event_type, payload)
-        key = f"{self._prefix}{event_id}"
-        
-        try:
-            conn = await redis_manager.pool.get_connection()
-            # Use SET with NX (only if not exists) and EX (expiration) for atomic operation
-            # Returns True if key was set (not duplicate), False if key already exists (duplicate)
-            result = await conn.set(key, "1", ex=self.ttl, nx=True)
-            
-            if result:
-                # Key was set, meaning this is the first time we see this event
-                logger.debug(f"New event processed: {event_id}")
-                return False
+        return (await self.check_many([(event_type, payload)]))[0]
+
+    async def check_many(self, events: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Check-and-set a batch of events in one Redis round trip.
+
+        An event repeated within the batch counts as a duplicate from its
+        second occurrence on.
+
+        Args:
+            events: (event_type, payload) pairs
+
+        Returns:
+            One flag per event, True if it is a duplicate
+        """
+        now = time.monotonic()
+        results: List[bool] = [False] * len(events)
+        pending: List[Tuple[int, str]] = []
+        self._stats['checked'] += len(events)
+
+        for i, (event_type, payload) in enumerate(events):
+            event_id = self._generate_event_id(event_type, payload)
+            if self._seen_locally(event_id, now):
+                self._stats['local_hits'] += 1
+                results[i] = True
             else:
-                # Key already exists, meaning this is a duplicate
-                logger.debug(f"Duplicate event detected: {event_id}")
-                return True
-            
-        except Exception as e:
-            logger.error(f"Error checking event duplicate {event_id}: {e}")
-            # On error, allow event to proceed (fail open)
-            return False
+                pending.append((i, event_id))
+
+        if pending:
+            self._stats['redis_checks'] += len(pending)
+            try:
+                conn = await redis_manager.pool.get_connection()
+                async with conn.pipeline(transaction=False) as pipe:
+                    for _, event_id in pending:
+                        # SET NX returns True if the key was set (first time seen)
+                        pipe.set(f"{self._prefix}{event_id}", "1", ex=self.ttl, nx=True)
+                    replies = await pipe.execute()
+                for (i, event_id), created in zip(pending, replies):
+                    results[i] = not created
+                    if created:
+                        # Only ids whose Redis TTL we just set: their expiry is known
+                        self._remember(event_id, now)
+            except Exception as e:
+                # On error, allow events to proceed (fail open)
+                self._stats['redis_errors'] += 1
+                logger.error(f"Error checking {len(pending)} event duplicates: {e}")
+
+        duplicates = sum(results)
+        self._stats['duplicates'] += duplicates
+        if duplicates:
+            logger.debug(f"Duplicate events detected: {duplicates}/{len(events)}")
+        return results
     
     async def mark_processed(self, event_type: str, payload: Dict[str, Any]) -> bool:
         """
@@ -199,30 +489,44 @@ class EventDeduplicator:
         try:
             conn = await redis_manager.pool.get_connection()
             await conn.setex(key, self.ttl, "1")
+            self._remember(event_id, time.monotonic())
             return True
         except Exception as e:
             logger.error(f"Error marking event as processed {event_id}: {e}")
             return False
 
+    def get_stats(self) -> dict:
+        """Get deduplication statistics."""
+        return {
+            **self._stats,
+            'hash': self.hash_name,
+            'local_size': len(self._seen),
+        }
+
 
 class ConcurrencyManager:
     """Main concurrency manager for distributed locks and event deduplication."""
     
     def __init__(self):
-        self.deduplicator = EventDeduplicator()
+        self.deduplicator = EventDeduplicator(
+            hash_name=settings.event_dedup_hash,
+            local_size=settings.event_dedup_local_size,
+            local_ttl=settings.event_dedup_local_ttl,
+        )
     
-    def get_lock(self, key: str, timeout: float = 30.0) -> DistributedLock:
+    def get_lock(self, key: str, timeout: float = 30.0, auto_renew: bool = False) -> DistributedLock:
         """
         Get a distributed lock.
         
         Args:
             key: Lock key
             timeout: Lock timeout in seconds
+            auto_renew: Keep extending the lock while it is held
         
         Returns:
             DistributedLock instance
         """
-        return DistributedLock(key, timeout=timeout)
+        return DistributedLock(key, timeout=timeout, auto_renew=auto_renew)
     
     async def execute_with_lock(
         self,
@@ -275,6 +579,21 @@ class ConcurrencyManager:
         """
         return await self.deduplicator.is_duplicate(event_type, payload)
     
+    async def check_events_duplicate(
+        self,
+        events: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[bool]:
+        """
+        Check a batch of events for duplicates in one round trip.
+        
+        Args:
+            events: (event_type, payload) pairs
+        
+        Returns:
+            One flag per event, True if it is a duplicate
+        """
+        return await self.deduplicator.check_many(events)
+    
     async def mark_event_processed(
         self,
         event_type: str,
@@ -1,23 +1,51 @@
 """Event dispatcher using optimized Redis manager for cross-process events."""
 import asyncio
+from typing import Iterable, Optional, Tuple
+
+from src.config.settings import settings
+from src.core.event_stream import EventHandler, StreamConsumer, app_event_stream
 from src.core.redis_manager import redis_manager
+from src.core.subscription_hub import Subscription, subscription_hub
 from src.utils.logging import get_logger
 
 logger = get_logger("event_dispatcher")
 
+# Per-user channels are "user_events:<user_id>" (see src/core/user_event_hub.py)
+USER_EVENTS_PREFIX = "user_events:"
+
 
 class EventDispatcher:
     """Optimized event dispatcher using Redis connection pooling and throttling."""
     
     @classmethod
-    async def publish(cls, event_type: str, payload: dict, force: bool = False):
-        """Publish event with throttling and batching."""
-        success = await redis_manager.publish_event(
-            event_type=event_type,
-            payload=payload,
-            channel='app_events',
-            force=force
-        )
+    async def publish(
+        cls,
+        event_type: str,
+        payload: dict,
+        force: bool = False,
+        coalesce_key: Optional[str] = None,
+    ):
+        """Publish event with throttling and batching.
+
+        Pass `coalesce_key` (e.g. an entity id) for state updates: while an
+        event of the same type and key is still queued it is replaced, so
+        subscribers only see the latest state.
+
+        With EVENT_TRANSPORT=streams (or both) the event is also appended to
+        the durable `app_events` stream, which is never throttled or dropped.
+        """
+        transport = settings.event_transport
+        success = True
+        if transport in ('streams', 'both'):
+            success = await app_event_stream.publish(event_type, payload) is not None
+        if transport in ('pubsub', 'both'):
+            success = await redis_manager.publish_event(
+                event_type=event_type,
+                payload=payload,
+                channel='app_events',
+                force=force,
+                coalesce_key=coalesce_key,
+            ) and success
         
         if success:
             logger.debug("Published event %s", event_type)
@@ -26,15 +54,74 @@ class EventDispatcher:
         
         return success
 
+    @classmethod
+    def user_channel(cls, user_id: int) -> str:
+        """Channel carrying events for one user."""
+        return f"{USER_EVENTS_PREFIX}{user_id}"
+
+    @classmethod
+    async def publish_to_user(cls, user_id: int, event_type: str, payload: dict):
+        """Publish an event to one user's channel (never throttled)."""
+        return await cls.publish_to_users([(user_id, event_type, payload)])
+
+    @classmethod
+    async def publish_to_users(cls, events: Iterable[Tuple[int, str, dict]]):
+        """Publish (user_id, event_type, payload) events in one pipeline."""
+        messages = [
+            (cls.user_channel(user_id), event_type, payload)
+            for user_id, event_type, payload in events
+        ]
+        success = await redis_manager.publish_many(messages)
+        if not success:
+            logger.warning("Failed to publish %d user events", len(messages))
+        return success
+
+    @classmethod
+    def consume(cls, group: str, handler: EventHandler, **options) -> StreamConsumer:
+        """
+        Start consuming the durable `app_events` stream as part of `group`.
+
+        Each group receives every event once (at least once); workers that
+        share a group split the events between them.
+
+        Args:
+            group: Consumer group name, one per logical subscriber
+            handler: `async handler(event_type, payload, entry_id)`
+            **options: Extra StreamConsumer arguments
+
+        Returns:
+            The started StreamConsumer (call `stop()` on shutdown)
+        """
+        options.setdefault('claim_idle_ms', settings.event_stream_claim_idle_ms)
+        options.setdefault('max_deliveries', settings.event_stream_max_deliveries)
+        consumer = StreamConsumer(app_event_stream.name, group, handler, **options)
+        consumer.start()
+        return consumer
+
     @classmethod
     async def subscribe(cls):
-        """Subscribe to events channel using optimized connection."""
-        # This method is kept for compatibility but uses the old approach
-        # In production, consider updating subscribers to use the new manager
-        from src.core.redis_manager import RedisPool
-        
-        pool = RedisPool(redis_manager.redis_url)
-        r = await pool.get_connection()
+        """
+        Subscribe to the `app_events` channel on a dedicated connection.
+
+        Kept for compatibility: returns a redis-py `PubSub` the caller reads
+        and closes itself. Prefer `subscribe_shared`, which does not hold a
+        connection per subscriber.
+        """
+        r = await redis_manager.pool.get_connection()
         pub = r.pubsub()
         await pub.subscribe('app_events')
         return pub
+
+    @classmethod
+    async def subscribe_shared(cls, queue_size: Optional[int] = None) -> Subscription:
+        """
+        Subscribe to the `app_events` pub/sub channel through the shared hub.
+
+        All subscribers in the process share one Redis connection (see
+        src/core/subscription_hub.py). Messages carry the JSON event in
+        `data`; a `LAGGED` message means some were missed.
+
+        Returns:
+            A Subscription; call `close()` when done
+        """
+        return await subscription_hub.subscribe(channels=['app_events'], queue_size=queue_size)
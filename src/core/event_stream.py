@@ -0,0 +1,258 @@
+"""Durable event transport on Redis Streams (at-least-once, consumer groups)."""
+import asyncio
+import json
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.core.redis_manager import redis_manager
+from src.utils.logging import get_logger
+
+logger = get_logger("event_stream")
+
+EventHandler = Callable[[str, dict, str], Awaitable[None]]
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class EventStream:
+    """Appends events to a Redis Stream.
+
+    Unlike `PUBLISH`, entries persist until trimmed (`MAXLEN ~`), so
+    consumers that are down or slow catch up instead of missing events.
+    """
+
+    def __init__(self, name: str = "app_events", maxlen: int = 100000):
+        """
+        Initialize event stream.
+
+        Args:
+            name: Stream key in Redis
+            maxlen: Approximate number of entries kept
+        """
+        self.name = name
+        self.maxlen = maxlen
+
+    def _fields(self, event_type: str, payload: dict) -> Dict[str, str]:
+        return {'type': event_type, 'payload': json.dumps(payload)}
+
+    async def publish(self, event_type: str, payload: dict) -> Optional[str]:
+        """
+        Append one event.
+
+        Returns:
+            The entry id, or None if Redis is unavailable
+        """
+        try:
+            conn = await redis_manager.pool.get_connection()
+            entry_id = await conn.xadd(
+                self.name, self._fields(event_type, payload), maxlen=self.maxlen, approximate=True
+            )
+            return _decode(entry_id)
+        except Exception as e:
+            logger.error(f"Failed to append {event_type} to stream {self.name}: {e}")
+            return None
+
+    async def publish_many(self, events: List[Tuple[str, dict]]) -> bool:
+        """Append (event_type, payload) events in one pipeline."""
+        if not events:
+            return True
+        try:
+            conn = await redis_manager.pool.get_connection()
+            async with conn.pipeline(transaction=False) as pipe:
+                for event_type, payload in events:
+                    pipe.xadd(
+                        self.name, self._fields(event_type, payload),
+                        maxlen=self.maxlen, approximate=True,
+                    )
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to append {len(events)} events to stream {self.name}: {e}")
+            return False
+
+
+class StreamConsumer:
+    """Consumes a stream as one member of a consumer group.
+
+    Every process (or worker) that starts a consumer with the same `group`
+    shares the stream's entries; each entry goes to one of them. An entry
+    is acknowledged only after the handler returns, so a crash leaves it
+    pending. Entries pending longer than `claim_idle_ms` are reclaimed by a
+    live consumer and retried; after `max_deliveries` attempts they are
+    copied to `<stream>:dead` and acknowledged. Handlers must therefore be
+    idempotent (see `ConcurrencyManager.check_event_duplicate`).
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        group: str,
+        handler: EventHandler,
+        consumer: Optional[str] = None,
+        batch_size: int = 100,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60000,
+        max_deliveries: int = 5,
+    ):
+        """
+        Initialize stream consumer.
+
+        Args:
+            stream: Stream key in Redis
+            group: Consumer group name
+            handler: `async handler(event_type, payload, entry_id)`
+            consumer: Consumer name, unique per worker (generated if omitted)
+            batch_size: Entries read per call
+            block_ms: How long a read waits for new entries
+            claim_idle_ms: Pending time after which another consumer may take an entry
+            max_deliveries: Attempts before an entry is dead-lettered
+        """
+        self.stream = stream
+        self.group = group
+        self.handler = handler
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.dead_letter_stream = f"{stream}:dead"
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            'processed': 0,
+            'failed': 0,
+            'reclaimed': 0,
+            'dead_lettered': 0,
+        }
+
+    def start(self):
+        """Start consuming in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop consuming; unacknowledged entries stay pending for reclaim."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _ensure_group(self, conn):
+        try:
+            await conn.xgroup_create(self.stream, self.group, id='$', mkstream=True)
+            logger.info(f"Created consumer group {self.group} on {self.stream}")
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    async def _run(self):
+        backoff = 1.0
+        group_ready = False
+        next_reclaim = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                conn = await redis_manager.pool.get_connection()
+                if not group_ready:
+                    await self._ensure_group(conn)
+                    group_ready = True
+
+                if loop.time() >= next_reclaim:
+                    await self._reclaim(conn)
+                    next_reclaim = loop.time() + self.claim_idle_ms / 1000 / 2
+
+                response = await conn.xreadgroup(
+                    self.group, self.consumer, {self.stream: '>'},
+                    count=self.batch_size, block=self.block_ms,
+                )
+                for _, entries in response or ():
+                    await self._handle(conn, entries)
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if 'NOGROUP' in str(e):
+                    group_ready = False
+                logger.error(f"Stream consumer {self.consumer} on {self.stream} failed: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def _handle(self, conn, entries):
+        acked = []
+        for entry_id, fields in entries:
+            entry_id = _decode(entry_id)
+            if not fields:
+                # Trimmed away while pending: nothing left to process
+                acked.append(entry_id)
+                continue
+            fields = {_decode(k): _decode(v) for k, v in fields.items()}
+            try:
+                await self.handler(fields.get('type', ''), json.loads(fields.get('payload') or '{}'), entry_id)
+                acked.append(entry_id)
+                self._stats['processed'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Left pending: reclaimed and retried after claim_idle_ms
+                self._stats['failed'] += 1
+                logger.error(f"Handler failed for {self.stream} entry {entry_id}: {e}")
+        if acked:
+            await conn.xack(self.stream, self.group, *acked)
+
+    async def _reclaim(self, conn):
+        """Take over entries left pending by crashed or stuck consumers."""
+        pending = await conn.xpending_range(
+            self.stream, self.group, min='-', max='+',
+            count=self.batch_size, idle=self.claim_idle_ms,
+        )
+        if not pending:
+            return
+
+        retry, dead = [], []
+        for item in pending:
+            entry_id = _decode(item['message_id'])
+            (dead if item['times_delivered'] >= self.max_deliveries else retry).append(entry_id)
+
+        if dead:
+            # Only entries XCLAIM hands to this consumer: another consumer
+            # may have claimed (and be processing) one since XPENDING
+            claimed = await conn.xclaim(
+                self.stream, self.group, self.consumer, self.claim_idle_ms, dead
+            )
+            if claimed:
+                async with conn.pipeline(transaction=False) as pipe:
+                    for entry_id, fields in claimed:
+                        if fields:
+                            pipe.xadd(
+                                self.dead_letter_stream,
+                                {**fields, 'source_id': entry_id, 'group': self.group},
+                                maxlen=settings.event_stream_maxlen, approximate=True,
+                            )
+                    pipe.xack(self.stream, self.group, *(_decode(entry_id) for entry_id, _ in claimed))
+                    await pipe.execute()
+                self._stats['dead_lettered'] += len(claimed)
+                logger.warning(f"Dead-lettered {len(claimed)} entries from {self.stream} ({self.group})")
+
+        if retry:
+            claimed = await conn.xclaim(
+                self.stream, self.group, self.consumer, self.claim_idle_ms, retry
+            )
+            self._stats['reclaimed'] += len(claimed)
+            await self._handle(conn, claimed)
+
+    def get_stats(self) -> dict:
+        """Get consumer statistics."""
+        return {
+            **self._stats,
+            'stream': self.stream,
+            'group': self.group,
+            'consumer': self.consumer,
+        }
+
+
+# Global app event stream instance
+app_event_stream = EventStream(name="app_events", maxlen=settings.event_stream_maxlen)
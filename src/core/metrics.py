@@ -0,0 +1,205 @@
+"""In-process metrics with Prometheus text exposition.
+
+Histograms are updated on hot paths, so an observation is a bisect and two
+additions with no locking (everything runs on the event loop thread).
+Values that already live in `get_stats()` dicts are read only when
+`/metrics` is scraped, through collectors.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric(NamedTuple):
+    """One metric family as returned by a collector."""
+    name: str
+    type: str
+    help: str
+    # (labels, value) pairs
+    samples: List[Tuple[Dict[str, str], float]]
+
+
+Collector = Callable[[], Iterable[Metric]]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        Initialize histogram.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            labelnames: Label names, matched positionally by `observe`
+            buckets: Upper bounds in ascending order (+Inf is implicit)
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        out = []
+        bounds = [_format_value(b) for b in self.buckets] + ['+Inf']
+        for labelvalues, series in self._series.items():
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                out.append((f"{self.name}_bucket", {**labels, 'le': bound}, cumulative))
+            out.append((f"{self.name}_sum", labels, series[-1]))
+            out.append((f"{self.name}_count", labels, cumulative))
+        return out
+
+
+class MetricsRegistry:
+    """Histograms and collectors rendered together by `/metrics`."""
+
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        self._collectors: List[Collector] = []
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Create and register a histogram."""
+        histogram = Histogram(name, help, labelnames, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register_collector(self, collector: Collector):
+        """Register a callable returning Metric families at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render everything in the Prometheus text format (0.0.4)."""
+        lines = []
+        for histogram in self._histograms:
+            lines.append(f"# HELP {histogram.name} {histogram.help}")
+            lines.append(f"# TYPE {histogram.name} histogram")
+            for name, labels, value in histogram.samples():
+                lines.append(_sample_line(name, labels, value))
+        # Families with the same name (e.g. one per channel) are merged
+        families: Dict[str, Metric] = {}
+        for collector in self._collectors:
+            try:
+                metrics = list(collector())
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for metric in metrics:
+                family = families.get(metric.name)
+                if family is None:
+                    families[metric.name] = metric._replace(samples=list(metric.samples))
+                else:
+                    family.samples.extend(metric.samples)
+        for metric in families.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for labels, value in metric.samples:
+                lines.append(_sample_line(metric.name, labels, value))
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample_line(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{rendered}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+def stats_metrics(prefix: str, stats: dict, labels: Optional[Dict[str, str]] = None,
+                  help: str = "") -> List[Metric]:
+    """
+    Turn the numeric entries of a `get_stats()` dict into untyped metrics.
+
+    Nested dicts and non-numeric values are skipped; booleans become 0/1.
+    """
+    labels = labels or {}
+    metrics = []
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            metrics.append(Metric(f"{prefix}_{key}", 'untyped', help or f"{prefix} {key}", [(labels, value)]))
+    return metrics
+
+
+# Global metrics registry instance
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    labelnames=("method", "route", "status"),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template.
+
+    The route label is the matched path template (`/api/notifications/{notification_id}/read`),
+    not the raw path, so label cardinality stays bounded; unmatched
+    requests share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope['method'],
+                getattr(route, 'path', None) or '<unmatched>',
+                str(status),
+            )
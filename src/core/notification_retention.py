@@ -0,0 +1,188 @@
+"""Background job that expires old notifications in small batches."""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from src.config.settings import settings
+from src.core.concurrency_manager import concurrency_manager
+from src.core.event_dispatcher import EventDispatcher
+from src.core.unread_counters import unread_counters
+from src.db.repos import NotificationRetentionRepo
+from src.utils.logging import get_logger
+
+logger = get_logger("notification_retention")
+
+
+class NotificationRetentionJob:
+    """Keeps `notifications` bounded by a per-type TTL.
+
+    Each run walks every notification type and moves rows older than the
+    type's TTL to `notifications_archive` (or deletes them), one short
+    `FOR UPDATE SKIP LOCKED` transaction of `batch_size` rows at a time, so
+    it never blocks user traffic for long. Unread counters of affected users
+    are corrected as rows go. A Redis lock keeps a single process purging.
+    Retention is opt-in: with every TTL at 0 the job never starts.
+    """
+
+    def __init__(
+        self,
+        default_days: int = 0,
+        days_by_type: Optional[Dict[str, int]] = None,
+        archive: bool = True,
+        archive_days: int = 0,
+        batch_size: int = 2000,
+        interval: float = 3600.0,
+        pause: float = 0.05,
+    ):
+        """
+        Initialize notification retention job.
+
+        Args:
+            default_days: Days a notification is kept (0 keeps forever)
+            days_by_type: Per-type overrides of `default_days`
+            archive: Move expired rows to notifications_archive instead of deleting
+            archive_days: Days an archived row is kept (0 keeps forever)
+            batch_size: Rows per transaction
+            interval: Seconds between runs
+            pause: Seconds to sleep between batches
+        """
+        self.default_days = default_days
+        self.days_by_type = days_by_type or {}
+        self.archive = archive
+        self.archive_days = archive_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pause = pause
+        self.repo = NotificationRetentionRepo()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            'runs': 0,
+            'expired': 0,
+            'archive_purged': 0,
+            'last_run_at': None,
+            'last_run_seconds': None,
+        }
+
+    def retention_days(self, type: str) -> int:
+        """Days notifications of `type` are kept (0 keeps forever)."""
+        return self.days_by_type.get(type, self.default_days)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any TTL is configured."""
+        return (
+            self.default_days > 0
+            or any(days > 0 for days in self.days_by_type.values())
+            or self.archive_days > 0
+        )
+
+    def start(self):
+        """Start periodic runs in the background (no-op when no TTL is set)."""
+        if not self.enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic runs; the current batch rolls back."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                lock = concurrency_manager.get_lock(
+                    "notification_retention", timeout=60, auto_renew=True
+                )
+                if await lock.acquire(wait=False):
+                    try:
+                        await self.run_once()
+                    finally:
+                        await lock.release()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification retention run failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        """
+        Expire everything currently past its TTL.
+
+        Returns:
+            Number of notifications removed from the live table
+        """
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        expired = 0
+
+        for type in await self.repo.list_types():
+            days = self.retention_days(type)
+            if days <= 0:
+                continue
+            cutoff = now - timedelta(days=days)
+            while True:
+                batch = await self.repo.archive_expired(
+                    type, cutoff, self.batch_size, archive=self.archive
+                )
+                expired += batch.removed
+                if batch.unread_by_user:
+                    await self._fix_unread(batch.unread_by_user)
+                if batch.removed < self.batch_size:
+                    break
+                await asyncio.sleep(self.pause)
+
+        purged = 0
+        if self.archive_days > 0:
+            cutoff = now - timedelta(days=self.archive_days)
+            while True:
+                removed = await self.repo.purge_archive(cutoff, self.batch_size)
+                purged += removed
+                if removed < self.batch_size:
+                    break
+                await asyncio.sleep(self.pause)
+
+        elapsed = time.monotonic() - started
+        self._stats['runs'] += 1
+        self._stats['expired'] += expired
+        self._stats['archive_purged'] += purged
+        self._stats['last_run_at'] = now.isoformat()
+        self._stats['last_run_seconds'] = round(elapsed, 3)
+        if expired or purged:
+            logger.info(
+                f"Notification retention: {expired} expired, {purged} archived rows purged in {elapsed:.1f}s"
+            )
+        return expired
+
+    async def _fix_unread(self, unread_by_user: Dict[int, int]):
+        counts = await unread_counters.adjust_many(
+            {user_id: -count for user_id, count in unread_by_user.items()}
+        )
+        await EventDispatcher.publish_to_users(
+            (user_id, "unread_count", {"unread_count": count})
+            for user_id, count in counts.items()
+        )
+
+    def get_stats(self) -> dict:
+        """Get retention statistics."""
+        return {
+            **self._stats,
+            'default_days': self.default_days,
+            'days_by_type': dict(self.days_by_type),
+            'archive': self.archive,
+            'enabled': self.enabled,
+        }
+
+
+# Global notification retention job instance
+notification_retention = NotificationRetentionJob(
+    default_days=settings.notification_retention_days,
+    days_by_type=settings.notification_retention_by_type,
+    archive=settings.notification_archive_enabled,
+    archive_days=settings.notification_archive_retention_days,
+    batch_size=settings.notification_purge_batch_size,
+    interval=settings.notification_purge_interval,
+)
@@ -0,0 +1,43 @@
+"""Password hashing (bcrypt) executed on a bounded worker pool."""
+from passlib.context import CryptContext
+
+from src.config.settings import settings
+from src.core.worker_pool import BoundedWorkerPool
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password_sync(password: str) -> str:
+    """Hash a password on the calling thread (blocks for the bcrypt cost)."""
+    return pwd_context.hash(password)
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the calling thread (blocks for the bcrypt cost)."""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Async facade that keeps bcrypt off the event loop."""
+
+    def __init__(self, pool: BoundedWorkerPool):
+        self.pool = pool
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the worker pool (raises PoolSaturatedError)."""
+        return await self.pool.run(hash_password_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password in the worker pool (raises PoolSaturatedError)."""
+        return await self.pool.run(verify_password_sync, plain_password, hashed_password)
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    BoundedWorkerPool(
+        "password-hash",
+        max_workers=settings.password_hash_workers,
+        max_pending=settings.password_hash_max_pending,
+        kind=settings.password_hash_executor,
+    )
+)
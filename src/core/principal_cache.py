@@ -0,0 +1,199 @@
+"""Two-tier cache for authenticated principals (in-process LRU + optional Redis)."""
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from src.config.settings import settings
+from src.core.redis_manager import redis_manager
+from src.db.models import User
+from src.utils.logging import get_logger
+
+logger = get_logger("principal_cache")
+
+# hashed_password is only needed by the login path, which always reads the DB,
+# so it never ends up in a cache tier.
+_CACHED_COLUMNS = tuple(
+    c.name for c in User.__table__.columns if c.name != "hashed_password"
+)
+_DATETIME_COLUMNS = frozenset(("created_at", "updated_at"))
+
+
+class PrincipalCache:
+    """Caches `User` rows resolved by `get_current_user`.
+
+    The local tier is a per-process LRU with a short TTL; it bounds how long a
+    worker can serve a stale user after an invalidation in another process.
+    The Redis tier is shared by all workers and is cleared on invalidation.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: float = 15.0,
+        redis_ttl: int = 300,
+        use_redis: bool = True,
+    ):
+        """
+        Initialize principal cache.
+
+        Args:
+            max_size: Maximum number of users kept in the local tier
+            ttl: Local tier time to live in seconds
+            redis_ttl: Redis tier time to live in seconds
+            use_redis: Whether to use the shared Redis tier
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.use_redis = use_redis
+        self._prefix = "principal:"
+        self._entries: "OrderedDict[int, Tuple[float, User]]" = OrderedDict()
+        # Skip the Redis tier for a while after a failure instead of paying
+        # a connection error on every request.
+        self._redis_retry_at = 0.0
+        self._redis_backoff = 10.0
+        self._stats = {
+            'local_hits': 0,
+            'redis_hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'evictions': 0,
+            'redis_errors': 0,
+        }
+
+    async def get(
+        self,
+        user_id: int,
+        loader: Callable[[int], Awaitable[Optional[User]]],
+    ) -> Optional[User]:
+        """Return the cached user, falling back to `loader` on a miss."""
+        user = self._get_local(user_id)
+        if user is not None:
+            self._stats['local_hits'] += 1
+            return user
+
+        if self._redis_enabled():
+            user = await self._get_redis(user_id)
+            if user is not None:
+                self._stats['redis_hits'] += 1
+                self._put_local(user_id, user)
+                return user
+
+        self._stats['misses'] += 1
+        user = await loader(user_id)
+        if user is not None:
+            self._put_local(user_id, user)
+            if self._redis_enabled():
+                await self._set_redis(user)
+        return user
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user from both tiers after it has been modified."""
+        self._stats['invalidations'] += 1
+        self._entries.pop(user_id, None)
+        if not self.use_redis:
+            return
+        try:
+            conn = await redis_manager.pool.get_connection()
+            await conn.delete(f"{self._prefix}{user_id}")
+        except Exception as e:
+            self._redis_failed(e)
+
+    def clear(self) -> None:
+        """Drop every entry of the local tier."""
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Get cache hit/miss statistics."""
+        hits = self._stats['local_hits'] + self._stats['redis_hits']
+        lookups = hits + self._stats['misses']
+        return {
+            **self._stats,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _get_local(self, user_id: int) -> Optional[User]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def _put_local(self, user_id: int, user: User) -> None:
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _redis_enabled(self) -> bool:
+        return self.use_redis and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, error: Exception) -> None:
+        self._stats['redis_errors'] += 1
+        self._redis_retry_at = time.monotonic() + self._redis_backoff
+        logger.warning(f"Principal cache Redis tier unavailable: {error}")
+
+    async def _get_redis(self, user_id: int) -> Optional[User]:
+        try:
+            conn = await redis_manager.pool.get_connection()
+            raw = await conn.get(f"{self._prefix}{user_id}")
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if not raw:
+            return None
+        try:
+            return _user_from_dict(json.loads(raw))
+        except Exception as e:
+            logger.warning(f"Dropping undecodable principal cache entry {user_id}: {e}")
+            return None
+
+    async def _set_redis(self, user: User) -> None:
+        try:
+            conn = await redis_manager.pool.get_connection()
+            await conn.set(
+                f"{self._prefix}{user.id}",
+                json.dumps(_user_to_dict(user)),
+                ex=self.redis_ttl,
+            )
+        except Exception as e:
+            self._redis_failed(e)
+
+
+def _user_to_dict(user: User) -> Dict[str, object]:
+    data = {}
+    for name in _CACHED_COLUMNS:
+        value = getattr(user, name)
+        if name in _DATETIME_COLUMNS and value is not None:
+            value = value.isoformat()
+        data[name] = value
+    return data
+
+
+def _user_from_dict(data: Dict[str, object]) -> User:
+    values = {}
+    for name in _CACHED_COLUMNS:
+        value = data.get(name)
+        if name in _DATETIME_COLUMNS and value is not None:
+            value = datetime.fromisoformat(value)
+        values[name] = value
+    # Transient instance: never attached to a session, read-only for callers.
+    return User(**values)
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+    redis_ttl=settings.principal_cache_redis_ttl,
+    use_redis=settings.principal_cache_redis,
+)
@@ -1,46 +1,111 @@
 """Optimized Redis connection manager with pooling, throttling, and performance monitoring."""
 import asyncio
+import itertools
 import json
 import time
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Any, Set, Tuple, Union
 import redis.asyncio as aioredis
-from collections import deque
+from collections import OrderedDict
 
 from src.config.settings import settings
+from src.core.codecs import Codec, decode, encode, get_codec
 from src.utils.logging import get_logger
 
 logger = get_logger("redis_manager")
 
 
+class _InstrumentedBlockingPool(aioredis.BlockingConnectionPool):
+    """Blocking connection pool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.acquire_errors = 0
+
+    async def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except aioredis.ConnectionError:
+            self.acquire_errors += 1
+            raise
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.acquired += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+        return connection
+
+    @property
+    def in_use(self) -> int:
+        return len(getattr(self, '_in_use_connections', ()))
+
+
 class RedisPool:
-    """Redis connection pool with health monitoring."""
+    """Redis connection pool with health monitoring.
+
+    The pool and a single shared client are created on first use; after
+    that `get_connection` is a plain attribute read. Commands borrow a
+    connection per call, waiting up to `timeout` seconds when all
+    `pool_size` connections are busy instead of failing.
+    """
     
-    def __init__(self, redis_url: str, pool_size: int = 10):
+    def __init__(self, redis_url: str, pool_size: int = 10, timeout: float = 5.0):
         self.redis_url = redis_url
         self.pool_size = pool_size
-        self._pool: Optional[aioredis.Redis] = None
-        self._lock = asyncio.Lock()
+        self.timeout = timeout
+        self._pool: Optional[_InstrumentedBlockingPool] = None
+        self._client: Optional[aioredis.Redis] = None
         self._last_health_check = 0
         self._health_check_interval = 30  # seconds
         
     async def get_connection(self) -> aioredis.Redis:
-        """Get Redis connection from pool."""
-        async with self._lock:
-            if self._pool is None:
-                self._pool = aioredis.ConnectionPool.from_url(
-                    self.redis_url,
-                    max_connections=self.pool_size,
-                    retry_on_timeout=True,
-                    socket_keepalive=True,
-                    socket_keepalive_options={}
-                )
-            return aioredis.Redis(connection_pool=self._pool)
+        """Get the shared Redis client backed by the pool."""
+        client = self._client
+        if client is None:
+            # No await between the check and the assignment, so concurrent
+            # first callers cannot create two pools.
+            self._pool = _InstrumentedBlockingPool.from_url(
+                self.redis_url,
+                max_connections=self.pool_size,
+                timeout=self.timeout,
+                retry_on_timeout=True,
+                socket_keepalive=True,
+                socket_keepalive_options={}
+            )
+            client = self._client = aioredis.Redis(connection_pool=self._pool)
+        return client
     
     async def close(self):
         """Close Redis connection pool."""
         if self._pool:
             await self._pool.disconnect()
             self._pool = None
+            self._client = None
+
+    def get_stats(self) -> dict:
+        """Get connection pool statistics."""
+        pool = self._pool
+        if pool is None:
+            return {'pool_size': self.pool_size, 'initialized': False}
+        return {
+            'pool_size': self.pool_size,
+            'initialized': True,
+            'in_use': pool.in_use,
+            'waiters': pool.waiting,
+            'max_waiters': pool.max_waiting,
+            'acquired': pool.acquired,
+            'acquire_errors': pool.acquire_errors,
+            'avg_wait_ms': round(pool.wait_time_total / pool.acquired * 1000, 3) if pool.acquired else 0.0,
+            'max_wait_ms': round(pool.wait_time_max * 1000, 3),
+        }
     
     async def health_check(self) -> bool:
         """Check Redis connection health."""
@@ -58,72 +123,261 @@ class RedisPool:
             return False
 
 
-class EventThrottler:
-    """Throttles high-frequency events to reduce Redis load."""
-    
+# Upper bounds (ms) of the enqueue-to-publish latency histogram buckets
+_LATENCY_BUCKETS_MS = (5, 10, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Event types published at once (together with anything already queued)
+_URGENT_EVENT_TYPES = frozenset(('error', 'critical'))
+
+BatchPublisher = Callable[[str, List[Union[str, bytes]]], Awaitable[bool]]
+
+# Drop up to ARGV[2] of the oldest entries of hash KEYS[1] beyond the newest
+# ARGV[1], using its insertion-time index KEYS[2]; O(log n + batch)
+_TRIM_INDEXED_HASH_SCRIPT = """
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[1])
+if excess <= 0 then
+    return 0
+end
+local n = math.min(excess, tonumber(ARGV[2]))
+local keys = redis.call('ZRANGE', KEYS[2], 0, n - 1)
+redis.call('HDEL', KEYS[1], unpack(keys))
+redis.call('ZREMRANGEBYRANK', KEYS[2], 0, n - 1)
+return n
+"""
+
+
+class _ChannelBuffer:
+    """Pending messages and counters of one throttled channel."""
+
     def __init__(self):
-        self._event_queues: Dict[str, deque] = {}
-        self._last_flush: Dict[str, float] = {}
-        self._flush_interval = 2.0  # seconds
-        
-    def add_event(self, channel: str, event_type: str, payload: dict) -> bool:
-        """Add event to throttling queue. Returns True if event should be queued."""
-        current_time = time.time()
-        
-        if channel not in self._event_queues:
-            self._event_queues[channel] = deque()
-            self._last_flush[channel] = current_time
-        
-        # Don't queue too many events for the same channel
-        if len(self._event_queues[channel]) > 50:
-            return False
-        
-        self._event_queues[channel].append({
-            'type': event_type,
-            'payload': payload,
-            'timestamp': current_time
-        })
-        
-        # Always allow critical events (errors, etc.)
-        if event_type in ['error', 'critical']:
+        # key -> (message, size, enqueued_at); coalesced keys are replaced
+        self.entries: "OrderedDict[Any, Tuple[str, int, float]]" = OrderedDict()
+        self.bytes = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.flushing = False
+        self.urgent = False
+        self.last_flush = 0.0
+        self.dropped_since_flush = 0
+        self.stats = {
+            'published': 0,
+            'batches': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'failed': 0,
+        }
+        self.latency = [0] * (len(_LATENCY_BUCKETS_MS) + 1)
+
+    def record_latency(self, seconds: float):
+        ms = seconds * 1000
+        for i, bound in enumerate(_LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.latency[i] += 1
+                return
+        self.latency[-1] += 1
+
+
+class EventThrottler:
+    """Batches high-frequency events per channel to reduce Redis load.
+
+    A channel's queue is flushed in one pipeline when it reaches
+    `max_events` messages or `max_bytes`, or `max_delay` seconds after its
+    oldest message was queued, whichever comes first; deadlines are timers,
+    not polling. An event on a channel that has been idle for `max_delay`
+    goes out at once, so only bursts pay the batching delay. Events queued
+    with a coalesce key replace the pending event with the same type and
+    key, so only the latest state of an entity is sent. Past `max_queued`
+    pending messages the oldest is dropped and counted.
+    """
+
+    def __init__(
+        self,
+        publish: BatchPublisher,
+        max_events: int = 100,
+        max_bytes: int = 65536,
+        max_delay: float = 2.0,
+        max_queued: int = 1000,
+        encode: Callable[[dict], Union[str, bytes]] = json.dumps,
+    ):
+        """
+        Initialize event throttler.
+
+        Args:
+            publish: `async publish(channel, messages) -> bool` sending one batch
+            max_events: Messages that trigger a flush
+            max_bytes: Serialized bytes that trigger a flush
+            max_delay: Seconds a message may wait before its channel is flushed
+            max_queued: Pending messages kept per channel before dropping the oldest
+            encode: Serializes a `{'type', 'payload'}` message
+        """
+        self._publish = publish
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.max_queued = max_queued
+        self.encode = encode
+        self._buffers: Dict[str, _ChannelBuffer] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._seq = itertools.count()
+
+    def add_event(
+        self,
+        channel: str,
+        event_type: str,
+        payload: dict,
+        coalesce_key: Optional[str] = None,
+        urgent: bool = False,
+    ) -> bool:
+        """
+        Queue an event.
+
+        Returns:
+            True if the caller should `await flush(channel)` now; otherwise a
+            timer flushes the channel by its deadline
+        """
+        buf = self._buffers.get(channel)
+        if buf is None:
+            buf = self._buffers[channel] = _ChannelBuffer()
+
+        message = self.encode({'type': event_type, 'payload': payload})
+        size = len(message)
+        now = time.monotonic()
+        if coalesce_key is not None:
+            key = (event_type, coalesce_key)
+            previous = buf.entries.pop(key, None)
+            if previous is not None:
+                # Keep the original enqueue time so the deadline still holds
+                buf.bytes -= previous[1]
+                now = previous[2]
+                buf.stats['coalesced'] += 1
+        else:
+            key = next(self._seq)
+
+        if len(buf.entries) >= self.max_queued:
+            _, (_, dropped_size, _) = buf.entries.popitem(last=False)
+            buf.bytes -= dropped_size
+            buf.stats['dropped'] += 1
+            buf.dropped_since_flush += 1
+        buf.entries[key] = (message, size, now)
+        buf.bytes += size
+
+        idle = not buf.flushing and len(buf.entries) == 1 and \
+            time.monotonic() - buf.last_flush >= self.max_delay
+        if urgent or idle or len(buf.entries) >= self.max_events or buf.bytes >= self.max_bytes:
+            buf.urgent = True
             return True
-            
-        # Throttle non-critical events
-        return len(self._event_queues[channel]) >= 10 or \
-               (current_time - self._last_flush[channel]) >= self._flush_interval
-    
-    def should_flush(self, channel: str) -> bool:
-        """Check if channel should be flushed."""
-        current_time = time.time()
-        if channel not in self._event_queues:
-            return False
-            
-        return (len(self._event_queues[channel]) >= 10) or \
-               (current_time - self._last_flush[channel]) >= self._flush_interval
-    
-    def get_events(self, channel: str) -> List[dict]:
-        """Get and clear events for channel."""
-        if channel not in self._event_queues:
-            return []
-            
-        events = list(self._event_queues[channel])
-        self._event_queues[channel].clear()
-        self._last_flush[channel] = time.time()
-        return events
-    
+        if buf.timer is None:
+            delay = max(0.0, buf.entries[next(iter(buf.entries))][2] + self.max_delay - time.monotonic())
+            buf.timer = asyncio.get_running_loop().call_later(delay, self._on_deadline, channel)
+        return False
+
+    def _on_deadline(self, channel: str):
+        buf = self._buffers.get(channel)
+        if buf is not None:
+            buf.timer = None
+            buf.urgent = True
+        task = asyncio.create_task(self.flush(channel))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, channel: str) -> bool:
+        """
+        Publish everything queued for a channel.
+
+        If a flush of the channel is already running it picks up the new
+        messages when it finishes, keeping the channel's order.
+
+        Returns:
+            False if publishing a batch failed
+        """
+        buf = self._buffers.get(channel)
+        if buf is None or buf.flushing:
+            return True
+
+        buf.flushing = True
+        success = True
+        try:
+            while buf.entries and buf.urgent:
+                buf.urgent = False
+                if buf.timer is not None:
+                    buf.timer.cancel()
+                    buf.timer = None
+                entries = list(buf.entries.values())
+                buf.entries.clear()
+                buf.bytes = 0
+                if buf.dropped_since_flush:
+                    logger.warning(
+                        f"Dropped {buf.dropped_since_flush} queued events on {channel} (queue full)"
+                    )
+                    buf.dropped_since_flush = 0
+
+                ok = await self._publish(channel, [message for message, _, _ in entries])
+                buf.last_flush = time.monotonic()
+                if ok:
+                    buf.stats['published'] += len(entries)
+                    buf.stats['batches'] += 1
+                    for _, _, enqueued_at in entries:
+                        buf.record_latency(buf.last_flush - enqueued_at)
+                else:
+                    buf.stats['failed'] += len(entries)
+                    success = False
+
+                if buf.entries and (len(buf.entries) >= self.max_events or buf.bytes >= self.max_bytes or
+                                    buf.last_flush - buf.entries[next(iter(buf.entries))][2] >= self.max_delay):
+                    buf.urgent = True
+        finally:
+            buf.flushing = False
+            if buf.entries and buf.timer is None:
+                # Arrived during the last publish and not due yet
+                delay = max(0.0, buf.entries[next(iter(buf.entries))][2] + self.max_delay - time.monotonic())
+                buf.timer = asyncio.get_running_loop().call_later(delay, self._on_deadline, channel)
+        return success
+
+    async def flush_all(self):
+        """Publish everything queued on every channel."""
+        for buf in self._buffers.values():
+            buf.urgent = True
+        await asyncio.gather(*(self.flush(channel) for channel in list(self._buffers)), return_exceptions=True)
+
+    async def close(self):
+        """Cancel deadlines and publish what is still queued."""
+        for buf in self._buffers.values():
+            if buf.timer is not None:
+                buf.timer.cancel()
+                buf.timer = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush_all()
+
+    def pending(self, channel: str) -> int:
+        """Messages currently queued for a channel."""
+        buf = self._buffers.get(channel)
+        return len(buf.entries) if buf is not None else 0
+
     def cleanup_old_events(self, max_age: int = 300):
-        """Clean up old events from all channels."""
-        current_time = time.time()
-        for channel in list(self._event_queues.keys()):
-            queue = self._event_queues[channel]
-            # Remove events older than max_age
-            while queue and (current_time - queue[0]['timestamp']) > max_age:
-                queue.popleft()
-            
-            # Remove empty queues
-            if not queue:
-                del self._event_queues[channel]
-                del self._last_flush[channel]
+        """Forget channels that have been idle for `max_age` seconds."""
+        now = time.monotonic()
+        for channel, buf in list(self._buffers.items()):
+            if not buf.entries and not buf.flushing and now - buf.last_flush > max_age:
+                del self._buffers[channel]
+
+    def get_stats(self) -> dict:
+        """Get per-channel queue depth, counters and latency histograms."""
+        labels = [f"le_{bound}" for bound in _LATENCY_BUCKETS_MS] + ['le_inf']
+        channels = {}
+        for channel, buf in self._buffers.items():
+            channels[channel] = {
+                **buf.stats,
+                'depth': len(buf.entries),
+                'bytes': buf.bytes,
+                'latency_ms': dict(zip(labels, buf.latency)),
+            }
+        return {
+            'max_events': self.max_events,
+            'max_bytes': self.max_bytes,
+            'max_delay': self.max_delay,
+            'max_queued': self.max_queued,
+            'channels': channels,
+        }
 
 
 class OptimizedRedisManager:
@@ -131,8 +385,26 @@ class OptimizedRedisManager:
     
     def __init__(self):
         self.redis_url = settings.redis_url
-        self.pool = RedisPool(self.redis_url, pool_size=10)
-        self.throttler = EventThrottler()
+        self.pool = RedisPool(
+            self.redis_url,
+            pool_size=settings.redis_pool_size,
+            timeout=settings.redis_pool_timeout,
+        )
+        # Encoding of published events and hash values; any registered
+        # codec's output is readable whatever this is set to
+        self.codec: Codec = get_codec(settings.redis_codec)
+        self.throttler = EventThrottler(
+            self._publish_batch,
+            max_events=settings.event_batch_max_events,
+            max_bytes=settings.event_batch_max_bytes,
+            max_delay=settings.event_batch_max_delay,
+            max_queued=settings.event_queue_max,
+            encode=self.encode,
+        )
+        # Hashes kept to their most recent N entries by cleanup_expired_data
+        self.bounded_hashes: Dict[str, int] = {
+            'event_msg_map': settings.event_msg_map_max_entries,
+        }
         self._stats = {
             'events_published': 0,
             'events_throttled': 0,
@@ -140,106 +412,108 @@ class OptimizedRedisManager:
             'connections_created': 0,
             'last_health_check': 0
         }
-        self._flush_tasks: Dict[str, asyncio.Task] = {}
         
     async def publish_event(self, event_type: str, payload: dict, 
-                          channel: str = 'app_events', force: bool = False) -> bool:
-        """Publish event with optional throttling."""
+                          channel: str = 'app_events', force: bool = False,
+                          coalesce_key: Optional[str] = None) -> bool:
+        """
+        Publish event through the channel's throttler.
+
+        `force` and error/critical events are sent at once, together with
+        anything already queued on the channel so order is kept. With a
+        `coalesce_key`, a still-queued event of the same type and key is
+        replaced instead of both being sent.
+        """
         try:
-            # Check if event should be throttled
-            should_queue = not force and not self.throttler.add_event(channel, event_type, payload)
-            
-            if should_queue:
-                self._stats['events_throttled'] += 1
-                logger.debug(f"Event {event_type} throttled for channel {channel}")
-                return True
-            
-            self._stats['events_published'] += 1
-            
-            # For critical events or when queue is full, publish immediately
-            if force or event_type in ['error', 'critical'] or \
-               len(self.throttler._event_queues.get(channel, [])) >= 10:
-                return await self._publish_immediate(channel, event_type, payload)
-            
-            # Start flush task for channel if not already running
-            if channel not in self._flush_tasks or self._flush_tasks[channel].done():
-                self._flush_tasks[channel] = asyncio.create_task(
-                    self._periodic_flush(channel)
-                )
-            
+            urgent = force or event_type in _URGENT_EVENT_TYPES
+            if self.throttler.add_event(channel, event_type, payload, coalesce_key, urgent=urgent):
+                return await self.throttler.flush(channel)
+
+            self._stats['events_throttled'] += 1
+            logger.debug(f"Event {event_type} queued for channel {channel}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to publish event {event_type}: {e}")
             return False
     
-    async def _publish_immediate(self, channel: str, event_type: str, payload: dict) -> bool:
-        """Publish event immediately to Redis."""
+    def encode(self, value: Any) -> Union[str, bytes]:
+        """Encode an event message or hash value with the configured codec."""
+        return encode(value, self.codec)
+
+    async def _publish_batch(self, channel: str, messages: List[Union[str, bytes]]) -> bool:
+        """Publish serialized messages for one channel in a single pipeline."""
         try:
             conn = await self.pool.get_connection()
-            message = json.dumps({'type': event_type, 'payload': payload})
-            await conn.publish(channel, message)
+            async with conn.pipeline(transaction=False) as pipe:
+                for message in messages:
+                    pipe.publish(channel, message)
+                await pipe.execute()
+            self._stats['events_published'] += len(messages)
+            if len(messages) > 1:
+                self._stats['events_batched'] += len(messages)
+                logger.debug(f"Batched {len(messages)} events for channel {channel}")
             return True
         except Exception as e:
-            logger.error(f"Failed to publish to Redis: {e}")
+            logger.error(f"Failed to publish {len(messages)} events to {channel}: {e}")
             return False
     
-    async def _periodic_flush(self, channel: str):
-        """Periodically flush events for a channel."""
-        try:
-            while True:
-                await asyncio.sleep(1.0)  # Check every second
-                
-                if self.throttler.should_flush(channel):
-                    events = self.throttler.get_events(channel)
-                    if events:
-                        await self._batch_publish(channel, events)
-                        
-        except asyncio.CancelledError:
-            # Flush remaining events on cancellation
-            events = self.throttler.get_events(channel)
-            if events:
-                await self._batch_publish(channel, events)
-        except Exception as e:
-            logger.error(f"Error in periodic flush for {channel}: {e}")
-    
-    async def _batch_publish(self, channel: str, events: List[dict]):
-        """Batch publish events to reduce Redis connections."""
-        if not events:
-            return
-            
+    async def publish_many(self, messages: List[Tuple[str, str, dict]]) -> bool:
+        """Publish (channel, event_type, payload) messages unthrottled in one pipeline."""
+        if not messages:
+            return True
+
         try:
             conn = await self.pool.get_connection()
-            
-            # Batch publish all events
-            async with conn.pipeline() as pipe:
-                for event in events:
-                    message = json.dumps({
-                        'type': event['type'],
-                        'payload': event['payload']
-                    })
-                    pipe.publish(channel, message)
-                
+            async with conn.pipeline(transaction=False) as pipe:
+                for channel, event_type, payload in messages:
+                    pipe.publish(channel, self.encode({'type': event_type, 'payload': payload}))
                 await pipe.execute()
-                self._stats['events_batched'] += len(events)
-                
-            logger.debug(f"Batched {len(events)} events for channel {channel}")
-            
+            self._stats['events_published'] += len(messages)
+            return True
         except Exception as e:
-            logger.error(f"Failed to batch publish events: {e}")
-    
+            logger.error(f"Failed to publish {len(messages)} events: {e}")
+            return False
+
+    def _hash_index(self, name: str) -> Optional[str]:
+        """Insertion-time index (sorted set) kept for size-bounded hashes."""
+        return f"{name}:index" if name in self.bounded_hashes else None
+
     async def store_hash(self, name: str, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Store value in Redis hash with optional TTL."""
+        return await self.store_many(name, {key: value}, ttl=ttl)
+
+    async def store_many(self, name: str, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        Store several values in a Redis hash in one round trip.
+
+        HSET, the insertion index of bounded hashes and EXPIRE run in one
+        MULTI/EXEC, so the hash is never left without its TTL.
+
+        Args:
+            name: Hash name
+            items: Keys and values to store
+            ttl: Expire the whole hash after this many seconds
+        """
+        if not items:
+            return True
         try:
             conn = await self.pool.get_connection()
-            await conn.hset(name, key, json.dumps(value))
-            
-            if ttl:
-                await conn.expire(name, ttl)
+            index = self._hash_index(name)
+            async with conn.pipeline(transaction=index is not None or bool(ttl)) as pipe:
+                pipe.hset(name, mapping={key: self.encode(value) for key, value in items.items()})
+                if index is not None:
+                    now_ms = int(time.time() * 1000)
+                    pipe.zadd(index, {key: now_ms for key in items})
+                if ttl:
+                    pipe.expire(name, ttl)
+                    if index is not None:
+                        pipe.expire(index, ttl)
+                await pipe.execute()
                 
             return True
         except Exception as e:
-            logger.error(f"Failed to store hash {name}:{key}: {e}")
+            logger.error(f"Failed to store {len(items)} keys in hash {name}: {e}")
             return False
     
     async def get_hash(self, name: str, key: str) -> Optional[Any]:
@@ -247,19 +521,52 @@ class OptimizedRedisManager:
         try:
             conn = await self.pool.get_connection()
             value = await conn.hget(name, key)
-            return json.loads(value) if value else None
+            return decode(value) if value else None
         except Exception as e:
             logger.error(f"Failed to get hash {name}:{key}: {e}")
             return None
+
+    async def get_many(self, name: str, keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+        """
+        Get several values from a Redis hash with one HMGET.
+
+        Returns:
+            Value per requested key, None for missing keys (or for all keys
+            if Redis is unavailable)
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            conn = await self.pool.get_connection()
+            values = await conn.hmget(name, keys)
+            return {key: decode(value) if value else None for key, value in zip(keys, values)}
+        except Exception as e:
+            logger.error(f"Failed to get {len(keys)} keys from hash {name}: {e}")
+            return dict.fromkeys(keys)
     
     async def delete_hash_key(self, name: str, key: str) -> bool:
         """Delete key from Redis hash."""
+        return await self.delete_many(name, [key])
+
+    async def delete_many(self, name: str, keys: Iterable[str]) -> bool:
+        """Delete several keys from a Redis hash in one round trip."""
+        keys = list(keys)
+        if not keys:
+            return True
         try:
             conn = await self.pool.get_connection()
-            await conn.hdel(name, key)
+            index = self._hash_index(name)
+            if index is None:
+                await conn.hdel(name, *keys)
+            else:
+                async with conn.pipeline(transaction=True) as pipe:
+                    pipe.hdel(name, *keys)
+                    pipe.zrem(index, *keys)
+                    await pipe.execute()
             return True
         except Exception as e:
-            logger.error(f"Failed to delete hash key {name}:{key}: {e}")
+            logger.error(f"Failed to delete {len(keys)} keys from hash {name}: {e}")
             return False
     
     async def get_memory_info(self) -> Optional[dict]:
@@ -284,27 +591,63 @@ class OptimizedRedisManager:
             # Clean up old throttled events
             self.throttler.cleanup_old_events()
             
-            # Clean up old event message mappings (keep last 1000)
-            conn = await self.pool.get_connection()
-            event_count = await conn.hlen('event_msg_map')
-            
-            if event_count > 1000:
-                # Keep only the most recent 1000 entries
-                keys = await conn.hkeys('event_msg_map')
-                keys_to_delete = keys[:-1000]  # Keep last 1000
-                if keys_to_delete:
-                    await conn.hdel('event_msg_map', *keys_to_delete)
-                    logger.info(f"Cleaned up {len(keys_to_delete)} old event message mappings")
+            for name, max_entries in self.bounded_hashes.items():
+                removed = await self.trim_hash(name, max_entries)
+                if removed:
+                    logger.info(f"Cleaned up {removed} old entries of {name}")
             
         except Exception as e:
             logger.error(f"Failed to cleanup expired data: {e}")
     
+    async def trim_hash(self, name: str, max_entries: int, batch_size: int = 500) -> int:
+        """
+        Keep only the `max_entries` most recently stored entries of an indexed hash.
+
+        Works in batches of `batch_size`, each one short atomic script, so a
+        large backlog never blocks Redis or produces a large reply.
+
+        Returns:
+            Number of entries removed
+        """
+        index = self._hash_index(name)
+        if index is None:
+            raise ValueError(f"{name} is not a bounded hash")
+
+        conn = await self.pool.get_connection()
+        await self._index_unindexed(conn, name, index, batch_size)
+        removed = 0
+        while True:
+            n = await conn.eval(_TRIM_INDEXED_HASH_SCRIPT, 2, name, index, max_entries, batch_size)
+            removed += n
+            if n < batch_size:
+                return removed
+
+    async def _index_unindexed(self, conn, name: str, index: str, batch_size: int):
+        """Add entries written before the index existed, as the oldest ones."""
+        async with conn.pipeline(transaction=False) as pipe:
+            pipe.hlen(name)
+            pipe.zcard(index)
+            size, indexed = await pipe.execute()
+        if size <= indexed:
+            return
+        cursor = 0
+        while True:
+            cursor, entries = await conn.hscan(name, cursor, count=batch_size)
+            if entries:
+                await conn.zadd(index, {key: 0 for key in entries}, nx=True)
+            if cursor == 0:
+                return
+
     def get_stats(self) -> dict:
         """Get Redis manager statistics."""
         return {
             **self._stats,
-            'active_channels': len(self.throttler._event_queues),
-            'pool_size': self.pool.pool_size
+            'active_channels': sum(
+                1 for channel in self.throttler._buffers if self.throttler.pending(channel)
+            ),
+            'throttler': self.throttler.get_stats(),
+            'pool_size': self.pool.pool_size,
+            'pool': self.pool.get_stats()
         }
     
     async def health_check(self) -> bool:
@@ -313,12 +656,8 @@ class OptimizedRedisManager:
     
     async def close(self):
         """Close Redis manager and cleanup resources."""
-        # Cancel all flush tasks
-        for task in self._flush_tasks.values():
-            task.cancel()
-        
-        if self._flush_tasks:
-            await asyncio.gather(*self._flush_tasks.values(), return_exceptions=True)
+        # Publish whatever is still queued
+        await self.throttler.close()
         
         # Close connection pool
         await self.pool.close()
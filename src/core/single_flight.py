@@ -0,0 +1,69 @@
+"""Short-TTL in-process cache with single-flight protection."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from src.utils.logging import get_logger
+
+logger = get_logger("single_flight")
+
+
+class SingleFlightCache:
+    """Caches coroutine results per key for `ttl` seconds.
+
+    Concurrent callers that miss the same key share one in-flight
+    computation instead of each running it. The computation runs in its own
+    task, so a caller that disconnects does not cancel it for the others.
+    """
+
+    def __init__(self, ttl: float = 10.0):
+        """
+        Initialize single-flight cache.
+
+        Args:
+            ttl: Time to live for computed values in seconds
+        """
+        self.ttl = ttl
+        self._values: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'shared': 0,
+        }
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for `key`, computing it at most once per TTL."""
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._stats['hits'] += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats['shared'] += 1
+        else:
+            self._stats['misses'] += 1
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            self._values[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a cached value so the next caller recomputes it."""
+        self._values.pop(key, None)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        return {
+            **self._stats,
+            'keys': len(self._values),
+            'inflight': len(self._inflight),
+        }
@@ -0,0 +1,158 @@
+"""Per-request SQL query counting and slow-request sampling.
+
+Engine events time every statement into the `QueryStats` of the request
+being served (found through a ContextVar, which SQLAlchemy's async greenlets
+share with the calling task). Statements run outside a request (background
+jobs, startup) cost one ContextVar lookup and are not recorded.
+"""
+import json
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+from src.utils.logging import get_logger
+
+logger = get_logger("sql_profiler")
+
+_MAX_STATEMENT_LOG = 500
+
+
+class QueryStats:
+    """SQL statements executed while serving one request."""
+
+    __slots__ = ('count', 'total', 'slowest', 'slowest_statement', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+        # statement text -> executions; repeats point at N+1 patterns
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def most_repeated(self):
+        """(statement, executions) of the most repeated statement, or (None, 0)."""
+        if not self.statements:
+            return None, 0
+        statement = max(self.statements, key=self.statements.get)
+        return statement, self.statements[statement]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar('sql_profiler_stats', default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """QueryStats of the request being served, if profiling is active."""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, '_profiler_started', None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install(engine):
+    """Attach the profiler's listeners to an engine (AsyncEngine or Engine)."""
+    sync_engine = getattr(engine, 'sync_engine', engine)
+    if not event.contains(sync_engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class SQLProfilerMiddleware:
+    """ASGI middleware collecting QueryStats per request.
+
+    With `headers=True` (DEBUG) responses carry `X-DB-Query-Count`,
+    `X-DB-Time-Ms` and `X-DB-Slowest-Ms` (statements run before the
+    response started). Requests slower than `slow_ms` (event streams
+    excepted), or issuing at least `query_threshold` statements, are logged as one JSON line with the
+    slowest and most repeated statements, for a `sample_rate` share of them.
+    """
+
+    def __init__(
+        self,
+        app,
+        headers: bool = False,
+        slow_ms: float = 500.0,
+        query_threshold: int = 20,
+        sample_rate: float = 1.0,
+    ):
+        self.app = app
+        self.headers = headers
+        self.slow_ms = slow_ms
+        self.query_threshold = query_threshold
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_with_stats(message):
+            nonlocal status, streaming
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                streaming = any(
+                    name == b'content-type' and value.startswith(b'text/event-stream')
+                    for name, value in message.get('headers', ())
+                )
+                if self.headers:
+                    message.setdefault('headers', [])
+                    message['headers'] = list(message['headers']) + [
+                        (b'x-db-query-count', str(stats.count).encode()),
+                        (b'x-db-time-ms', f"{stats.total * 1000:.1f}".encode()),
+                        (b'x-db-slowest-ms', f"{stats.slowest * 1000:.1f}".encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            # Event streams are long-lived by design; only their queries count
+            slow = elapsed_ms >= self.slow_ms and not streaming
+            if (slow or stats.count >= self.query_threshold) and random.random() < self.sample_rate:
+                self._log(scope, status, elapsed_ms, stats)
+
+    def _log(self, scope, status: int, elapsed_ms: float, stats: QueryStats):
+        route = scope.get('route')
+        repeated, repeats = stats.most_repeated()
+        logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': scope['method'],
+            'route': getattr(route, 'path', None) or scope.get('path'),
+            'status': status,
+            'duration_ms': round(elapsed_ms, 1),
+            'query_count': stats.count,
+            'db_time_ms': round(stats.total * 1000, 1),
+            'slowest_ms': round(stats.slowest * 1000, 1),
+            'slowest_statement': (stats.slowest_statement or '')[:_MAX_STATEMENT_LOG],
+            'most_repeated_count': repeats,
+            'most_repeated_statement': (repeated or '')[:_MAX_STATEMENT_LOG],
+        }))
+
@@ -0,0 +1,306 @@
+"""Per-process Redis pub/sub multiplexer shared by every local subscriber."""
+import asyncio
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+from src.config.settings import settings
+from src.core.redis_manager import redis_manager
+from src.utils.logging import get_logger
+
+logger = get_logger("subscription_hub")
+
+# Delivered instead of messages a subscription may have missed: its queue
+# overflowed, or the shared connection dropped and was re-established.
+LAGGED = {'type': 'lagged', 'channel': None, 'pattern': None, 'data': None}
+
+# Queued by Subscription.close() to wake readers blocked on the queue
+_CLOSED = object()
+
+
+class Subscription:
+    """A local consumer of one or more channels/patterns.
+
+    Messages arrive as redis-py style dicts (`type`, `channel`, `pattern`,
+    `data`) with `channel`/`pattern` decoded to str and `data` left as sent.
+    The queue is bounded: when it is full the backlog is dropped and a
+    single `LAGGED` message takes its place, so a slow consumer never holds
+    up the shared connection or other subscribers.
+    """
+
+    def __init__(
+        self,
+        hub: "SubscriptionHub",
+        channels: Set[str],
+        patterns: Set[str],
+        queue_size: int,
+    ):
+        self._hub = hub
+        self.channels = channels
+        self.patterns = patterns
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def _put(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(LAGGED)
+            self._hub._stats['lagged'] += 1
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Wait for the next message.
+
+        Returns:
+            The message, or None if `timeout` elapsed first or the
+            subscription is closed
+        """
+        if self.closed:
+            return None
+        try:
+            if timeout is None:
+                message = await self.queue.get()
+            else:
+                message = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        if message is _CLOSED:
+            return None
+        return message
+
+    async def listen(self) -> AsyncIterator[dict]:
+        """Iterate over messages until the subscription is closed."""
+        while not self.closed:
+            message = await self.queue.get()
+            if message is _CLOSED:
+                return
+            yield message
+
+    async def close(self):
+        """Stop receiving messages (unsubscribes from Redis if no one else listens)."""
+        if not self.closed:
+            self.closed = True
+            # Pending messages are dropped; waiting readers get the sentinel
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSED)
+            await self._hub._remove(self)
+
+
+class SubscriptionHub:
+    """Holds one Redis pub/sub connection per process for all local subscribers.
+
+    Channels and patterns are subscribed in Redis once, however many local
+    subscriptions want them, and unsubscribed when the last one closes. If
+    the connection drops it is re-established with every channel and pattern
+    resubscribed, and each subscription receives `LAGGED`.
+    """
+
+    def __init__(self, default_queue_size: int = 1000):
+        """
+        Initialize subscription hub.
+
+        Args:
+            default_queue_size: Queue bound for subscriptions that do not set one
+        """
+        self.default_queue_size = default_queue_size
+        self._by_channel: Dict[str, Set[Subscription]] = {}
+        self._by_pattern: Dict[str, Set[Subscription]] = {}
+        self._pubsub = None
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            'received': 0,
+            'delivered': 0,
+            'lagged': 0,
+            'reconnects': 0,
+        }
+
+    async def subscribe(
+        self,
+        channels: Iterable[str] = (),
+        patterns: Iterable[str] = (),
+        queue_size: Optional[int] = None,
+    ) -> Subscription:
+        """
+        Subscribe to channels and/or glob-style patterns.
+
+        Returns:
+            A Subscription; call `close()` when done
+        """
+        sub = Subscription(
+            self, set(channels), set(patterns), queue_size or self.default_queue_size
+        )
+        new_channels = [c for c in sub.channels if c not in self._by_channel]
+        new_patterns = [p for p in sub.patterns if p not in self._by_pattern]
+        for channel in sub.channels:
+            self._by_channel.setdefault(channel, set()).add(sub)
+        for pattern in sub.patterns:
+            self._by_pattern.setdefault(pattern, set()).add(sub)
+
+        if self._task is None or self._task.done():
+            # The reader subscribes to everything registered when it connects
+            self._task = asyncio.create_task(self._run())
+        elif self._ready.is_set():
+            try:
+                if new_channels:
+                    await self._pubsub.subscribe(*new_channels)
+                if new_patterns:
+                    await self._pubsub.psubscribe(*new_patterns)
+            except Exception as e:
+                # The reader notices the broken connection and resubscribes all
+                logger.warning(f"Subscribe failed, will retry on reconnect: {e}")
+        return sub
+
+    async def _remove(self, sub: Subscription):
+        gone_channels = []
+        for channel in sub.channels:
+            subs = self._by_channel.get(channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._by_channel[channel]
+                    gone_channels.append(channel)
+        gone_patterns = []
+        for pattern in sub.patterns:
+            subs = self._by_pattern.get(pattern)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._by_pattern[pattern]
+                    gone_patterns.append(pattern)
+
+        if self._ready.is_set():
+            try:
+                if gone_channels:
+                    await self._pubsub.unsubscribe(*gone_channels)
+                if gone_patterns:
+                    await self._pubsub.punsubscribe(*gone_patterns)
+            except Exception as e:
+                logger.debug(f"Unsubscribe failed: {e}")
+
+    def _dispatch(self, message: dict):
+        kind = message.get('type')
+        if kind not in ('message', 'pmessage'):
+            return
+        self._stats['received'] += 1
+        channel = message.get('channel')
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        pattern = message.get('pattern')
+        if isinstance(pattern, bytes):
+            pattern = pattern.decode()
+        subs = self._by_pattern.get(pattern) if kind == 'pmessage' else self._by_channel.get(channel)
+        if not subs:
+            return
+        out = {'type': kind, 'channel': channel, 'pattern': pattern, 'data': message.get('data')}
+        for sub in tuple(subs):
+            sub._put(out)
+        self._stats['delivered'] += len(subs)
+
+    def _all_subscriptions(self) -> Set[Subscription]:
+        subs: Set[Subscription] = set()
+        for group in self._by_channel.values():
+            subs.update(group)
+        for group in self._by_pattern.values():
+            subs.update(group)
+        return subs
+
+    async def _run(self):
+        backoff = 1.0
+        connected_once = False
+        while self._by_channel or self._by_pattern:
+            pubsub = None
+            idle = False
+            try:
+                conn = await redis_manager.pool.get_connection()
+                pubsub = conn.pubsub()
+                channels: Set[str] = set()
+                patterns: Set[str] = set()
+                # Repeat until nothing was registered or closed while we were
+                # awaiting. No await separates the last check from setting
+                # _ready, after which subscribe() and _remove() talk to the
+                # connection themselves, so no change can fall in between.
+                while True:
+                    missing_channels = set(self._by_channel) - channels
+                    missing_patterns = set(self._by_pattern) - patterns
+                    stale_channels = channels - set(self._by_channel)
+                    stale_patterns = patterns - set(self._by_pattern)
+                    if not (missing_channels or missing_patterns or stale_channels or stale_patterns):
+                        break
+                    if missing_channels:
+                        await pubsub.subscribe(*missing_channels)
+                        channels |= missing_channels
+                    if missing_patterns:
+                        await pubsub.psubscribe(*missing_patterns)
+                        patterns |= missing_patterns
+                    if stale_channels:
+                        await pubsub.unsubscribe(*stale_channels)
+                        channels -= stale_channels
+                    if stale_patterns:
+                        await pubsub.punsubscribe(*stale_patterns)
+                        patterns -= stale_patterns
+                self._pubsub = pubsub
+                self._ready.set()
+                if connected_once:
+                    # Anything published while we were away is lost
+                    self._stats['reconnects'] += 1
+                    for sub in self._all_subscriptions():
+                        sub._put(LAGGED)
+                        self._stats['lagged'] += 1
+                connected_once = True
+                backoff = 1.0
+                logger.info(
+                    f"Pub/sub connected: {len(self._by_channel)} channels, {len(self._by_pattern)} patterns"
+                )
+                # Read until the last subscription closes, then release the
+                # connection; the outer loop ends the task unless someone
+                # subscribed again meanwhile.
+                while self._by_channel or self._by_pattern:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._dispatch(message)
+                idle = True
+                logger.info("Pub/sub idle: no subscriptions left, closing connection")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pub/sub connection failed, reconnecting in {backoff:.0f}s: {e}")
+            finally:
+                self._ready.clear()
+                self._pubsub = None
+                if pubsub is not None:
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+            if idle:
+                # A later subscriber starts fresh, not as a reconnect
+                connected_once = False
+                continue
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def close(self):
+        """Drop the shared connection (subscriptions stay registered)."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        """Get hub statistics."""
+        return {
+            **self._stats,
+            'connected': self._ready.is_set(),
+            'channels': len(self._by_channel),
+            'patterns': len(self._by_pattern),
+            'subscriptions': len(self._all_subscriptions()),
+        }
+
+
+# Global subscription hub instance
+subscription_hub = SubscriptionHub(default_queue_size=settings.pubsub_queue_size)
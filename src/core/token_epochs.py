@@ -0,0 +1,107 @@
+"""Per-user token epochs used to revoke stateless access tokens."""
+import asyncio
+from typing import Optional
+
+from src.core.redis_manager import redis_manager
+from src.utils.logging import get_logger
+
+logger = get_logger("token_epochs")
+
+# Never move an epoch backwards: a seed computed from an older row must not
+# overwrite the epoch written after a later revocation.
+_ADVANCE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+local epoch = tonumber(ARGV[1])
+if epoch > current then
+    redis.call('SET', KEYS[1], epoch)
+    return epoch
+end
+return current
+"""
+
+
+class TokenEpochStore:
+    """Caches each user's token epoch (`users.token_epoch`) in Redis.
+
+    Access tokens embed the epoch of the user row they were issued from
+    (`ep` claim). Revoking bumps the column in the same transaction as the
+    role/activation change, then advances the cached value, so every token
+    issued from an older row is rejected without a database lookup.
+
+    The database is the source of truth: a missing key means "unknown" and
+    callers must check the row, so losing the key cannot make a revoked
+    token valid again. Keys have no TTL; keep them on a Redis without an
+    evicting `maxmemory-policy` (or a `volatile-*` one) so the fast path
+    keeps working.
+    """
+
+    def __init__(self):
+        self._prefix = "token_epoch:"
+
+    async def current(self, user_id: int) -> Optional[int]:
+        """
+        Get the cached epoch for a user.
+
+        Returns:
+            The epoch, or None if it is not cached or Redis is unavailable
+        """
+        try:
+            conn = await redis_manager.pool.get_connection()
+            value = await conn.get(f"{self._prefix}{user_id}")
+            return int(value) if value is not None else None
+        except Exception as e:
+            logger.warning(f"Failed to read token epoch for user {user_id}: {e}")
+            return None
+
+    async def advance(self, user_id: int, epoch: int) -> bool:
+        """
+        Cache an epoch read from the user row, unless a newer one is cached.
+
+        Returns:
+            False if Redis is unavailable
+        """
+        try:
+            conn = await redis_manager.pool.get_connection()
+            await conn.register_script(_ADVANCE_SCRIPT)(
+                keys=[f"{self._prefix}{user_id}"], args=[int(epoch)]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to cache token epoch {epoch} for user {user_id}: {e}")
+            return False
+
+    async def forget(self, user_id: int) -> bool:
+        """
+        Drop the cached epoch so tokens are checked against the database.
+
+        Returns:
+            False if Redis is unavailable
+        """
+        try:
+            conn = await redis_manager.pool.get_connection()
+            await conn.delete(f"{self._prefix}{user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to drop token epoch for user {user_id}: {e}")
+            return False
+
+    async def publish(self, user_id: int, epoch: int, attempts: int = 3) -> bool:
+        """
+        Make a just-committed revocation visible to the fast path.
+
+        Advances the cached epoch, or failing that drops it (tokens are then
+        checked against the row), retrying with a short backoff.
+
+        Returns:
+            False if neither succeeded: old tokens may pass until a later bump
+        """
+        for attempt in range(attempts):
+            if await self.advance(user_id, epoch) or await self.forget(user_id):
+                return True
+            if attempt + 1 < attempts:
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        return False
+
+
+# Global token epoch store instance
+token_epochs = TokenEpochStore()
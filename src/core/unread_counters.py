@@ -0,0 +1,193 @@
+"""Per-user unread notification counters kept in Redis."""
+import asyncio
+from typing import Dict, List, Optional
+
+from src.config.settings import settings
+from src.core.concurrency_manager import concurrency_manager
+from src.core.redis_manager import redis_manager
+from src.utils.logging import get_logger
+
+logger = get_logger("unread_counters")
+
+# Adjust a counter only if it is already cached; never go below zero.
+# A missing key means "unknown" and is seeded from Postgres on next read.
+_ADJUST_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+    redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+    value = 0
+end
+return value
+"""
+
+
+class UnreadCounterStore:
+    """Caches `COUNT(*)` of unread notifications per user in Redis.
+
+    Writers adjust the counter after their transaction commits; readers seed
+    it from Postgres on a miss. Races between the two (a seed that misses a
+    concurrent insert or read) can leave a counter slightly off, so a
+    background task periodically recomputes every cached counter from
+    Postgres; a Redis lock keeps a single process doing it.
+    """
+
+    def __init__(self, ttl: int = 86400, reconcile_interval: float = 300.0):
+        """
+        Initialize unread counter store.
+
+        Args:
+            ttl: Seconds a counter stays cached (refreshed on every seed)
+            reconcile_interval: Seconds between reconciliation passes
+        """
+        self.ttl = ttl
+        self.reconcile_interval = reconcile_interval
+        self._prefix = "notif:unread:"
+        self._task: Optional[asyncio.Task] = None
+
+    def _key(self, user_id: int) -> str:
+        return f"{self._prefix}{user_id}"
+
+    async def get(self, user_id: int) -> Optional[int]:
+        """
+        Get a cached unread count.
+
+        Returns:
+            The count, or None on a cache miss or if Redis is unavailable
+        """
+        try:
+            conn = await redis_manager.pool.get_connection()
+            value = await conn.get(self._key(user_id))
+            return int(value) if value is not None else None
+        except Exception as e:
+            logger.warning(f"Failed to read unread counter for user {user_id}: {e}")
+            return None
+
+    async def seed(self, user_id: int, count: int):
+        """Cache a count computed from Postgres, unless a writer got there first."""
+        try:
+            conn = await redis_manager.pool.get_connection()
+            await conn.set(self._key(user_id), int(count), ex=self.ttl, nx=True)
+        except Exception as e:
+            logger.warning(f"Failed to seed unread counter for user {user_id}: {e}")
+
+    async def adjust_many(self, deltas: Dict[int, int]) -> Dict[int, Optional[int]]:
+        """
+        Apply per-user deltas to cached counters in one pipeline.
+
+        Returns:
+            New count per user, None where the counter is not cached
+        """
+        deltas = {uid: delta for uid, delta in deltas.items() if delta}
+        if not deltas:
+            return {}
+        try:
+            conn = await redis_manager.pool.get_connection()
+            # EVALSHA; the pipeline loads the script first if Redis lacks it
+            adjust = conn.register_script(_ADJUST_IF_EXISTS)
+            async with conn.pipeline(transaction=False) as pipe:
+                for user_id, delta in deltas.items():
+                    await adjust(keys=[self._key(user_id)], args=[int(delta)], client=pipe)
+                results = await pipe.execute()
+            return {
+                user_id: int(value) if value is not None else None
+                for user_id, value in zip(deltas, results)
+            }
+        except Exception as e:
+            # Stale counters are fixed by the next reconciliation pass
+            logger.warning(f"Failed to adjust unread counters for {len(deltas)} users: {e}")
+            return dict.fromkeys(deltas)
+
+    async def adjust(self, user_id: int, delta: int) -> Optional[int]:
+        """Apply a delta to one cached counter; returns the new count if cached."""
+        return (await self.adjust_many({user_id: delta})).get(user_id)
+
+    async def reset(self, user_id: int):
+        """Set a user's counter to zero (after mark-all-read)."""
+        try:
+            conn = await redis_manager.pool.get_connection()
+            await conn.set(self._key(user_id), 0, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to reset unread counter for user {user_id}: {e}")
+
+    async def _cached_user_ids(self) -> List[int]:
+        conn = await redis_manager.pool.get_connection()
+        user_ids = []
+        async for key in conn.scan_iter(match=f"{self._prefix}*", count=1000):
+            if isinstance(key, bytes):
+                key = key.decode()
+            try:
+                user_ids.append(int(key[len(self._prefix):]))
+            except ValueError:
+                continue
+        return user_ids
+
+    async def reconcile(self, batch_size: int = 1000) -> int:
+        """
+        Recompute every cached counter from Postgres.
+
+        Returns:
+            Number of counters rewritten
+        """
+        # Imported lazily: the repository layer depends on this module
+        from src.db.repos import NotificationRepo
+
+        repo = NotificationRepo()
+        user_ids = await self._cached_user_ids()
+        conn = await redis_manager.pool.get_connection()
+        fixed = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            counts = await repo.count_unread_many(batch)
+            async with conn.pipeline(transaction=False) as pipe:
+                for user_id in batch:
+                    # xx: keys that expired meanwhile are left to be reseeded on read
+                    pipe.set(self._key(user_id), counts.get(user_id, 0), xx=True, keepttl=True)
+                results = await pipe.execute()
+            fixed += sum(1 for r in results if r)
+        return fixed
+
+    def start(self):
+        """Start periodic reconciliation in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic reconciliation."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                fixed = await self._reconcile_locked()
+                if fixed is not None:
+                    logger.debug(f"Reconciled {fixed} unread counters")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unread counter reconciliation failed: {e}")
+
+    async def _reconcile_locked(self) -> Optional[int]:
+        """Reconcile unless another process holds the lock; None if skipped."""
+        lock = concurrency_manager.get_lock(
+            "unread_counters_reconcile", timeout=60, auto_renew=True
+        )
+        if not await lock.acquire(wait=False):
+            return None
+        try:
+            return await self.reconcile()
+        finally:
+            await lock.release()
+
+
+# Global unread counter store instance
+unread_counters = UnreadCounterStore(
+    ttl=settings.notification_unread_ttl,
+    reconcile_interval=settings.notification_unread_reconcile_interval,
+)
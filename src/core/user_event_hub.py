@@ -0,0 +1,145 @@
+"""Per-process fan-out of per-user Redis events to streaming clients."""
+import asyncio
+from typing import Dict, Optional, Set
+
+from src.config.settings import settings
+from src.core.codecs import decode
+from src.core.event_dispatcher import USER_EVENTS_PREFIX
+from src.core.subscription_hub import LAGGED, subscription_hub
+from src.utils.logging import get_logger
+
+logger = get_logger("user_event_hub")
+
+# Sent to a client whose queue overflowed or after the hub lagged or reconnected:
+# events may have been lost, so the client should refetch its state.
+RESYNC_EVENT = {'type': 'resync', 'payload': {}}
+
+
+class ClientLimitError(Exception):
+    """Raised when a process already serves its maximum number of streams."""
+
+
+class UserEventHub:
+    """One `user_events:*` pattern subscription per process, fanned out to local clients.
+
+    Each connected client owns a small bounded queue; the reader task only
+    does a dict lookup and `put_nowait` per message, so idle connections
+    cost a queue and nothing else. A client that falls behind gets its
+    queue cleared and a single `resync` event instead of blocking the reader.
+    """
+
+    def __init__(self, queue_size: int = 100, max_clients: int = 50000):
+        """
+        Initialize user event hub.
+
+        Args:
+            queue_size: Pending events buffered per client
+            max_clients: Concurrent clients allowed in this process
+        """
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self._clients: Dict[int, Set[asyncio.Queue]] = {}
+        self._client_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            'received': 0,
+            'delivered': 0,
+            'overflows': 0,
+            'resyncs': 0,
+        }
+
+    def has_capacity(self) -> bool:
+        """Whether another client can connect now (does not reserve a slot)."""
+        return self._client_count < self.max_clients
+
+    def connect(self, user_id: int) -> asyncio.Queue:
+        """Register a client and return the queue its events arrive on."""
+        if not self.has_capacity():
+            raise ClientLimitError(f"Event stream limit reached ({self.max_clients})")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._clients.setdefault(user_id, set()).add(queue)
+        self._client_count += 1
+        self._ensure_reader()
+        return queue
+
+    def disconnect(self, user_id: int, queue: asyncio.Queue):
+        """Unregister a client."""
+        queues = self._clients.get(user_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        self._client_count -= 1
+        if not queues:
+            del self._clients[user_id]
+
+    def _ensure_reader(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _deliver(self, queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+            self._stats['delivered'] += 1
+        except asyncio.QueueFull:
+            self._stats['overflows'] += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+
+    def _dispatch(self, channel, data):
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        try:
+            user_id = int(channel[len(USER_EVENTS_PREFIX):])
+        except ValueError:
+            return
+        queues = self._clients.get(user_id)
+        if not queues:
+            return
+        try:
+            event = decode(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Dropping malformed event on {channel}")
+            return
+        for queue in tuple(queues):
+            self._deliver(queue, event)
+
+    async def _run(self):
+        # Reconnects are handled by the shared hub, which reports them (and
+        # its own queue overflowing) as LAGGED
+        sub = await subscription_hub.subscribe(patterns=[f"{USER_EVENTS_PREFIX}*"])
+        logger.info("Subscribed to per-user event channels")
+        try:
+            async for message in sub.listen():
+                if message is LAGGED:
+                    self._stats['resyncs'] += 1
+                    for queues in self._clients.values():
+                        for queue in queues:
+                            self._deliver(queue, RESYNC_EVENT)
+                    continue
+                self._stats['received'] += 1
+                self._dispatch(message['channel'], message['data'])
+        finally:
+            await sub.close()
+
+    async def close(self):
+        """Stop the shared subscription."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        """Get hub statistics."""
+        return {
+            **self._stats,
+            'clients': self._client_count,
+            'users': len(self._clients),
+        }
+
+
+# Global user event hub instance
+user_event_hub = UserEventHub(
+    queue_size=settings.notification_stream_queue_size,
+    max_clients=settings.notification_stream_max_clients,
+)
@@ -0,0 +1,120 @@
+"""Bounded executor pools for CPU-bound work called from async handlers."""
+import asyncio
+import functools
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.utils.logging import get_logger
+
+logger = get_logger("worker_pool")
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool already has `max_pending` calls queued or running."""
+
+
+def _call_soon_threadsafe(loop: asyncio.AbstractEventLoop, callback: Callable[..., Any], *args: Any):
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        # Loop already closed (shutdown): nothing left to account for
+        pass
+
+
+class BoundedWorkerPool:
+    """Runs blocking callables off the event loop with a queue-depth limit.
+
+    Callers are rejected immediately once the pool is saturated instead of
+    queueing without bound, so the API can shed load with a 503.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        kind: str = "thread",
+    ):
+        """
+        Initialize worker pool.
+
+        Args:
+            name: Pool name used in logs and stats
+            max_workers: Number of worker threads/processes
+            max_pending: Maximum calls queued or running before rejecting
+            kind: "thread" or "process"; process pools need picklable,
+                module-level callables
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'rejected': 0,
+            'total_run_time': 0.0,
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"{self.name}-worker",
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run `fn(*args, **kwargs)` in the pool.
+
+        Raises:
+            PoolSaturatedError: If `max_pending` calls are already in flight
+        """
+        if self._pending >= self.max_pending:
+            self._stats['rejected'] += 1
+            logger.warning(f"Worker pool {self.name} saturated ({self._pending} pending)")
+            raise PoolSaturatedError(f"Worker pool {self.name} is saturated")
+
+        self._pending += 1
+        self._stats['submitted'] += 1
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(functools.partial(fn, *args, **kwargs))
+        # Released when the call really ends (or is cancelled before it
+        # started), not when the caller stops waiting: a cancelled request
+        # must not free a slot while its worker is still busy.
+        future.add_done_callback(
+            lambda _: _call_soon_threadsafe(loop, self._release, started)
+        )
+        return await asyncio.wrap_future(future)
+
+    def _release(self, started: float):
+        self._pending -= 1
+        self._stats['completed'] += 1
+        self._stats['total_run_time'] += time.perf_counter() - started
+
+    def get_stats(self) -> dict:
+        """Get pool statistics."""
+        return {
+            **self._stats,
+            'name': self.name,
+            'kind': self.kind,
+            'pending': self._pending,
+            'max_pending': self.max_pending,
+            'max_workers': self.max_workers,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the underlying executor."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
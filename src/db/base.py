@@ -1,7 +1,34 @@
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config.settings import settings
+from src.core.metrics import registry
 import os
+import time
+
+
+db_pool_checkout = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time to check a connection out of the SQLAlchemy pool (queue wait, connect, pre-ping)",
+)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout time and timeouts."""
+
+    timeouts = 0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            db_pool_checkout.observe(time.perf_counter() - started)
+
 
 # Configure connection pool for better concurrency
 # pool_size: number of connections to maintain persistently
@@ -21,6 +48,7 @@ engine = create_async_engine(
     pool_timeout=pool_timeout,
     pool_recycle=pool_recycle,
     pool_pre_ping=True,  # Verify connections before using them
+    poolclass=TimedAsyncAdaptedQueuePool,
 )
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
@@ -0,0 +1,48 @@
+"""
+Migration script to create the admin_counters table and backfill it.
+Run once before setting ADMIN_COUNTERS_ENABLED=true; re-running it
+resynchronizes the counters with the source tables.
+"""
+import asyncio
+from sqlalchemy import text
+from src.db.base import engine
+from src.utils.logging import get_logger
+
+logger = get_logger("migration")
+
+
+async def migrate_add_admin_counters():
+    async with engine.begin() as conn:
+        logger.info("Ensuring admin_counters table exists...")
+        await conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS admin_counters (
+                    key VARCHAR(64) PRIMARY KEY,
+                    value DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMPTZ DEFAULT NOW()
+                );
+                """
+            )
+        )
+
+        logger.info("Backfilling total_users and total_revenue...")
+        await conn.execute(
+            text(
+                """
+                INSERT INTO admin_counters (key, value, updated_at)
+                SELECT 'total_users', COUNT(*), NOW() FROM users
+                UNION ALL
+                SELECT 'total_revenue', COALESCE(SUM(amount), 0), NOW()
+                FROM payments WHERE status = 'paid'
+                ON CONFLICT (key) DO UPDATE
+                SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at;
+                """
+            )
+        )
+
+        logger.info("✅ Migration completed: admin_counters table in place.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_add_admin_counters())
@@ -0,0 +1,54 @@
+"""
+Migration script to create the broadcast_jobs table processed by the
+broadcast worker (src/core/broadcast_worker.py).
+"""
+import asyncio
+from sqlalchemy import text
+from src.db.base import engine
+from src.utils.logging import get_logger
+
+logger = get_logger("migration")
+
+
+async def migrate_add_broadcast_jobs():
+    async with engine.begin() as conn:
+        logger.info("Ensuring broadcast_jobs table exists...")
+        await conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS broadcast_jobs (
+                    id SERIAL PRIMARY KEY,
+                    created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+                    type VARCHAR(50) NOT NULL,
+                    title VARCHAR(255) NOT NULL,
+                    message TEXT NOT NULL,
+                    link VARCHAR(512),
+                    send_to_all BOOLEAN NOT NULL DEFAULT false,
+                    user_ids JSON,
+                    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                    cursor INTEGER NOT NULL DEFAULT 0,
+                    total INTEGER,
+                    processed INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    chunk_attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TIMESTAMPTZ DEFAULT NOW(),
+                    started_at TIMESTAMPTZ,
+                    finished_at TIMESTAMPTZ,
+                    updated_at TIMESTAMPTZ DEFAULT NOW()
+                );
+                """
+            )
+        )
+        await conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_broadcast_jobs_status "
+                "ON broadcast_jobs (status);"
+            )
+        )
+
+        logger.info("✅ Migration completed: broadcast_jobs table in place.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_add_broadcast_jobs())
@@ -0,0 +1,40 @@
+"""
+Migration script to add the notification listing and unread indexes.
+Indexes are built CONCURRENTLY so the notifications table stays writable;
+the script therefore runs outside a transaction and is safe to re-run.
+"""
+import asyncio
+from sqlalchemy import text
+from src.db.base import engine
+from src.utils.logging import get_logger
+
+logger = get_logger("migration")
+
+INDEXES = {
+    # Unread counts and mark-all-read
+    "ix_notifications_user_id_is_read": "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_user_id_is_read "
+                                        "ON notifications (user_id, is_read)",
+    # Keyset pagination on (created_at, id) per user, newest first
+    "ix_notifications_user_created_id": "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_user_created_id "
+                                        "ON notifications (user_id, created_at DESC, id DESC) INCLUDE (is_read)",
+    # Retention job: expired rows per type, oldest first
+    "ix_notifications_type_created_at": "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notifications_type_created_at "
+                                        "ON notifications (type, created_at)",
+}
+
+
+async def migrate_add_notification_indexes():
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        for name, ddl in INDEXES.items():
+            logger.info(f"Creating index {name}...")
+            await conn.execute(text(ddl))
+
+        await conn.execute(text("ANALYZE notifications;"))
+
+        logger.info("✅ Migration completed: notification indexes in place.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_add_notification_indexes())
@@ -0,0 +1,51 @@
+"""
+Migration script to create the notifications_archive table used by the
+notification retention job. Also run migrate_add_notification_indexes.py,
+which adds the (type, created_at) index the job scans.
+"""
+import asyncio
+from sqlalchemy import text
+from src.db.base import engine
+from src.utils.logging import get_logger
+
+logger = get_logger("migration")
+
+
+async def migrate_add_notifications_archive():
+    async with engine.begin() as conn:
+        logger.info("Ensuring notifications_archive table exists...")
+        await conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS notifications_archive (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                    type VARCHAR(50) NOT NULL,
+                    title VARCHAR(255) NOT NULL,
+                    message TEXT NOT NULL,
+                    link VARCHAR(512),
+                    is_read BOOLEAN NOT NULL DEFAULT false,
+                    created_at TIMESTAMPTZ,
+                    archived_at TIMESTAMPTZ DEFAULT NOW()
+                );
+                """
+            )
+        )
+        await conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_notifications_archive_user_id "
+                "ON notifications_archive (user_id);"
+            )
+        )
+        await conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_notifications_archive_archived_at "
+                "ON notifications_archive (archived_at);"
+            )
+        )
+
+        logger.info("✅ Migration completed: notifications_archive table in place.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_add_notifications_archive())
@@ -0,0 +1,45 @@
+"""
+Migration script to add trigram search and keyset pagination indexes on users.
+Indexes are built CONCURRENTLY so the users table stays writable; the
+script therefore runs outside a transaction and is safe to re-run.
+"""
+import asyncio
+from sqlalchemy import text
+from src.db.base import engine
+from src.utils.logging import get_logger
+
+logger = get_logger("migration")
+
+INDEXES = {
+    # ILIKE '%term%' on each searchable column (admin_api.list_users)
+    "ix_users_email_trgm": "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_trgm "
+                           "ON users USING gin (email gin_trgm_ops)",
+    "ix_users_phone_number_trgm": "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_phone_number_trgm "
+                                  "ON users USING gin (phone_number gin_trgm_ops)",
+    "ix_users_full_name_trgm": "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_full_name_trgm "
+                               "ON users USING gin (full_name gin_trgm_ops)",
+    # Keyset pagination on (created_at, id), newest first
+    "ix_users_created_at_id": "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id "
+                              "ON users (created_at DESC, id DESC)",
+}
+
+
+async def migrate_add_user_search_indexes():
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        logger.info("Ensuring pg_trgm extension exists...")
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+
+        for name, ddl in INDEXES.items():
+            logger.info(f"Creating index {name}...")
+            await conn.execute(text(ddl))
+
+        # Refresh planner statistics (also used for estimated list totals)
+        await conn.execute(text("ANALYZE users;"))
+
+        logger.info("✅ Migration completed: user search indexes in place.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_add_user_search_indexes())
@@ -0,0 +1,57 @@
+"""
+Migration script to add the token_epoch column to the users table.
+Epochs previously kept only in Redis (token_epoch:<user_id>) are copied
+into it, so tokens revoked before the upgrade stay revoked.
+"""
+import asyncio
+from sqlalchemy import text
+from src.core.redis_manager import redis_manager
+from src.db.base import engine
+from src.utils.logging import get_logger
+
+logger = get_logger("migration")
+
+_PREFIX = "token_epoch:"
+
+
+async def _redis_epochs():
+    epochs = []
+    try:
+        conn = await redis_manager.pool.get_connection()
+        async for key in conn.scan_iter(match=f"{_PREFIX}*", count=1000):
+            if isinstance(key, bytes):
+                key = key.decode()
+            value = await conn.get(key)
+            try:
+                epochs.append({"user_id": int(key[len(_PREFIX):]), "epoch": int(value)})
+            except (TypeError, ValueError):
+                continue
+    except Exception as e:
+        logger.warning(f"Could not read token epochs from Redis, nothing to copy: {e}")
+    return epochs
+
+
+async def migrate_add_user_token_epoch():
+    epochs = await _redis_epochs()
+    async with engine.begin() as conn:
+        logger.info("Adding token_epoch column to users table...")
+        await conn.execute(
+            text(
+                "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_epoch INTEGER NOT NULL DEFAULT 0;"
+            )
+        )
+        if epochs:
+            logger.info(f"Copying {len(epochs)} token epochs from Redis...")
+            await conn.execute(
+                text(
+                    "UPDATE users SET token_epoch = GREATEST(token_epoch, :epoch) "
+                    "WHERE id = :user_id;"
+                ),
+                epochs,
+            )
+
+        logger.info("✅ Migration completed: users.token_epoch in place.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_add_user_token_epoch())
@@ -8,11 +8,12 @@ from sqlalchemy import (
     DateTime,
     Text,
     Boolean,
+    Index,
     UniqueConstraint,
     ForeignKey,
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from .base import Base
 
 
@@ -32,6 +33,8 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     # roles: "user", "admin", "super_admin"
     role = Column(String, nullable=False, default="user", index=True)
+    # Bumped to revoke every access token issued before (the `ep` claim)
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
     # Telegram notification settings
     telegram_enabled = Column(Boolean, default=False, nullable=False)
     telegram_bot_token = Column(String(512), nullable=True)  # User's Telegram bot token
@@ -141,6 +144,18 @@ class ConfigKV(Base):
     value = Column(Text, nullable=True)
 
 
+class AdminCounter(Base):
+    """Incrementally maintained KPI counters (e.g. total_users, total_revenue)."""
+
+    __tablename__ = "admin_counters"
+
+    key = Column(String(64), primary_key=True)
+    value = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
 class Notification(Base):
     """In-app notifications (can also be mirrored to web push)."""
 
@@ -157,6 +172,39 @@ class Notification(Base):
 
     user = relationship("User", backref="notifications", foreign_keys=[user_id])
 
+    __table_args__ = (
+        # Unread counts and mark-all-read filter on both columns
+        Index("ix_notifications_user_id_is_read", "user_id", "is_read"),
+        # Keyset listing: seek + ordered scan per user; is_read included so
+        # unread_only filters without visiting the heap
+        Index(
+            "ix_notifications_user_created_id",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_include=["is_read"],
+        ),
+        # Retention job scans expired rows oldest first
+        Index("ix_notifications_type_created_at", "type", "created_at"),
+    )
+
+
+class NotificationArchive(Base):
+    """Notifications moved out of `notifications` by the retention job."""
+
+    __tablename__ = "notifications_archive"
+
+    # Same id as the original notification row
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    type = Column(String(50), nullable=False)
+    title = Column(String(255), nullable=False)
+    message = Column(Text, nullable=False)
+    link = Column(String(512), nullable=True)
+    is_read = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
 
 class PushSubscription(Base):
     """Web Push subscription per user/browser."""
@@ -174,3 +222,32 @@ class PushSubscription(Base):
     user = relationship("User", backref="push_subscriptions", foreign_keys=[user_id])
 
 
+class BroadcastJob(Base):
+    """Admin broadcast notification processed in chunks by BroadcastWorker."""
+
+    __tablename__ = "broadcast_jobs"
+
+    id = Column(Integer, primary_key=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    type = Column(String(50), nullable=False)
+    title = Column(String(255), nullable=False)
+    message = Column(Text, nullable=False)
+    link = Column(String(512), nullable=True)
+    send_to_all = Column(Boolean, nullable=False, default=False)
+    # Explicit recipients (sorted) when send_to_all is false
+    user_ids = Column(JSON, nullable=True)
+    # pending, running, completed, failed
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    # Highest user id already handled; chunks resume after it
+    cursor = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    chunk_attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
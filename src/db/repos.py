@@ -1,13 +1,75 @@
-import asyncio
+import base64
+from datetime import datetime
 
 from .base import AsyncSessionLocal
 from .models import (
+    AdminCounter,
+    BroadcastJob,
     ConfigKV,
     Notification,
     PushSubscription,
+    User,
 )
-from sqlalchemy import select, func
-from typing import List, Optional
+from sqlalchemy import delete, insert, select, update, func, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.config.settings import settings
+from src.core.event_dispatcher import EventDispatcher
+from src.core.unread_counters import unread_counters
+
+
+def encode_keyset_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a `(created_at, id)` keyset position as an opaque URL-safe token."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a token from `encode_keyset_cursor` (raises ValueError if malformed)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at_raw, row_id = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at_raw), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _notification_event(
+    notif_id: int,
+    created_at: Optional[datetime],
+    type: str,
+    title: str,
+    message: str,
+    link: Optional[str],
+) -> dict:
+    """Stream event payload for a new notification (same fields as NotificationOut)."""
+    return {
+        "id": notif_id,
+        "type": type,
+        "title": title,
+        "message": message,
+        "link": link,
+        "is_read": False,
+        "created_at": created_at.isoformat() if created_at else "",
+    }
+
+
+class CreatedNotification(NamedTuple):
+    """What `NotificationRepo.bulk_create` returns per inserted row."""
+
+    id: int
+    user_id: int
+    created_at: datetime
+
+
+# asyncpg caps a statement at 32767 bind parameters; each row binds 6
+_MAX_NOTIFICATION_BATCH = 32767 // 6
+
+
+def _notification_batch_size() -> int:
+    return max(1, min(settings.notification_bulk_batch_size, _MAX_NOTIFICATION_BATCH))
 
 
 class ConfigRepo:
@@ -28,7 +90,159 @@ class ConfigRepo:
             await session.commit()
 
 
+class AdminCounterRepo:
+    """O(1) KPI counters maintained in the same transaction as the write."""
+
+    TOTAL_USERS = "total_users"
+    TOTAL_REVENUE = "total_revenue"
+
+    @property
+    def enabled(self) -> bool:
+        return settings.admin_counters_enabled
+
+    async def increment(self, session: AsyncSession, key: str, delta: float = 1) -> None:
+        """Add `delta` to a counter inside the caller's transaction (no-op if disabled)."""
+        if not self.enabled:
+            return
+        stmt = pg_insert(AdminCounter).values(key=key, value=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AdminCounter.key],
+            set_={"value": AdminCounter.value + stmt.excluded.value},
+        )
+        await session.execute(stmt)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, float]:
+        async with AsyncSessionLocal() as session:
+            q = await session.execute(
+                select(AdminCounter.key, AdminCounter.value).where(AdminCounter.key.in_(keys))
+            )
+            return {row.key: float(row.value) for row in q.all()}
+
+
+class UserRepo:
+    """Admin user search.
+
+    Substring filters use ILIKE '%term%', which the pg_trgm GIN indexes from
+    migrate_add_user_search_indexes.py serve directly (terms of 3+ chars).
+    """
+
+    # Columns needed by admin listings; no ORM identity-map overhead
+    LIST_COLUMNS = (
+        User.id,
+        User.email,
+        User.phone_number,
+        User.full_name,
+        User.role,
+        User.is_active,
+        User.created_at,
+    )
+
+    def _filtered(self, query, search: Optional[str], is_active: Optional[bool], role: Optional[str]):
+        if search:
+            like = f"%{search}%"
+            query = query.where(
+                (User.email.ilike(like))
+                | (User.phone_number.ilike(like))
+                | (User.full_name.ilike(like))
+            )
+        if is_active is not None:
+            query = query.where(User.is_active.is_(is_active))
+        if role:
+            query = query.where(User.role == role)
+        return query
+
+    async def search(
+        self,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        role: Optional[str] = None,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+        count: str = "estimated",
+    ) -> Dict[str, Any]:
+        """
+        Search users newest first, paginated on `(created_at, id)`.
+
+        Args:
+            cursor: Token from a previous page's `next_cursor`; takes precedence over `skip`
+            skip: Legacy OFFSET pagination, only used without a cursor
+            count: "exact", "estimated" (planner statistics, or an exact count
+                capped at `admin_user_count_cap` when filtering) or "none"
+
+        Returns:
+            Dict with `rows`, `next_cursor`, `total` and `total_is_estimate`
+        """
+        query = self._filtered(select(*self.LIST_COLUMNS), search, is_active, role)
+        if cursor:
+            created_at, row_id = decode_keyset_cursor(cursor)
+            query = query.where(tuple_(User.created_at, User.id) < (created_at, row_id))
+        elif skip:
+            query = query.offset(skip)
+        query = query.order_by(User.created_at.desc(), User.id.desc()).limit(limit)
+
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(query)).all()
+            total, is_estimate = await self._count(session, search, is_active, role, count)
+
+        next_cursor = None
+        if len(rows) == limit and rows[-1].created_at is not None:
+            next_cursor = encode_keyset_cursor(rows[-1].created_at, rows[-1].id)
+        return {
+            "rows": rows,
+            "next_cursor": next_cursor,
+            "total": total,
+            "total_is_estimate": is_estimate,
+        }
+
+    async def _count(
+        self,
+        session: AsyncSession,
+        search: Optional[str],
+        is_active: Optional[bool],
+        role: Optional[str],
+        mode: str,
+    ) -> Tuple[Optional[int], bool]:
+        if mode == "none":
+            return None, False
+
+        filtered = bool(search) or is_active is not None or bool(role)
+        if mode == "estimated" and not filtered:
+            q = await session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+            )
+            estimate = q.scalar()
+            # reltuples is -1 (or 0) until the table has been analyzed
+            if estimate is not None and estimate > 0:
+                return int(estimate), True
+
+        base = self._filtered(select(User.id), search, is_active, role)
+        if mode == "estimated":
+            cap = settings.admin_user_count_cap
+            q = await session.execute(
+                select(func.count()).select_from(base.limit(cap + 1).subquery())
+            )
+            total = int(q.scalar() or 0)
+            if total > cap:
+                return cap, True
+            return total, False
+
+        q = await session.execute(select(func.count()).select_from(base.subquery()))
+        return int(q.scalar() or 0), False
+
+
 class NotificationRepo:
+    # Everything NotificationOut needs (slim listing)
+    LIST_COLUMNS = (
+        Notification.id,
+        Notification.type,
+        Notification.title,
+        Notification.message,
+        Notification.link,
+        Notification.is_read,
+        Notification.created_at,
+    )
+
     async def create(
         self,
         user_id: int,
@@ -49,6 +263,14 @@ class NotificationRepo:
             await session.commit()
             await session.refresh(notif)
 
+        unread = await unread_counters.adjust(user_id, 1)
+        await EventDispatcher.publish_to_user(
+            user_id,
+            "notification",
+            {**_notification_event(notif.id, notif.created_at, type, title, message, link),
+             "unread_count": unread},
+        )
+
         # بعد از ذخیره در دیتابیس، تلاش برای ارسال وب‌پوش (بدون شکست زدن تراکنش)
         try:
             from src.integrations.webpush import maybe_send_webpush_for_notification
@@ -60,6 +282,42 @@ class NotificationRepo:
 
         return notif
 
+    async def insert_many(
+        self,
+        session: AsyncSession,
+        user_ids: List[int],
+        type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+    ) -> List[CreatedNotification]:
+        """Insert one notification per user inside the caller's transaction.
+
+        Rows go out as chunked multi-row `INSERT ... RETURNING` statements;
+        only `(id, user_id, created_at)` comes back, with no ORM refresh.
+        """
+        created: List[CreatedNotification] = []
+        batch_size = _notification_batch_size()
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            q = await session.execute(
+                insert(Notification)
+                .values([
+                    {
+                        "user_id": uid,
+                        "type": type,
+                        "title": title,
+                        "message": message,
+                        "link": link,
+                        "is_read": False,
+                    }
+                    for uid in chunk
+                ])
+                .returning(Notification.id, Notification.user_id, Notification.created_at)
+            )
+            created.extend(CreatedNotification(*row) for row in q.all())
+        return created
+
     async def bulk_create(
         self,
         user_ids: list[int],
@@ -67,7 +325,8 @@ class NotificationRepo:
         title: str,
         message: str,
         link: Optional[str] = None,
-    ) -> List[Notification]:
+        send_push: bool = True,
+    ) -> List[CreatedNotification]:
         """Create notifications for multiple users in one transaction."""
         if not user_ids:
             return []
@@ -77,45 +336,99 @@ class NotificationRepo:
             return []
 
         async with AsyncSessionLocal() as session:
-            notifs = [
-                Notification(
-                    user_id=uid,
-                    type=type,
-                    title=title,
-                    message=message,
-                    link=link,
-                )
-                for uid in unique_ids
-            ]
-            session.add_all(notifs)
+            created = await self.insert_many(session, unique_ids, type, title, message, link)
             await session.commit()
-            for n in notifs:
-                await session.refresh(n)
 
+        await self.announce_created(created, type, title, message, link)
+        if send_push:
+            await self.send_push(created, type, title, message, link)
+        return created
+
+    async def announce_created(
+        self,
+        created: List[CreatedNotification],
+        type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+    ) -> None:
+        """Bump unread counters and publish stream events for committed notifications.
+
+        Both go out as one Redis pipeline each, however many rows were created.
+        """
+        deltas: Dict[int, int] = {}
+        for c in created:
+            deltas[c.user_id] = deltas.get(c.user_id, 0) + 1
+        unread = await unread_counters.adjust_many(deltas)
+        await EventDispatcher.publish_to_users(
+            (
+                c.user_id,
+                "notification",
+                {**_notification_event(c.id, c.created_at, type, title, message, link),
+                 "unread_count": unread.get(c.user_id)},
+            )
+            for c in created
+        )
+
+    async def send_push(
+        self,
+        created: List[CreatedNotification],
+        type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+    ) -> None:
+        """Mirror freshly created notifications to web push (never raises)."""
         # ارسال وب‌پوش پس از کامیت تا مسیر اصلی کند نشود
         try:
-            from src.integrations.webpush import maybe_send_webpush_for_notification
+            from src.integrations.webpush import build_push_payload, push_engine
 
-            await asyncio.gather(
-                *[maybe_send_webpush_for_notification(n) for n in notifs]
-            )
+            payload = build_push_payload(title=title, message=message, link=link, type=type)
+            await push_engine.deliver([(c.user_id, payload) for c in created])
         except Exception:
             pass
 
-        return notifs
-
     async def list_for_user(
-        self, user_id: int, limit: int = 50, offset: int = 0, unread_only: bool = False
-    ) -> List[Notification]:
+        self,
+        user_id: int,
+        limit: int = 50,
+        offset: int = 0,
+        unread_only: bool = False,
+        cursor: Optional[str] = None,
+        slim: bool = False,
+    ) -> List[Any]:
+        """
+        List a user's notifications newest first, ordered by `(created_at, id)`.
+
+        Args:
+            offset: Legacy OFFSET pagination, only used without a cursor
+            cursor: `encode_keyset_cursor` token of the last row of the
+                previous page (raises ValueError if malformed)
+            slim: Return plain rows of `LIST_COLUMNS` instead of ORM objects
+
+        Returns:
+            Notification objects, or rows with the same attribute names
+        """
+        query = select(*self.LIST_COLUMNS) if slim else select(Notification)
+        query = query.where(Notification.user_id == user_id)
+        if unread_only:
+            query = query.where(Notification.is_read == False)  # noqa: E712
+        if cursor:
+            created_at, row_id = decode_keyset_cursor(cursor)
+            query = query.where(tuple_(Notification.created_at, Notification.id) < (created_at, row_id))
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit)
+
         async with AsyncSessionLocal() as session:
-            query = select(Notification).where(Notification.user_id == user_id)
-            if unread_only:
-                query = query.where(Notification.is_read == False)  # noqa: E712
-            query = query.order_by(Notification.created_at.desc()).limit(limit).offset(offset)
             q = await session.execute(query)
-            return list(q.scalars().all())
+            return list(q.all() if slim else q.scalars().all())
 
     async def count_unread(self, user_id: int) -> int:
+        cached = await unread_counters.get(user_id)
+        if cached is not None:
+            return cached
+
         async with AsyncSessionLocal() as session:
             q = await session.execute(
                 select(func.count(Notification.id)).where(
@@ -123,40 +436,180 @@ class NotificationRepo:
                     Notification.is_read == False,  # noqa: E712
                 )
             )
-            return int(q.scalar() or 0)
+            count = int(q.scalar() or 0)
 
-    async def mark_read(self, user_id: int, notif_id: int) -> bool:
+        await unread_counters.seed(user_id, count)
+        return count
+
+    async def count_unread_many(self, user_ids: List[int]) -> Dict[int, int]:
+        """Unread counts for several users in one `GROUP BY` (users with none are omitted)."""
+        if not user_ids:
+            return {}
         async with AsyncSessionLocal() as session:
             q = await session.execute(
-                select(Notification).where(
+                select(Notification.user_id, func.count(Notification.id))
+                .where(
+                    Notification.user_id.in_(user_ids),
+                    Notification.is_read == False,  # noqa: E712
+                )
+                .group_by(Notification.user_id)
+            )
+            return {user_id: int(count) for user_id, count in q.all()}
+
+    async def mark_read(self, user_id: int, notif_id: int) -> bool:
+        async with AsyncSessionLocal() as session:
+            # The is_read check is re-evaluated on the locked row, so of two
+            # concurrent calls only one updates it and decrements the counter
+            result = await session.execute(
+                update(Notification)
+                .where(
                     Notification.id == notif_id,
                     Notification.user_id == user_id,
+                    Notification.is_read.isnot(True),
                 )
+                .values(is_read=True)
+                .returning(Notification.id)
+                .execution_options(synchronize_session=False)
             )
-            notif = q.scalar_one_or_none()
-            if not notif:
-                return False
-            notif.is_read = True
-            session.add(notif)
+            marked = len(result.all())
             await session.commit()
-            return True
+            if not marked:
+                # Already read, or not this user's notification
+                exists = await session.execute(
+                    select(Notification.id).where(
+                        Notification.id == notif_id,
+                        Notification.user_id == user_id,
+                    )
+                )
+                return exists.scalar_one_or_none() is not None
+
+        unread = await unread_counters.adjust(user_id, -marked)
+        await EventDispatcher.publish_to_user(
+            user_id, "unread_count", {"unread_count": unread, "read_id": notif_id}
+        )
+        return True
 
     async def mark_all_read(self, user_id: int) -> int:
         async with AsyncSessionLocal() as session:
-            q = await session.execute(
-                select(Notification).where(
+            result = await session.execute(
+                update(Notification)
+                .where(
                     Notification.user_id == user_id,
                     Notification.is_read == False,  # noqa: E712
                 )
+                .values(is_read=True)
+                .returning(Notification.id)
+                .execution_options(synchronize_session=False)
+            )
+            count = len(result.all())
+            await session.commit()
+
+        await unread_counters.reset(user_id)
+        if count:
+            await EventDispatcher.publish_to_user(
+                user_id, "unread_count", {"unread_count": 0, "read_all": True}
+            )
+        return count
+
+
+class ExpiredNotifications(NamedTuple):
+    """What `NotificationRepo.archive_expired` removed in one batch."""
+
+    removed: int
+    # user_id -> unread notifications removed (only users with any)
+    unread_by_user: Dict[int, int]
+
+
+_ARCHIVE_EXPIRED_SQL = text(
+    """
+    WITH doomed AS (
+        SELECT id FROM notifications
+        WHERE type = :type AND created_at < :cutoff
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM notifications n USING doomed
+        WHERE n.id = doomed.id
+        RETURNING n.id, n.user_id, n.type, n.title, n.message, n.link, n.is_read, n.created_at
+    ), archived AS (
+        INSERT INTO notifications_archive
+            (id, user_id, type, title, message, link, is_read, created_at)
+        SELECT id, user_id, type, title, message, link, COALESCE(is_read, false), created_at
+        FROM moved
+        WHERE :archive
+        ON CONFLICT (id) DO NOTHING
+    )
+    SELECT user_id,
+           COUNT(*) AS removed,
+           COUNT(*) FILTER (WHERE is_read IS NOT TRUE) AS unread
+    FROM moved
+    GROUP BY user_id
+    """
+)
+
+# Loose index scan over ix_notifications_type_created_at: one index probe per type
+_DISTINCT_TYPES_SQL = text(
+    """
+    WITH RECURSIVE t AS (
+        SELECT MIN(type) AS type FROM notifications
+        UNION ALL
+        SELECT (SELECT MIN(type) FROM notifications WHERE type > t.type)
+        FROM t WHERE t.type IS NOT NULL
+    )
+    SELECT type FROM t WHERE type IS NOT NULL
+    """
+)
+
+_PURGE_ARCHIVE_SQL = text(
+    """
+    DELETE FROM notifications_archive
+    WHERE id IN (
+        SELECT id FROM notifications_archive
+        WHERE archived_at < :cutoff
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+
+class NotificationRetentionRepo:
+    """Batched removal of expired notifications (see NotificationRetentionJob).
+
+    Every call is one short transaction touching at most `batch_size` rows;
+    rows locked by concurrent writers are skipped, not waited on.
+    """
+
+    async def list_types(self) -> List[str]:
+        async with AsyncSessionLocal() as session:
+            q = await session.execute(_DISTINCT_TYPES_SQL)
+            return [row[0] for row in q.all()]
+
+    async def archive_expired(
+        self, type: str, cutoff: datetime, batch_size: int, archive: bool = True
+    ) -> ExpiredNotifications:
+        """Move (or just delete) up to `batch_size` notifications of `type` older than `cutoff`."""
+        async with AsyncSessionLocal() as session:
+            q = await session.execute(
+                _ARCHIVE_EXPIRED_SQL,
+                {"type": type, "cutoff": cutoff, "batch_size": batch_size, "archive": archive},
+            )
+            rows = q.all()
+            await session.commit()
+        return ExpiredNotifications(
+            removed=sum(row.removed for row in rows),
+            unread_by_user={row.user_id: row.unread for row in rows if row.unread},
+        )
+
+    async def purge_archive(self, cutoff: datetime, batch_size: int) -> int:
+        """Delete up to `batch_size` archived notifications archived before `cutoff`."""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                _PURGE_ARCHIVE_SQL, {"cutoff": cutoff, "batch_size": batch_size}
             )
-            notifs = q.scalars().all()
-            count = len(notifs)
-            if notifs:
-                for n in notifs:
-                    n.is_read = True
-                    session.add(n)
-                await session.commit()
-            return count
+            await session.commit()
+            return result.rowcount or 0
 
 
 class PushSubscriptionRepo:
@@ -197,3 +650,72 @@ class PushSubscriptionRepo:
                 select(PushSubscription).where(PushSubscription.user_id == user_id)
             )
             return list(q.scalars().all())
+
+    async def list_for_users(self, user_ids: List[int], chunk_size: int = 10000) -> List[PushSubscription]:
+        """Load subscriptions of many users with one `IN` query per chunk."""
+        subs: List[PushSubscription] = []
+        unique_ids = sorted({uid for uid in user_ids if uid is not None})
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(unique_ids), chunk_size):
+                q = await session.execute(
+                    select(PushSubscription).where(
+                        PushSubscription.user_id.in_(unique_ids[start:start + chunk_size])
+                    )
+                )
+                subs.extend(q.scalars().all())
+        return subs
+
+    async def delete_by_endpoints(self, endpoints: List[str]) -> int:
+        """Remove subscriptions the push service reported as gone (404/410)."""
+        if not endpoints:
+            return 0
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                delete(PushSubscription).where(PushSubscription.endpoint.in_(endpoints))
+            )
+            await session.commit()
+            return result.rowcount or 0
+
+
+class BroadcastJobRepo:
+    async def create(
+        self,
+        created_by: Optional[int],
+        type: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        send_to_all: bool = False,
+        user_ids: Optional[List[int]] = None,
+    ) -> BroadcastJob:
+        ids = sorted(set(user_ids or [])) if not send_to_all else None
+        async with AsyncSessionLocal() as session:
+            job = BroadcastJob(
+                created_by=created_by,
+                type=type,
+                title=title,
+                message=message,
+                link=link,
+                send_to_all=send_to_all,
+                user_ids=ids,
+                total=len(ids) if ids is not None else None,
+                status="pending",
+            )
+            session.add(job)
+            await session.commit()
+            await session.refresh(job)
+            return job
+
+    async def get(self, job_id: int) -> Optional[BroadcastJob]:
+        async with AsyncSessionLocal() as session:
+            return await session.get(BroadcastJob, job_id)
+
+    async def list_runnable_ids(self) -> List[int]:
+        """Jobs a worker should pick up, including ones interrupted by a crash."""
+        async with AsyncSessionLocal() as session:
+            q = await session.execute(
+                select(BroadcastJob.id)
+                .where(BroadcastJob.status.in_(("pending", "running")))
+                .order_by(BroadcastJob.id)
+            )
+            return [row[0] for row in q.all()]
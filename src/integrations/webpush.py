@@ -1,7 +1,13 @@
 import asyncio
 import json
-from typing import Optional
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
 
+import requests
+from requests.adapters import HTTPAdapter
 from pywebpush import webpush, WebPushException
 
 from src.config.settings import settings
@@ -11,52 +17,263 @@ from src.utils.logging import get_logger
 
 logger = get_logger("webpush")
 
+# Push services answer these for subscriptions that no longer exist
+_EXPIRED_STATUS_CODES = (404, 410)
 
-async def maybe_send_webpush_for_notification(notification: Notification) -> None:
-    """Send Web Push for a notification if VAPID keys and subscriptions exist.
 
-    این تابع اگر تنظیمات وب‌پوش یا سابسکرایب‌ها موجود نباشند، بی‌صدا از ارسال صرف‌نظر می‌کند.
-    """
-    if not settings.get("vapid_public_key") or not settings.get("vapid_private_key"):
-        return
-
-    repo = PushSubscriptionRepo()
-    subs = await repo.list_for_user(notification.user_id)
-    if not subs:
-        return
-
-    payload = {
-        "title": notification.title,
-        "body": notification.message,
-        "link": notification.link or "",
-        "type": notification.type,
+def build_push_payload(title: str, message: str, link: Optional[str], type: str) -> dict:
+    """Build the JSON body the service worker (push-sw.js) expects."""
+    return {
+        "title": title,
+        "body": message,
+        "link": link or "",
+        "type": type,
     }
 
-    vapid_claims = {
-        "sub": settings.get("vapid_subject", "mailto:admin@example.com"),
-    }
 
-    async def _send_one(sub):
-        subscription_info = {
-            "endpoint": sub.endpoint,
-            "keys": {
-                "p256dh": sub.p256dh,
-                "auth": sub.auth,
-            },
+class _OriginRateLimiter:
+    """Token bucket for one push service origin."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the time spent waiting in seconds.
+
+        The token is reserved under the lock (the bucket may go negative)
+        and the wait happens outside it, so callers sleep concurrently
+        instead of queueing behind one another's sleeps.
+        """
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = max(-self._tokens / self.rate, self._paused_until - now, 0.0)
+        waited = 0.0
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            # A 429 may have paused the origin while we slept
+            delay = self._paused_until - time.monotonic()
+        return waited
+
+    def pause(self, seconds: float):
+        """Stop sending to this origin for a while (e.g. after a 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class PushDeliveryEngine:
+    """Batched, pooled Web Push delivery.
+
+    - subscriptions for a batch are loaded with one `IN` query
+    - blocking pywebpush calls run on a bounded thread pool
+    - one keep-alive `requests.Session` per push service origin
+    - per-origin token-bucket rate limiting (honours 429 Retry-After)
+    - subscriptions answered with 404/410 are deleted
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        origin_rate: float = 50.0,
+        origin_burst: float = 100.0,
+        timeout: float = 10.0,
+    ):
+        """
+        Initialize push delivery engine.
+
+        Args:
+            max_workers: Maximum concurrent HTTP sends (threads)
+            origin_rate: Sustained sends per second per push service origin
+            origin_burst: Token bucket size per origin
+            timeout: HTTP timeout per send in seconds
+        """
+        self.max_workers = max_workers
+        self.origin_rate = origin_rate
+        self.origin_burst = origin_burst
+        self.timeout = timeout
+        self.repo = PushSubscriptionRepo()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._sessions: Dict[str, requests.Session] = {}
+        self._limiters: Dict[str, _OriginRateLimiter] = {}
+        self._stats = {
+            'sent': 0,
+            'failed': 0,
+            'expired_removed': 0,
+            'rate_limited': 0,
+            'rate_limit_wait': 0.0,
         }
-        try:
-            await asyncio.to_thread(
-                webpush,
-                subscription_info=subscription_info,
-                data=json.dumps(payload),
-                vapid_private_key=settings.vapid_private_key,
-                vapid_claims=vapid_claims,
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="webpush"
             )
-        except WebPushException as exc:
-            logger.warning("WebPush delivery failed for endpoint %s: %s", sub.endpoint, exc)
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("Unexpected error sending WebPush: %s", exc)
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._executor
+
+    def _session_for(self, origin: str) -> requests.Session:
+        session = self._sessions.get(origin)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._sessions[origin] = session
+        return session
+
+    def _limiter_for(self, origin: str) -> _OriginRateLimiter:
+        limiter = self._limiters.get(origin)
+        if limiter is None:
+            limiter = _OriginRateLimiter(self.origin_rate, self.origin_burst)
+            self._limiters[origin] = limiter
+        return limiter
+
+    async def deliver(self, items: Iterable[Tuple[int, dict]]) -> dict:
+        """
+        Send push messages to every subscription of the given users.
+
+        Args:
+            items: (user_id, payload) pairs
 
-    await asyncio.gather(*[_send_one(sub) for sub in subs])
+        Returns:
+            Counts of sent, failed and expired deliveries for this batch
+        """
+        result = {'sent': 0, 'failed': 0, 'expired': 0}
+        if not settings.get("vapid_public_key") or not settings.get("vapid_private_key"):
+            return result
 
+        payloads_by_user: Dict[int, List[str]] = defaultdict(list)
+        for user_id, payload in items:
+            payloads_by_user[user_id].append(json.dumps(payload))
+        if not payloads_by_user:
+            return result
 
+        subs = await self.repo.list_for_users(list(payloads_by_user.keys()))
+        if not subs:
+            return result
+
+        self._get_executor()
+        vapid_claims = {
+            "sub": settings.get("vapid_subject", "mailto:admin@example.com"),
+        }
+        expired: List[str] = []
+
+        async def _send_one(sub, data: str):
+            origin = "{0.scheme}://{0.netloc}".format(urlsplit(sub.endpoint))
+            waited = await self._limiter_for(origin).acquire()
+            if waited:
+                self._stats['rate_limit_wait'] += waited
+            subscription_info = {
+                "endpoint": sub.endpoint,
+                "keys": {
+                    "p256dh": sub.p256dh,
+                    "auth": sub.auth,
+                },
+            }
+            async with self._semaphore:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._executor,
+                        lambda: webpush(
+                            subscription_info=subscription_info,
+                            data=data,
+                            vapid_private_key=settings.vapid_private_key,
+                            vapid_claims=dict(vapid_claims),
+                            timeout=self.timeout,
+                            requests_session=self._session_for(origin),
+                        ),
+                    )
+                    result['sent'] += 1
+                except WebPushException as exc:
+                    status_code = getattr(exc.response, "status_code", None)
+                    if status_code in _EXPIRED_STATUS_CODES:
+                        expired.append(sub.endpoint)
+                        result['expired'] += 1
+                        return
+                    if status_code == 429:
+                        self._stats['rate_limited'] += 1
+                        retry_after = exc.response.headers.get("Retry-After", "")
+                        self._limiter_for(origin).pause(
+                            float(retry_after) if retry_after.isdigit() else 5.0
+                        )
+                    result['failed'] += 1
+                    logger.warning("WebPush delivery failed for endpoint %s: %s", sub.endpoint, exc)
+                except Exception as exc:  # noqa: BLE001
+                    result['failed'] += 1
+                    logger.exception("Unexpected error sending WebPush: %s", exc)
+
+        # A fixed set of workers drains the queue, rather than one task per
+        # message, so large fan-outs do not create thousands of tasks.
+        queue: asyncio.Queue = asyncio.Queue()
+        for sub in subs:
+            for data in payloads_by_user.get(sub.user_id, []):
+                queue.put_nowait((sub, data))
+
+        async def _worker():
+            while True:
+                try:
+                    sub, data = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await _send_one(sub, data)
+
+        await asyncio.gather(*[_worker() for _ in range(min(self.max_workers, queue.qsize()))])
+
+        if expired:
+            try:
+                removed = await self.repo.delete_by_endpoints(sorted(set(expired)))
+                self._stats['expired_removed'] += removed
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Failed to remove expired push subscriptions: %s", exc)
+
+        self._stats['sent'] += result['sent']
+        self._stats['failed'] += result['failed']
+        return result
+
+    def get_stats(self) -> dict:
+        """Get delivery statistics."""
+        return {
+            **self._stats,
+            'origins': len(self._sessions),
+            'max_workers': self.max_workers,
+        }
+
+    def close(self):
+        """Close HTTP sessions and the worker pool."""
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Global push delivery engine instance
+push_engine = PushDeliveryEngine(
+    max_workers=settings.webpush_max_workers,
+    origin_rate=settings.webpush_origin_rate,
+    origin_burst=settings.webpush_origin_burst,
+    timeout=settings.webpush_timeout,
+)
+
+
+async def maybe_send_webpush_for_notification(notification: Notification) -> None:
+    """Send Web Push for a notification if VAPID keys and subscriptions exist.
+
+    این تابع اگر تنظیمات وب‌پوش یا سابسکرایب‌ها موجود نباشند، بی‌صدا از ارسال صرف‌نظر می‌کند.
+    """
+    payload = build_push_payload(
+        title=notification.title,
+        message=notification.message,
+        link=notification.link,
+        type=notification.type,
+    )
+    await push_engine.deliver([(notification.user_id, payload)])
@@ -0,0 +1,31 @@
+"""Shared fixtures: an in-memory Redis and a helper for running coroutines."""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """Point redis_manager at a fresh fakeredis server (Lua via lupa)."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from src.core.redis_manager import redis_manager
+
+    client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+
+    async def get_connection():
+        return client
+
+    monkeypatch.setattr(redis_manager.pool, "get_connection", get_connection)
+    return client
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on a fresh event loop."""
+    return asyncio.run
@@ -0,0 +1,165 @@
+"""DistributedLock fencing and ownership; EventDeduplicator batching and local cache."""
+import asyncio
+import time
+
+from src.core.concurrency_manager import DistributedLock, EventDeduplicator
+
+
+def test_fencing_tokens_increase_per_key(redis, run):
+    async def scenario():
+        tokens = []
+        for _ in range(3):
+            lock = DistributedLock("job", timeout=5)
+            assert await lock.acquire(wait=False)
+            tokens.append(lock.token)
+            assert await lock.release()
+        assert tokens == sorted(tokens) and len(set(tokens)) == 3
+
+        other = DistributedLock("other-job", timeout=5)
+        assert await other.acquire(wait=False)
+        assert other.token == 1
+
+    run(scenario())
+
+
+def test_busy_lock_is_not_acquired_without_waiting(redis, run):
+    async def scenario():
+        holder = DistributedLock("job", timeout=5)
+        assert await holder.acquire(wait=False)
+        contender = DistributedLock("job", timeout=5)
+        assert not await contender.acquire(wait=False)
+        assert contender.token is None
+        await holder.release()
+
+    run(scenario())
+
+
+def test_expired_holder_cannot_extend_or_release_new_owner(redis, run):
+    async def scenario():
+        stale = DistributedLock("job", timeout=0.05)
+        assert await stale.acquire(wait=False)
+        await asyncio.sleep(0.1)
+
+        fresh = DistributedLock("job", timeout=5)
+        assert await fresh.acquire(wait=False)
+        assert fresh.token > stale.token
+
+        assert not await stale.extend()
+        assert not await stale.release()
+        assert await redis.get(fresh.key) == fresh.lock_value.encode()
+        assert await fresh.release()
+
+    run(scenario())
+
+
+def test_waiter_wakes_on_release_before_backoff(redis, run):
+    async def scenario():
+        holder = DistributedLock("job", timeout=30)
+        assert await holder.acquire(wait=False)
+        # A large backoff: only the release notification can wake the waiter in time
+        waiter = DistributedLock("job", timeout=30, retry_interval=5)
+
+        async def release_soon():
+            await asyncio.sleep(0.2)
+            await holder.release()
+
+        started = time.monotonic()
+        releasing = asyncio.create_task(release_soon())
+        assert await waiter.acquire(max_wait=3)
+        assert time.monotonic() - started < 1.5
+        assert waiter.token > holder.token
+        await releasing
+        await waiter.release()
+
+    run(scenario())
+
+
+def test_auto_renew_keeps_lock_past_timeout(redis, run):
+    async def scenario():
+        lock = DistributedLock("job", timeout=0.3, auto_renew=True)
+        assert await lock.acquire(wait=False)
+        await asyncio.sleep(0.5)
+        assert not lock.lost
+        assert not await DistributedLock("job").acquire(wait=False)
+        assert await lock.release()
+
+    run(scenario())
+
+
+def test_release_stops_the_watchdog_even_if_its_cancellation_is_lost(redis, run):
+    async def scenario():
+        lock = DistributedLock("job", timeout=0.03, auto_renew=True)
+        extending = asyncio.Event()
+        lost = []
+
+        async def extend(timeout=None):
+            extending.set()
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                if lost:
+                    raise
+                lost.append(True)  # swallowed, as wait_for can on Python 3.11
+            return True
+
+        lock.extend = extend
+        assert await lock.acquire(wait=False)
+        await extending.wait()
+        assert await asyncio.wait_for(lock.release(), 1)
+
+    run(scenario())
+
+
+def test_dedup_batch_flags_repeats_within_and_across_batches(redis, run):
+    async def scenario():
+        dedup = EventDeduplicator(local_size=0)
+        events = [("notification", {"id": 1}), ("notification", {"id": 2}), ("notification", {"id": 1})]
+        assert await dedup.check_many(events) == [False, False, True]
+        assert await dedup.check_many([("notification", {"id": 2}), ("payment", {"id": 2})]) == [True, False]
+        assert not await dedup.is_duplicate("config", {"key": "a", "value": 1})
+        assert await dedup.is_duplicate("config", {"key": "a", "value": 1})
+        assert not await dedup.is_duplicate("config", {"key": "a", "value": 2})
+
+    run(scenario())
+
+
+def test_dedup_local_cache_answers_without_redis(redis, monkeypatch, run):
+    async def scenario():
+        dedup = EventDeduplicator(local_size=100, local_ttl=60)
+        assert not await dedup.is_duplicate("notification", {"id": 1})
+
+        async def unavailable():
+            raise ConnectionError("redis down")
+
+        from src.core.redis_manager import redis_manager
+        monkeypatch.setattr(redis_manager.pool, "get_connection", unavailable)
+        assert await dedup.is_duplicate("notification", {"id": 1})
+        # Unknown ids fail open when Redis is unreachable
+        assert not await dedup.is_duplicate("notification", {"id": 3})
+        stats = dedup.get_stats()
+        assert stats["local_hits"] == 1 and stats["redis_errors"] == 1
+
+    run(scenario())
+
+
+def test_dedup_local_entries_never_outlive_redis_ttl():
+    dedup = EventDeduplicator(ttl=5, local_ttl=60)
+    assert dedup.local_ttl == 5
+
+
+def test_event_ids_match_historic_sha256_keys():
+    import hashlib
+    import json
+
+    dedup = EventDeduplicator(hash_name="sha256")
+    payload = {"id": 42, "title": "ignored"}
+    legacy = hashlib.sha256(
+        json.dumps({"id": 42, "type": "notification"}, sort_keys=True).encode()
+    ).hexdigest()[:16]
+    assert dedup._generate_event_id("notification", payload) == f"notification:{legacy}"
+
+    nested = {"key": "a", "value": [1, 2]}
+    legacy = hashlib.sha256(
+        json.dumps({**nested, "type": "config"}, sort_keys=True).encode()
+    ).hexdigest()[:16]
+    assert dedup._generate_event_id("config", nested) == f"config:{legacy}"
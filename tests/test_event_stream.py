@@ -0,0 +1,132 @@
+"""StreamConsumer: ack after success, reclaim failures, dead-letter poison entries.
+
+The consumer's steps are driven directly: a blocked XREADGROUP cannot be
+cancelled cleanly under fakeredis.
+"""
+import asyncio
+
+from src.core.event_stream import EventStream, StreamConsumer
+
+IDLE_MS = 50
+
+
+def _consumer(handler, **kwargs):
+    return StreamConsumer("events", "workers", handler, consumer="c1", claim_idle_ms=IDLE_MS, **kwargs)
+
+
+async def _reclaim(redis, consumer):
+    await asyncio.sleep(IDLE_MS * 2 / 1000)
+    await consumer._reclaim(redis)
+
+
+async def _read(redis, consumer):
+    response = await redis.xreadgroup(consumer.group, consumer.consumer, {consumer.stream: ">"}, count=100)
+    for _, entries in response or ():
+        await consumer._handle(redis, entries)
+
+
+async def _pending(redis):
+    return (await redis.xpending("events", "workers"))["pending"]
+
+
+def test_entries_acked_only_after_handler_succeeds(redis, run):
+    seen = []
+
+    async def handler(event_type, payload, entry_id):
+        if payload["n"] == 2:
+            raise RuntimeError("boom")
+        seen.append((event_type, payload["n"]))
+
+    async def scenario():
+        consumer = _consumer(handler)
+        await consumer._ensure_group(redis)
+        await consumer._ensure_group(redis)  # BUSYGROUP is tolerated
+        stream = EventStream("events")
+        assert await stream.publish_many([("tick", {"n": 1}), ("tick", {"n": 2}), ("tick", {"n": 3})])
+
+        await _read(redis, consumer)
+        assert seen == [("tick", 1), ("tick", 3)]
+        assert await _pending(redis) == 1
+        assert consumer.get_stats()["failed"] == 1
+
+    run(scenario())
+
+
+def test_failed_entry_is_reclaimed_and_retried(redis, run):
+    attempts = []
+
+    async def handler(event_type, payload, entry_id):
+        attempts.append(entry_id)
+        if len(attempts) == 1:
+            raise RuntimeError("transient")
+
+    async def scenario():
+        crashed = _consumer(handler)
+        await crashed._ensure_group(redis)
+        entry_id = await EventStream("events").publish("tick", {"n": 1})
+        await _read(redis, crashed)
+        assert await _pending(redis) == 1
+
+        survivor = StreamConsumer("events", "workers", handler, consumer="c2", claim_idle_ms=IDLE_MS)
+        await survivor._reclaim(redis)  # not idle long enough yet
+        assert attempts == [entry_id]
+        await _reclaim(redis, survivor)
+        assert attempts == [entry_id, entry_id]
+        assert await _pending(redis) == 0
+        assert survivor.get_stats()["reclaimed"] == 1
+
+    run(scenario())
+
+
+def test_poison_entry_is_dead_lettered_after_max_deliveries(redis, run):
+    async def handler(event_type, payload, entry_id):
+        raise RuntimeError("always fails")
+
+    async def scenario():
+        consumer = _consumer(handler, max_deliveries=2)
+        await consumer._ensure_group(redis)
+        entry_id = await EventStream("events").publish("tick", {"n": 1})
+
+        await _read(redis, consumer)      # delivery 1
+        await _reclaim(redis, consumer)   # delivery 2, still failing
+        assert await _pending(redis) == 1
+        await _reclaim(redis, consumer)   # delivered twice: dead-lettered
+        assert await _pending(redis) == 0
+
+        dead = await redis.xrange("events:dead")
+        assert len(dead) == 1
+        fields = dead[0][1]
+        assert fields[b"source_id"].decode() == entry_id
+        assert fields[b"type"] == b"tick"
+        assert consumer.get_stats()["dead_lettered"] == 1
+
+    run(scenario())
+
+
+def test_dead_letter_skips_entries_claimed_by_another_consumer(redis, monkeypatch, run):
+    async def handler(event_type, payload, entry_id):
+        raise RuntimeError("always fails")
+
+    async def scenario():
+        consumer = _consumer(handler, max_deliveries=1)
+        await consumer._ensure_group(redis)
+        entry_id = await EventStream("events").publish("tick", {"n": 1})
+        await _read(redis, consumer)
+
+        xpending_range = redis.xpending_range
+
+        async def stale_pending(*args, **kwargs):
+            pending = await xpending_range(*args, **kwargs)
+            # Another consumer takes the entry over between XPENDING and XCLAIM
+            await redis.xclaim("events", "workers", "c2", 0, [entry_id])
+            return pending
+
+        monkeypatch.setattr(redis, "xpending_range", stale_pending)
+        await _reclaim(redis, consumer)
+
+        assert await redis.xrange("events:dead") == []
+        pending = await redis.xpending_range("events", "workers", min="-", max="+", count=10)
+        assert [item["consumer"] for item in pending] == [b"c2"]
+        assert consumer.get_stats()["dead_lettered"] == 0
+
+    run(scenario())
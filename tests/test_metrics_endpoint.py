@@ -0,0 +1,23 @@
+"""/metrics is off by default and token-protected when a token is set."""
+from fastapi.testclient import TestClient
+
+from src.api import app as app_module
+
+
+def test_metrics_endpoint_access(monkeypatch):
+    client = TestClient(app_module.app)
+    settings = app_module.settings
+
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    monkeypatch.setattr(settings, "metrics_token", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    ok = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert ok.status_code == 200
+    assert "http_request_duration_seconds" in ok.text
+
+    monkeypatch.setattr(settings, "metrics_token", "")
+    assert client.get("/metrics").status_code == 200
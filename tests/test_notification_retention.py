@@ -0,0 +1,106 @@
+"""Notification retention: opt-in defaults, batching and the purge SQL."""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from src.core.notification_retention import NotificationRetentionJob
+from src.db.repos import ExpiredNotifications, _ARCHIVE_EXPIRED_SQL, _PURGE_ARCHIVE_SQL
+
+
+class _FakeRepo:
+    def __init__(self, rows_by_type, archived):
+        self.rows_by_type = rows_by_type
+        self.archived = archived
+        self.archive_calls = []
+        self.purge_cutoffs = []
+
+    async def list_types(self):
+        return list(self.rows_by_type)
+
+    async def archive_expired(self, type, cutoff, batch_size, archive=True):
+        self.archive_calls.append((type, cutoff, archive))
+        rows = self.rows_by_type[type]
+        batch, self.rows_by_type[type] = rows[:batch_size], rows[batch_size:]
+        unread = {}
+        for user_id, is_read in batch:
+            if not is_read:
+                unread[user_id] = unread.get(user_id, 0) + 1
+        return ExpiredNotifications(removed=len(batch), unread_by_user=unread)
+
+    async def purge_archive(self, cutoff, batch_size):
+        self.purge_cutoffs.append(cutoff)
+        removed = min(self.archived, batch_size)
+        self.archived -= removed
+        return removed
+
+
+def _job(monkeypatch, repo, **kwargs):
+    adjusted = []
+
+    async def fix_unread(unread_by_user):
+        adjusted.append(dict(unread_by_user))
+
+    job = NotificationRetentionJob(pause=0, **kwargs)
+    job.repo = repo
+    monkeypatch.setattr(job, "_fix_unread", fix_unread)
+    return job, adjusted
+
+
+def test_retention_is_opt_in():
+    job = NotificationRetentionJob()
+    assert not job.enabled
+    job.start()
+    assert job._task is None
+    assert NotificationRetentionJob(days_by_type={"admin": 30}).enabled
+    assert NotificationRetentionJob(archive_days=365).enabled
+
+
+def test_run_once_expires_in_batches_and_fixes_unread(monkeypatch, run):
+    repo = _FakeRepo(
+        {"admin": [(1, False), (1, True), (2, False), (2, False), (3, True)], "payment": [(1, False)]},
+        archived=5,
+    )
+    job, adjusted = _job(
+        monkeypatch, repo, default_days=30, days_by_type={"payment": 0},
+        archive_days=365, batch_size=2,
+    )
+
+    assert run(job.run_once()) == 5
+    # payment keeps forever; admin drained in 3 batches (2 + 2 + 1)
+    assert [call[0] for call in repo.archive_calls] == ["admin"] * 3
+    assert repo.rows_by_type["payment"] == [(1, False)]
+    assert adjusted == [{1: 1}, {2: 2}]
+    assert repo.archived == 0 and len(repo.purge_cutoffs) == 3
+
+    now = datetime.now(timezone.utc)
+    admin_cutoff = repo.archive_calls[0][1]
+    assert abs(admin_cutoff - (now - timedelta(days=30))) < timedelta(minutes=1)
+    assert job.get_stats()["archive_purged"] == 5
+
+
+def test_archive_purge_skipped_when_archive_kept_forever(monkeypatch, run):
+    repo = _FakeRepo({"admin": []}, archived=10)
+    job, _ = _job(monkeypatch, repo, default_days=30, archive_days=0)
+    run(job.run_once())
+    assert repo.purge_cutoffs == [] and repo.archived == 10
+
+
+def _compiled(clause):
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+def test_archive_sql_moves_one_locked_batch():
+    sql = " ".join(_compiled(_ARCHIVE_EXPIRED_SQL).split())
+    assert set(_ARCHIVE_EXPIRED_SQL._bindparams) == {"type", "cutoff", "batch_size", "archive"}
+    assert "WHERE type = %(type)s AND created_at < %(cutoff)s" in sql
+    assert "LIMIT %(batch_size)s FOR UPDATE SKIP LOCKED" in sql
+    # Archive copy is conditional; the live-table DELETE always happens
+    assert "FROM moved WHERE %(archive)s ON CONFLICT (id) DO NOTHING" in sql
+    assert "COUNT(*) FILTER (WHERE is_read IS NOT TRUE) AS unread" in sql
+
+
+def test_purge_sql_deletes_one_locked_batch_of_old_archive_rows():
+    sql = " ".join(_compiled(_PURGE_ARCHIVE_SQL).split())
+    assert set(_PURGE_ARCHIVE_SQL._bindparams) == {"cutoff", "batch_size"}
+    assert sql.startswith("DELETE FROM notifications_archive WHERE id IN (")
+    assert "WHERE archived_at < %(cutoff)s LIMIT %(batch_size)s FOR UPDATE SKIP LOCKED" in sql
@@ -0,0 +1,46 @@
+"""SSE stream: the hub slot belongs to the response body, not the endpoint."""
+import pytest
+from fastapi import HTTPException
+
+from src.api import notifications_api
+from src.api.auth_api import ClaimsPrincipal
+from src.core.user_event_hub import UserEventHub
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = UserEventHub(max_clients=1)
+    monkeypatch.setattr(hub, "_ensure_reader", lambda: None)
+    monkeypatch.setattr(notifications_api, "user_event_hub", hub)
+
+    async def count_unread(user_id):
+        return 3
+
+    monkeypatch.setattr(notifications_api.notification_repo, "count_unread", count_unread)
+    return hub
+
+
+def _user():
+    return ClaimsPrincipal(id=7, role="user", is_active=True)
+
+
+def test_response_never_iterated_holds_no_slot(hub, run):
+    run(notifications_api.stream_notifications(current_user=_user()))
+    assert hub._client_count == 0
+
+
+def test_slot_taken_while_streaming_and_released_after(hub, run):
+    async def scenario():
+        response = await notifications_api.stream_notifications(current_user=_user())
+        body = response.body_iterator
+        assert await body.__anext__() == 'event: unread_count\ndata: {"unread_count": 3}\n\n'
+        assert hub._client_count == 1
+
+        with pytest.raises(HTTPException) as exc:
+            await notifications_api.stream_notifications(current_user=_user())
+        assert exc.value.status_code == 503
+
+        await body.aclose()
+        assert hub._client_count == 0 and hub._clients == {}
+
+    run(scenario())
@@ -0,0 +1,84 @@
+"""Principal cache: both tiers serve cached users until invalidated."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from src.api import auth_api
+from src.core.principal_cache import PrincipalCache
+from src.db.models import User
+
+
+def _loader(users, loads):
+    async def load(user_id):
+        loads.append(user_id)
+        return users.get(user_id)
+    return load
+
+
+def test_invalidate_drops_both_tiers(redis, run):
+    async def scenario():
+        users = {7: User(id=7, email="u@example.com", full_name=None, role="user", is_active=True)}
+        loads = []
+        worker_a = PrincipalCache(ttl=60)
+        worker_b = PrincipalCache(ttl=60)
+
+        await worker_a.get(7, _loader(users, loads))
+        assert await worker_b.get(7, _loader(users, loads)) is not None  # Redis tier hit
+        assert loads == [7]
+
+        users[7] = User(id=7, email="u@example.com", full_name="Sara", role="user", is_active=True)
+        await worker_a.invalidate(7)
+        assert (await worker_a.get(7, _loader(users, loads))).full_name == "Sara"
+        assert loads == [7, 7]
+        assert worker_b.get_stats()["redis_hits"] == 1
+
+    run(scenario())
+
+
+class _OTPSession:
+    """Answers the two SELECTs of login_with_otp: the OTP, then the user."""
+
+    def __init__(self, otp, user):
+        self.results = [otp, user]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        value = self.results.pop(0)
+        return SimpleNamespace(scalar_one_or_none=lambda: value)
+
+    def add(self, obj):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+def test_login_with_otp_invalidates_cached_principal(redis, monkeypatch, run):
+    phone, code = "09123456789", "123456"
+    otp = SimpleNamespace(
+        verified=False,
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+        code_hash=auth_api._hash_otp(phone, code),
+    )
+    user = User(id=7, email="u@example.com", phone_number=phone, full_name=None,
+                role="user", is_active=True)
+    invalidated = []
+
+    async def invalidate(user_id):
+        invalidated.append(user_id)
+
+    monkeypatch.setattr(auth_api, "AsyncSessionLocal", lambda: _OTPSession(otp, user))
+    monkeypatch.setattr(auth_api.principal_cache, "invalidate", invalidate)
+
+    payload = auth_api.OTPVerify(phone_number=phone, code=code, full_name="Sara")
+    token = run(auth_api.login_with_otp(payload))
+    assert token["token_type"] == "bearer"
+    assert user.full_name == "Sara"
+    assert invalidated == [7]
@@ -0,0 +1,74 @@
+"""SubscriptionHub: fan-out over one connection, released when idle."""
+import asyncio
+
+from src.core.subscription_hub import SubscriptionHub
+
+
+async def _wait_ready(hub):
+    await asyncio.wait_for(hub._ready.wait(), timeout=2)
+
+
+def test_reader_stops_when_last_subscription_closes(redis, run):
+    async def scenario():
+        hub = SubscriptionHub(default_queue_size=10)
+        first = await hub.subscribe(channels=["a"])
+        second = await hub.subscribe(channels=["a", "b"])
+        await _wait_ready(hub)
+
+        await redis.publish("a", "x")
+        assert (await first.get(timeout=2))["data"] == b"x"
+        assert (await second.get(timeout=2))["channel"] == "a"
+
+        await first.close()
+        await second.close()
+        await asyncio.wait_for(hub._task, timeout=3)
+        assert hub.get_stats()["channels"] == 0
+        assert not hub.get_stats()["connected"]
+
+        # A new subscriber starts a new reader and gets no LAGGED marker
+        third = await hub.subscribe(channels=["b"])
+        await _wait_ready(hub)
+        await redis.publish("b", "y")
+        assert (await third.get(timeout=2))["data"] == b"y"
+        assert hub.get_stats()["reconnects"] == 0
+        await hub.close()
+
+    run(scenario())
+
+
+def test_changes_made_while_connecting_are_applied(redis, run):
+    async def scenario():
+        hub = SubscriptionHub(default_queue_size=10)
+        first = await hub.subscribe(channels=["a"])
+        await asyncio.sleep(0)  # reader starts subscribing to "a"
+        second = await hub.subscribe(channels=["b"])
+        await first.close()
+        await _wait_ready(hub)
+
+        assert await redis.pubsub_numsub("a", "b") == [(b"a", 0), (b"b", 1)]
+        await redis.publish("b", "y")
+        assert (await second.get(timeout=2))["data"] == b"y"
+        await hub.close()
+
+    run(scenario())
+
+
+def test_close_ends_listen_and_get(redis, run):
+    async def scenario():
+        hub = SubscriptionHub(default_queue_size=10)
+        sub = await hub.subscribe(channels=["a"])
+        await _wait_ready(hub)
+
+        async def consume():
+            return [message async for message in sub.listen()]
+
+        listener = asyncio.create_task(consume())
+        await redis.publish("a", "x")
+        await asyncio.sleep(0.1)
+        await sub.close()
+        received = await asyncio.wait_for(listener, timeout=2)
+        assert [m["data"] for m in received] == [b"x"]
+        assert await sub.get(timeout=0.1) is None
+        await hub.close()
+
+    run(scenario())
@@ -0,0 +1,185 @@
+"""Token-epoch revocation: revoked tokens must never pass the fast path."""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.api import admin_api, auth_api
+from src.api.auth_api import create_access_token, get_current_principal, issue_access_token
+from src.core.token_epochs import token_epochs
+from src.db.models import User
+
+
+def _row(**overrides):
+    values = dict(id=7, email="u@example.com", role="admin", is_active=True, token_epoch=0)
+    values.update(overrides)
+    return User(**values)
+
+
+@pytest.fixture
+def db_user(monkeypatch):
+    """The users row as the database currently has it."""
+    holder = {"user": _row(), "loads": 0}
+
+    async def get_user_by_id(user_id):
+        holder["loads"] += 1
+        return holder["user"] if user_id == holder["user"].id else None
+
+    monkeypatch.setattr(auth_api, "get_user_by_id", get_user_by_id)
+    return holder
+
+
+def _decode(token):
+    return auth_api._decode_access_token(token)
+
+
+def test_token_takes_epoch_and_role_from_the_same_row(run):
+    token = run(issue_access_token(_row(role="user", token_epoch=4)))
+    assert _decode(token)["ep"] == 4 and _decode(token)["role"] == "user"
+
+
+def test_token_older_than_epoch_is_rejected(redis, db_user, run):
+    async def scenario():
+        token = create_access_token({"sub": 7, "role": "admin", "ep": 0})
+        await token_epochs.advance(7, 0)
+        assert (await get_current_principal(token)).role == "admin"
+        assert db_user["loads"] == 0  # fast path
+
+        await token_epochs.advance(7, 1)
+        with pytest.raises(HTTPException) as exc:
+            await get_current_principal(token)
+        assert exc.value.status_code == 401
+
+        fresh = create_access_token({"sub": 7, "role": "user", "ep": 1})
+        assert (await get_current_principal(fresh)).role == "user"
+
+    run(scenario())
+
+
+def test_lost_epoch_key_falls_back_to_the_row(redis, db_user, run):
+    async def scenario():
+        db_user["user"] = _row(role="user", token_epoch=2)
+        revoked = create_access_token({"sub": 7, "role": "admin", "ep": 1})
+        current = create_access_token({"sub": 7, "role": "user", "ep": 2})
+
+        await redis.flushall()  # evicted or lost
+        with pytest.raises(HTTPException) as exc:
+            await get_current_principal(revoked)
+        assert exc.value.status_code == 401
+        assert db_user["loads"] == 1
+
+        # The row's epoch is cached again; later requests take the fast path
+        assert await token_epochs.current(7) == 2
+        assert (await get_current_principal(current)).role == "user"
+        assert db_user["loads"] == 1
+
+    run(scenario())
+
+
+def test_cached_epoch_never_moves_backwards(redis, run):
+    async def scenario():
+        await token_epochs.advance(7, 3)
+        await token_epochs.advance(7, 1)  # seed from a row read before the bump
+        assert await token_epochs.current(7) == 3
+
+    run(scenario())
+
+
+class _FakeSession:
+    def __init__(self, user):
+        self.user = user
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.user)
+
+    def add(self, obj):
+        pass
+
+    async def commit(self):
+        # What the database does with `token_epoch = token_epoch + 1`
+        if not isinstance(self.user.token_epoch, int):
+            self.user.token_epoch = self.epoch_before + 1
+        self.committed = True
+
+    async def refresh(self, obj):
+        pass
+
+
+def _user():
+    return SimpleNamespace(
+        id=7, role="admin", is_active=True, email="u@example.com",
+        phone_number=None, full_name=None, created_at=None, token_epoch=3,
+    )
+
+
+@pytest.fixture
+def session(monkeypatch):
+    holder = {}
+
+    def factory():
+        session = _FakeSession(_user())
+        session.epoch_before = session.user.token_epoch
+        holder["session"] = session
+        return session
+
+    async def invalidate(user_id):
+        holder["invalidated"] = user_id
+
+    monkeypatch.setattr(admin_api, "AsyncSessionLocal", factory)
+    monkeypatch.setattr(admin_api.principal_cache, "invalidate", invalidate)
+    return holder
+
+
+ADMIN = SimpleNamespace(role="super_admin")
+
+
+@pytest.mark.parametrize("payload", [{"is_active": False}, {"role": "user"}])
+def test_revocation_bumps_row_then_cache(session, redis, run, payload):
+    run(admin_api.update_user_admin(7, payload, current_admin=ADMIN))
+    assert session["session"].committed
+    assert session["session"].user.token_epoch == 4
+    assert session["invalidated"] == 7
+    assert run(token_epochs.current(7)) == 4
+
+
+def test_cache_failure_after_commit_is_reported(session, monkeypatch, run):
+    async def publish(user_id, epoch, attempts=3):
+        return False  # Redis unavailable
+
+    monkeypatch.setattr(admin_api.token_epochs, "publish", publish)
+    with pytest.raises(HTTPException) as exc:
+        run(admin_api.update_user_admin(7, {"is_active": False}, current_admin=ADMIN))
+    assert exc.value.status_code == 503
+    # The revocation itself is committed on the row
+    assert session["session"].committed
+    assert session["session"].user.token_epoch == 4
+
+
+def test_publish_drops_the_cached_epoch_when_it_cannot_advance(redis, monkeypatch, run):
+    async def advance(user_id, epoch):
+        return False
+
+    async def scenario():
+        await token_epochs.advance(7, 1)
+        monkeypatch.setattr(token_epochs, "advance", advance)
+        assert await token_epochs.publish(7, 2)
+        assert await token_epochs.current(7) is None
+
+    run(scenario())
+
+
+def test_profile_edit_does_not_revoke(session, monkeypatch, run):
+    async def publish(user_id, epoch, attempts=3):
+        raise AssertionError("epoch bumped for a harmless edit")
+
+    monkeypatch.setattr(admin_api.token_epochs, "publish", publish)
+    run(admin_api.update_user_admin(7, {"full_name": "New"}, current_admin=ADMIN))
+    assert session["session"].committed
+    assert session["session"].user.token_epoch == 3
@@ -0,0 +1,98 @@
+"""Unread counters: cached-only adjustments and locked reconciliation."""
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from src.core import unread_counters as unread_module
+from src.core.unread_counters import UnreadCounterStore
+from src.db import repos
+
+
+def test_adjust_only_touches_cached_counters_and_clamps_at_zero(redis, run):
+    async def scenario():
+        store = UnreadCounterStore()
+        await store.seed(1, 5)
+        assert await store.adjust_many({1: -2, 2: 3}) == {1: 3, 2: None}
+        assert await redis.exists(store._key(2)) == 0
+        assert await store.adjust(1, -10) == 0
+
+    run(scenario())
+
+
+def test_reconcile_runs_only_under_the_lock(redis, monkeypatch, run):
+    calls = []
+
+    async def reconcile(batch_size=1000):
+        calls.append(batch_size)
+        return 3
+
+    async def scenario():
+        other = unread_module.concurrency_manager.get_lock("unread_counters_reconcile", timeout=60)
+        assert await other.acquire(wait=False)
+        store = UnreadCounterStore()
+        monkeypatch.setattr(store, "reconcile", reconcile)
+        assert await store._reconcile_locked() is None
+        assert calls == []  # another process holds the lock
+
+        await other.release()
+        assert await store._reconcile_locked() == 3
+        assert calls == [1000]
+        # Released afterwards: the next pass (here or elsewhere) can take it
+        assert await other.acquire(wait=False)
+        await other.release()
+
+    run(scenario())
+
+
+class _ReadSession:
+    """Answers the mark_read UPDATE with the rows Postgres would return."""
+
+    def __init__(self, updated, exists=True):
+        self.results = [updated, [(1,)] if exists else []]
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        rows = self.results.pop(0)
+        return SimpleNamespace(all=lambda: rows, scalar_one_or_none=lambda: rows[0][0] if rows else None)
+
+    async def commit(self):
+        pass
+
+
+def _mark_read(monkeypatch, run, session):
+    published = []
+
+    async def publish_to_user(user_id, event_type, payload):
+        published.append(payload)
+
+    monkeypatch.setattr(repos, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(repos.EventDispatcher, "publish_to_user", publish_to_user)
+    return run(repos.NotificationRepo().mark_read(1, 9)), published
+
+
+def test_mark_read_decrements_only_when_it_flips_the_row(redis, monkeypatch, run):
+    run(unread_module.unread_counters.seed(1, 3))
+    session = _ReadSession(updated=[(9,)])
+    ok, published = _mark_read(monkeypatch, run, session)
+
+    assert ok and published == [{"unread_count": 2, "read_id": 9}]
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "is_read IS NOT true" in sql
+
+
+def test_mark_read_of_a_read_notification_leaves_the_counter(redis, monkeypatch, run):
+    run(unread_module.unread_counters.seed(1, 3))
+    # A concurrent call already flipped it: the conditional UPDATE matches nothing
+    ok, published = _mark_read(monkeypatch, run, _ReadSession(updated=[]))
+    assert ok and published == []
+    assert run(unread_module.unread_counters.get(1)) == 3
+
+    ok, _ = _mark_read(monkeypatch, run, _ReadSession(updated=[], exists=False))
+    assert not ok
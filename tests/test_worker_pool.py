@@ -0,0 +1,48 @@
+"""BoundedWorkerPool: slots are held until the worker is really done."""
+import asyncio
+import threading
+
+import pytest
+
+from src.core.worker_pool import BoundedWorkerPool, PoolSaturatedError
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_worker_finishes(run):
+    release = threading.Event()
+
+    async def scenario():
+        pool = BoundedWorkerPool("test", max_workers=1, max_pending=1)
+        call = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+
+        # The worker is still blocked: the pool must stay saturated
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(lambda: None)
+        assert pool.get_stats()["pending"] == 1
+
+        release.set()
+        for _ in range(100):
+            if pool.get_stats()["pending"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.get_stats()["pending"] == 0
+        assert await pool.run(lambda: 42) == 42
+        pool.shutdown()
+
+    run(scenario())
+
+
+def test_results_and_errors_propagate(run):
+    async def scenario():
+        pool = BoundedWorkerPool("test", max_workers=2, max_pending=4)
+        assert await pool.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(lambda: 1 / 0)
+        await asyncio.sleep(0.01)
+        stats = pool.get_stats()
+        assert stats["pending"] == 0 and stats["completed"] == 2
+        pool.shutdown()
+
+    run(scenario())